@@ -0,0 +1,72 @@
+"""利用規約への同意登録の書き込みをまとめる（グループコミット）
+
+同時に届いた同意登録を1トランザクションで INSERT し、待っている各リクエストに
+それぞれの結果（登録・重複・利用規約なし）を返す。
+"""
+import asyncio
+from typing import List, Tuple
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+from .config import settings
+from .database import SessionLocal
+from .group_commit import GroupCommitWriter
+from .models import models
+
+AGREEMENT_CREATED = "created"
+AGREEMENT_DUPLICATE = "duplicate"
+TERMS_NOT_FOUND = "terms_not_found"
+
+def apply_agreement_batch(db: Session, requests: List[Tuple[int, str]]) -> List[str]:
+    """(terms_id, member_id) のバッチを登録し、要素ごとの結果を返す
+
+    同じバッチ内の同じ組は先に投入されたものだけを登録とし、残りは重複とする。
+    """
+    terms_ids = set(db.scalars(
+        select(models.TermsOfService.id).where(
+            models.TermsOfService.id.in_({terms_id for terms_id, _ in requests})
+        )
+    ))
+    keys = list(dict.fromkeys(key for key in requests if key[0] in terms_ids))
+    inserted = set()
+    if keys:
+        # 既存の同意は一意制約で読み飛ばし、実際に登録された組だけを RETURNING で受け取る
+        table = models.TermsAgreement.__table__
+        statement = insert(table)\
+            .on_conflict_do_nothing(index_elements=["terms_id", "member_id"])\
+            .returning(table.c.terms_id, table.c.member_id)
+        inserted = {tuple(row) for row in db.execute(
+            statement, [{"terms_id": terms_id, "member_id": member_id} for terms_id, member_id in keys]
+        )}
+
+    outcomes = []
+    for key in requests:
+        if key[0] not in terms_ids:
+            outcomes.append(TERMS_NOT_FOUND)
+        elif key in inserted:
+            inserted.discard(key)
+            outcomes.append(AGREEMENT_CREATED)
+        else:
+            outcomes.append(AGREEMENT_DUPLICATE)
+    return outcomes
+
+agreement_writer = GroupCommitWriter(
+    "agreements",
+    apply_agreement_batch,
+    SessionLocal,
+    max_batch_rows=settings.agreement_batch_max_rows,
+    max_delay_ms=settings.agreement_batch_max_delay_ms
+)
+
+async def record_agreement_coalesced(terms_id: int, member_id: str) -> dict:
+    """同意登録をグループコミットに投入し、コミット後にこのリクエストの結果を返す"""
+    outcome = await asyncio.wrap_future(agreement_writer.submit((terms_id, member_id)))
+    if outcome == TERMS_NOT_FOUND:
+        raise HTTPException(status_code=404, detail="Terms of service not found")
+    if outcome == AGREEMENT_DUPLICATE:
+        raise HTTPException(
+            status_code=400,
+            detail="Member has already agreed to these terms"
+        )
+    return {"status": "success", "message": "Agreement recorded"}
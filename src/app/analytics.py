@@ -0,0 +1,209 @@
+import threading
+import time
+from typing import List, Optional
+import numpy as np
+from sqlalchemy import String, select, type_coerce
+from sqlalchemy.orm import Session
+from .models import models
+
+# 他プロセスでの施策の更新を取り込むための再読込間隔（秒）
+PORTFOLIO_CACHE_TTL_SECONDS = 60.0
+
+STATUSES = list(models.InitiativeStatus)
+_STATUS_CODES = {status.name: code for code, status in enumerate(STATUSES)}
+# ステータス未設定の施策のグループ
+UNKNOWN_STATUS = len(STATUSES)
+
+class StatusGroup:
+    """同じステータスの施策について、集計に使う値を読込時に前計算しておく"""
+
+    def __init__(self, ids: np.ndarray, irr: np.ndarray, cost: np.ndarray):
+        irr_valid = ~np.isnan(irr)
+        cost_valid = ~np.isnan(cost)
+        # コスト加重IRRは irr・cost がともに設定され、コストが正の施策のみを対象にする
+        weighted = irr_valid & cost_valid & (cost > 0)
+        self.count = len(ids)
+        self.total_cost = float(cost[cost_valid].sum())
+        self.irr_sum = float(irr[irr_valid].sum())
+        self.irr_count = int(irr_valid.sum())
+        self.weight_sum = float(cost[weighted].sum())
+        self.weighted_irr_sum = float(np.dot(irr[weighted], cost[weighted]))
+        self.sorted_costs = np.sort(cost[cost_valid])
+        # IRR 降順（同値は id 昇順）の並び。NaN は含めない
+        ranked = np.flatnonzero(irr_valid)
+        ranked = ranked[np.lexsort((ids[ranked], -irr[ranked]))]
+        self.ranked_ids = ids[ranked]
+        self.ranked_irr = irr[ranked]
+        self.ranked_cost = cost[ranked]
+
+class InitiativeArrays:
+    """施策の (id, irr, cost, status) を列ごとの NumPy 配列で保持する
+
+    irr・cost が未設定の行は NaN、status は STATUSES のインデックス（未設定は UNKNOWN_STATUS）。
+    ステータスごとの StatusGroup を前計算し、集計はグループの組み合わせで行う。
+    """
+
+    def __init__(self, ids: np.ndarray, irr: np.ndarray, cost: np.ndarray, status: np.ndarray):
+        self.ids = ids
+        self.irr = irr
+        self.cost = cost
+        self.status = status
+        self.groups = {}
+        for code in np.unique(status):
+            mask = status == code
+            self.groups[int(code)] = StatusGroup(ids[mask], irr[mask], cost[mask])
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+def load_initiative_arrays(db: Session) -> InitiativeArrays:
+    """施策の分析対象列を1本のクエリで読み込む"""
+    table = models.Initiative.__table__
+    # Enum への変換を省くため status は格納値（名前）のまま読む
+    rows = db.execute(
+        select(table.c.id, table.c.irr, table.c.cost, type_coerce(table.c.status, String))
+    ).all()
+    count = len(rows)
+    if count == 0:
+        empty = np.empty(0)
+        return InitiativeArrays(empty.astype(np.int64), empty, empty, empty.astype(np.int8))
+
+    ids, irr, cost, status = zip(*rows)
+    return InitiativeArrays(
+        np.fromiter(ids, dtype=np.int64, count=count),
+        np.array(irr, dtype=np.float64),
+        np.array(cost, dtype=np.float64),
+        np.fromiter((_STATUS_CODES.get(s, UNKNOWN_STATUS) for s in status), dtype=np.int8, count=count),
+    )
+
+def _weighted_irr(groups: List[StatusGroup]) -> Optional[float]:
+    weight = sum(group.weight_sum for group in groups)
+    if weight == 0:
+        return None
+    return sum(group.weighted_irr_sum for group in groups) / weight
+
+def _top_by_irr(groups: List[StatusGroup], codes: List[int], top_k: int) -> list:
+    # 各グループの上位 top_k 件だけを結合して並べ直す
+    ids = np.concatenate([group.ranked_ids[:top_k] for group in groups])
+    irr = np.concatenate([group.ranked_irr[:top_k] for group in groups])
+    cost = np.concatenate([group.ranked_cost[:top_k] for group in groups])
+    status = np.concatenate([np.full(min(top_k, len(group.ranked_ids)), code) for code, group in zip(codes, groups)])
+    order = np.lexsort((ids, -irr))[:top_k]
+    return [
+        {
+            "id": int(ids[i]),
+            "irr": float(irr[i]),
+            "cost": None if np.isnan(cost[i]) else float(cost[i]),
+            "status": STATUSES[status[i]].value if status[i] != UNKNOWN_STATUS else None,
+        }
+        for i in order
+    ]
+
+def _cost_histogram(groups: List[StatusGroup], bins: int) -> dict:
+    # np.histogram と同じ等幅の区間で、各グループのソート済みコストを二分探索して数える
+    costs = [group.sorted_costs for group in groups if len(group.sorted_costs)]
+    if not costs:
+        return {"edges": np.zeros(bins + 1).tolist(), "counts": [0] * bins}
+    low = min(sorted_costs[0] for sorted_costs in costs)
+    high = max(sorted_costs[-1] for sorted_costs in costs)
+    if low == high:
+        low, high = low - 0.5, high + 0.5
+    edges = np.linspace(low, high, bins + 1)
+    counts = np.zeros(bins, dtype=np.int64)
+    for sorted_costs in costs:
+        positions = np.searchsorted(sorted_costs, edges, side="left")
+        # 最後の区間は上端を含む
+        positions[-1] = np.searchsorted(sorted_costs, edges[-1], side="right")
+        counts += np.diff(positions)
+    return {"edges": edges.tolist(), "counts": counts.tolist()}
+
+def summarize_portfolio(
+    arrays: InitiativeArrays,
+    top_k: int = 10,
+    bins: int = 10,
+    statuses: Optional[List[models.InitiativeStatus]] = None
+) -> dict:
+    """上位施策・コスト加重IRR・コスト分布・ステータス別集計を計算する"""
+    if statuses:
+        codes = [code for code in (STATUSES.index(status) for status in statuses) if code in arrays.groups]
+    else:
+        codes = sorted(arrays.groups)
+    groups = [arrays.groups[code] for code in codes]
+
+    by_status = [
+        {
+            "status": STATUSES[code].value,
+            "count": group.count,
+            "total_cost": group.total_cost,
+            "mean_irr": group.irr_sum / group.irr_count if group.irr_count else None,
+            "cost_weighted_irr": _weighted_irr([group]),
+        }
+        for code, group in zip(codes, groups) if code != UNKNOWN_STATUS
+    ]
+
+    return {
+        "count": sum(group.count for group in groups),
+        "total_cost": sum(group.total_cost for group in groups),
+        "cost_weighted_irr": _weighted_irr(groups),
+        "top_by_irr": _top_by_irr(groups, codes, top_k) if groups else [],
+        "cost_histogram": _cost_histogram(groups, bins),
+        "by_status": by_status,
+    }
+
+class PortfolioCache:
+    """施策の分析用配列をプロセス内にキャッシュする
+
+    施策の作成・ステータス変更時に invalidate し、それ以外は TTL 経過後に再読込する。
+    """
+
+    def __init__(self, ttl_seconds: float = PORTFOLIO_CACHE_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entry = None  # (InitiativeArrays, 読込時刻)
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, db: Session) -> InitiativeArrays:
+        entry = self._entry
+        if entry is not None and time.monotonic() - entry[1] < self.ttl_seconds:
+            with self._lock:
+                self.hits += 1
+            return entry[0]
+
+        with self._lock:
+            self.misses += 1
+            generation = self._generation
+        arrays = load_initiative_arrays(db)
+        with self._lock:
+            # 読込中に invalidate された場合は古い可能性があるのでキャッシュしない
+            if generation == self._generation:
+                self._entry = (arrays, time.monotonic())
+        return arrays
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entry = None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entry = None
+            self.hits = 0
+            self.misses = 0
+
+    def render_metrics(self) -> list:
+        """Prometheus テキスト形式のヒット・ミス数"""
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        return [
+            "# HELP portfolio_cache_hits_total Initiative analytics cache hits.",
+            "# TYPE portfolio_cache_hits_total counter",
+            f"portfolio_cache_hits_total {hits}",
+            "# HELP portfolio_cache_misses_total Initiative analytics cache misses.",
+            "# TYPE portfolio_cache_misses_total counter",
+            f"portfolio_cache_misses_total {misses}",
+        ]
+
+portfolio_cache = PortfolioCache()
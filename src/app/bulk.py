@@ -0,0 +1,45 @@
+"""複数行のステータス遷移を集合演算の UPDATE でまとめて適用する"""
+from typing import List
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+UPDATED = "updated"
+NOT_FOUND = "not_found"
+INVALID_TRANSITION = "invalid_transition"
+
+def bulk_transition(
+    db: Session,
+    model,
+    ids: List[int],
+    values: dict,
+    conditions: tuple = (),
+    invalid_detail: str = "Invalid status transition"
+) -> dict:
+    """ids の行のうち conditions を満たすものに values を1回の UPDATE ... RETURNING で適用する
+
+    更新されなかったIDは、存在するなら遷移の条件を満たさなかったもの（invalid_transition）、
+    存在しなければ not_found として、入力順（重複は除く）に結果を返す。コミットもここで行う。
+    """
+    table = model.__table__
+    unique_ids = list(dict.fromkeys(ids))
+    updated = set(db.scalars(
+        update(table)
+        .where(table.c.id.in_(unique_ids), *conditions)
+        .values(**values)
+        .returning(table.c.id)
+    ))
+    existing = set()
+    rest = [id_ for id_ in unique_ids if id_ not in updated]
+    if rest and conditions:
+        existing = set(db.scalars(select(table.c.id).where(table.c.id.in_(rest))))
+    db.commit()
+
+    results = []
+    for id_ in unique_ids:
+        if id_ in updated:
+            results.append({"id": id_, "outcome": UPDATED})
+        elif id_ in existing:
+            results.append({"id": id_, "outcome": INVALID_TRANSITION, "error": invalid_detail})
+        else:
+            results.append({"id": id_, "outcome": NOT_FOUND, "error": f"{model.__name__} not found"})
+    return {"updated": len(updated), "failed": len(unique_ids) - len(updated), "results": results}
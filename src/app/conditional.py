@@ -0,0 +1,132 @@
+"""条件付き GET（ETag・Last-Modified）
+
+検証子は行の (id, updated_at) の組から作る。利用規約は作成後に変更されないので created_at を使う。
+If-None-Match / If-Modified-Since 付きのリクエストでは id・更新日時の列だけを読んで検証子を求め、
+一致すれば ORM オブジェクトの生成や Pydantic の検証を行わずに 304 を返す。
+非同期セッションのルーター向けに、同じ判定を行う *_async の関数も用意する。
+"""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Iterable, Optional, Sequence, Tuple
+from fastapi import Request, Response
+from sqlalchemy import select
+
+def _version_column(model):
+    return model.updated_at if hasattr(model, "updated_at") else model.created_at
+
+def _kind(model, page: bool, variant: str = "") -> str:
+    # 1件の表現とページ（配列）の表現、同じ行の別の表現（variant）は別の ETag にする
+    kind = f"{model.__tablename__}[]" if page else model.__tablename__
+    return f"{kind}:{variant}" if variant else kind
+
+def _timestamp(moment: Optional[datetime]) -> datetime:
+    # 保存値はタイムゾーンなしのUTC
+    return (moment or datetime(1970, 1, 1)).replace(tzinfo=timezone.utc)
+
+def compute_validators(kind: str, rows: Iterable[Tuple[int, Optional[datetime]]]) -> Tuple[str, Optional[str]]:
+    """(id, 更新日時) の並びから (ETag, Last-Modified) を求める
+
+    ページの ETag には並び順のIDと更新日時がすべて反映されるので、行の追加・更新や
+    フィルター条件からの出入りでページの内容が変われば ETag も変わる。
+    """
+    digest = hashlib.sha1(kind.encode())
+    latest = None
+    for id_, moment in rows:
+        moment = _timestamp(moment)
+        digest.update(f"|{id_}:{moment.isoformat()}".encode())
+        latest = moment if latest is None else max(latest, moment)
+    last_modified = format_datetime(latest, usegmt=True) if latest is not None else None
+    return f'W/"{digest.hexdigest()[:20]}"', last_modified
+
+def _etag_matches(header: str, etag: str) -> bool:
+    # 弱い比較（W/ の有無は区別しない）
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in header.split(","))
+
+def _not_modified_since(header: str, last_modified: Optional[str]) -> bool:
+    if last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        # タイムゾーンなし・"-0000" の日時は HTTP-date と同じく GMT とみなす
+        since = since.replace(tzinfo=timezone.utc)
+    return parsedate_to_datetime(last_modified) <= since
+
+def is_conditional(request: Request) -> bool:
+    return "if-none-match" in request.headers or "if-modified-since" in request.headers
+
+def not_modified_response(request: Request, etag: str, last_modified: Optional[str]) -> Optional[Response]:
+    """検証子がリクエストの条件に一致すれば 304 のレスポンスを返す"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        matched = _etag_matches(if_none_match, etag)
+    else:
+        matched = _not_modified_since(request.headers.get("if-modified-since", ""), last_modified)
+    if not matched:
+        return None
+    response = Response(status_code=304)
+    set_validators(response, etag, last_modified)
+    return response
+
+def set_validators(response: Response, etag: str, last_modified: Optional[str]) -> None:
+    response.headers["ETag"] = etag
+    if last_modified is not None:
+        response.headers["Last-Modified"] = last_modified
+
+def item_not_modified(request: Request, db, model, item_id: int) -> Optional[Response]:
+    """条件付きリクエストなら id と更新日時だけを読んで 304 にできるかを判定する
+
+    行が存在しない場合は None を返し、通常の処理（404）に任せる。
+    """
+    if not is_conditional(request):
+        return None
+    row = db.query(model.id, _version_column(model)).filter(model.id == item_id).first()
+    if row is None:
+        return None
+    return not_modified_response(request, *compute_validators(_kind(model, False), [tuple(row)]))
+
+def page_not_modified(request: Request, page_query, model, variant: str = "") -> Optional[Response]:
+    """ページのクエリを id と更新日時の列だけに絞って読み、304 にできるかを判定する"""
+    if not is_conditional(request):
+        return None
+    rows = page_query.with_entities(model.id, _version_column(model)).all()
+    return not_modified_response(request, *compute_validators(_kind(model, True, variant), rows))
+
+async def item_not_modified_async(request: Request, db, model, item_id: int) -> Optional[Response]:
+    """item_not_modified の非同期セッション版"""
+    if not is_conditional(request):
+        return None
+    row = (await db.execute(
+        select(model.id, _version_column(model)).where(model.id == item_id).limit(1)
+    )).first()
+    if row is None:
+        return None
+    return not_modified_response(request, *compute_validators(_kind(model, False), [tuple(row)]))
+
+async def page_not_modified_async(request: Request, db, statement, model, variant: str = "") -> Optional[Response]:
+    """page_not_modified の非同期セッション版（statement はページの select(model)）"""
+    if not is_conditional(request):
+        return None
+    rows = (await db.execute(statement.with_only_columns(model.id, _version_column(model)))).all()
+    return not_modified_response(request, *compute_validators(_kind(model, True, variant), rows))
+
+def item_validators(model, item) -> Tuple[str, Optional[str]]:
+    """読み込み済みの1件の検証子"""
+    return compute_validators(_kind(model, False), [(item.id, getattr(item, _version_column(model).key))])
+
+def set_item_validators(response: Response, model, item) -> None:
+    """読み込んだ1件の検証子をレスポンスヘッダーに設定する"""
+    set_validators(response, *item_validators(model, item))
+
+def set_page_validators(response: Response, model, items: Sequence, variant: str = "") -> None:
+    """読み込んだページの検証子をレスポンスヘッダーに設定する"""
+    column = _version_column(model).key
+    set_validators(response, *compute_validators(
+        _kind(model, True, variant), [(item.id, getattr(item, column)) for item in items]
+    ))
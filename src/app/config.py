@@ -0,0 +1,171 @@
+"""アプリケーション設定
+
+設定値は「既定値 < プロファイル < 設定ファイル < 環境変数」の順に上書きされる。
+設定ファイルは環境変数 APP_SETTINGS_FILE で指定するJSONファイルで、
+データベース設定は {"database": {...}} に記述する。
+"""
+import json
+import os
+from dataclasses import dataclass, field, fields, asdict
+from typing import Mapping, Optional
+from .schemas.schemas import IngestDurability
+
+SETTINGS_FILE_ENV = "APP_SETTINGS_FILE"
+
+# SQLiteの性能プロファイル（接続時に適用するPRAGMA）
+DATABASE_PROFILES = {
+    # 従来どおり（SQLiteの既定値のまま）
+    "default": {},
+    # WALで読み取りが書き込みのコミットを待たないようにする
+    "performance": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -65536,
+        "mmap_size": 268435456,
+        "busy_timeout": 5000,
+        "temp_store": "MEMORY",
+    },
+    # WALを使いつつコミットごとに fsync する
+    "durable": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "busy_timeout": 5000,
+    },
+}
+
+SQLITE_PRAGMAS = ("journal_mode", "synchronous", "cache_size", "mmap_size", "busy_timeout", "temp_store")
+
+@dataclass
+class DatabaseSettings:
+    url: str = "sqlite:///./improvement_initiatives.db"
+    async_url: Optional[str] = None
+    profile: str = "default"
+    # "queue" / "null" / "static" / "singleton"。未指定ならSQLAlchemyの既定
+    pool_class: Optional[str] = None
+    pool_size: int = 5
+    max_overflow: int = 10
+    journal_mode: Optional[str] = None
+    synchronous: Optional[str] = None
+    cache_size: Optional[int] = None
+    mmap_size: Optional[int] = None
+    busy_timeout: Optional[int] = None
+    temp_store: Optional[str] = None
+
+    @property
+    def effective_async_url(self) -> str:
+        if self.async_url:
+            return self.async_url
+        return self.url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+
+    def pragmas(self) -> dict:
+        return {
+            name: getattr(self, name)
+            for name in SQLITE_PRAGMAS
+            if getattr(self, name) is not None
+        }
+
+@dataclass
+class Settings:
+    database: DatabaseSettings = field(default_factory=DatabaseSettings)
+    use_async_db: bool = False
+    metrics_enabled: bool = True
+    # リクエストごとのSQL発行数をログで監視する実行時モード
+    query_budget_log: bool = False
+    query_budget: int = 20
+    query_repeat_threshold: int = 5
+    # 効果測定のバッファ付き取り込み（グループコミット）
+    effect_buffer_max_rows: int = 1000
+    effect_buffer_max_delay_ms: float = 50.0
+    # "commit"（コミット後に応答）/ "buffer"（バッファに入った時点で応答）
+    effect_ingest_durability: IngestDurability = IngestDurability.COMMIT
+    # 同時の同意登録を1トランザクションにまとめる（グループコミット）
+    agreement_group_commit: bool = False
+    agreement_batch_max_rows: int = 500
+    agreement_batch_max_delay_ms: float = 2.0
+    # 一覧を ORM・検証を経ずに列のタプルから直接JSONにする
+    fast_json: bool = False
+    # 利用規約の本文を直近のキーフレームの版からの差分として保存する
+    terms_delta_encoding: bool = True
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+def _to_bool(value: str) -> bool:
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+# 環境変数名 -> (セクション, 設定名, 変換関数)
+ENVIRONMENT_VARIABLES = {
+    "DB_URL": ("database", "url", str),
+    "DB_ASYNC_URL": ("database", "async_url", str),
+    "DB_POOL_CLASS": ("database", "pool_class", str),
+    "DB_POOL_SIZE": ("database", "pool_size", int),
+    "DB_MAX_OVERFLOW": ("database", "max_overflow", int),
+    "DB_JOURNAL_MODE": ("database", "journal_mode", str),
+    "DB_SYNCHRONOUS": ("database", "synchronous", str),
+    "DB_CACHE_SIZE": ("database", "cache_size", int),
+    "DB_MMAP_SIZE": ("database", "mmap_size", int),
+    "DB_BUSY_TIMEOUT": ("database", "busy_timeout", int),
+    "DB_TEMP_STORE": ("database", "temp_store", str),
+    "ASYNC_DB": (None, "use_async_db", _to_bool),
+    "METRICS_ENABLED": (None, "metrics_enabled", _to_bool),
+    "QUERY_BUDGET_LOG": (None, "query_budget_log", _to_bool),
+    "QUERY_BUDGET": (None, "query_budget", int),
+    "QUERY_REPEAT_THRESHOLD": (None, "query_repeat_threshold", int),
+    "EFFECT_BUFFER_MAX_ROWS": (None, "effect_buffer_max_rows", int),
+    "EFFECT_BUFFER_MAX_DELAY_MS": (None, "effect_buffer_max_delay_ms", float),
+    "EFFECT_INGEST_DURABILITY": (None, "effect_ingest_durability", str),
+    "AGREEMENT_GROUP_COMMIT": (None, "agreement_group_commit", _to_bool),
+    "AGREEMENT_BATCH_MAX_ROWS": (None, "agreement_batch_max_rows", int),
+    "AGREEMENT_BATCH_MAX_DELAY_MS": (None, "agreement_batch_max_delay_ms", float),
+    "FAST_JSON": (None, "fast_json", _to_bool),
+    "TERMS_DELTA_ENCODING": (None, "terms_delta_encoding", _to_bool),
+}
+
+def _update(target, values: Mapping) -> None:
+    names = {f.name for f in fields(target)}
+    for name, value in values.items():
+        if name not in names:
+            raise ValueError(f"Unknown setting: {name}")
+        setattr(target, name, value)
+
+def load_settings(
+    environ: Optional[Mapping[str, str]] = None,
+    settings_file: Optional[str] = None
+) -> Settings:
+    environ = os.environ if environ is None else environ
+    settings_file = settings_file or environ.get(SETTINGS_FILE_ENV)
+
+    file_values = {}
+    if settings_file:
+        with open(settings_file, encoding="utf-8") as f:
+            file_values = dict(json.load(f))
+    file_database = dict(file_values.pop("database", {}))
+
+    settings = Settings()
+
+    # 設定ファイルの profile は DB_PROFILE があっても取り除き、下の設定ファイルの反映で上書きしない
+    file_profile = file_database.pop("profile", None)
+    profile = environ.get("DB_PROFILE") or file_profile or "default"
+    if profile not in DATABASE_PROFILES:
+        raise ValueError(f"Unknown database profile: {profile}")
+    _update(settings.database, DATABASE_PROFILES[profile])
+    settings.database.profile = profile
+
+    _update(settings.database, file_database)
+    _update(settings, file_values)
+
+    for name, (section, attribute, convert) in ENVIRONMENT_VARIABLES.items():
+        raw = environ.get(name)
+        if raw is not None:
+            target = getattr(settings, section) if section else settings
+            setattr(target, attribute, convert(raw))
+
+    # 不正な値はリクエストごとではなく起動時にエラーにする
+    try:
+        settings.effect_ingest_durability = IngestDurability(settings.effect_ingest_durability)
+    except ValueError:
+        raise ValueError(f"Unknown effect ingest durability: {settings.effect_ingest_durability}") from None
+
+    return settings
+
+settings = load_settings()
@@ -1,14 +1,86 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
-from typing import Generator
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool, SingletonThreadPool, StaticPool
+from typing import AsyncGenerator, Generator
+from .config import DatabaseSettings, settings
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./improvement_initiatives.db"
+POOL_CLASSES = {
+    "queue": QueuePool,
+    "null": NullPool,
+    "static": StaticPool,
+    "singleton": SingletonThreadPool,
+}
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+def _engine_options(database: DatabaseSettings, is_async: bool = False) -> dict:
+    options = {}
+    pool_class = database.pool_class
+    if pool_class:
+        if pool_class not in POOL_CLASSES:
+            raise ValueError(f"Unknown pool class: {pool_class}")
+        options["poolclass"] = POOL_CLASSES[pool_class]
+        if is_async and pool_class == "queue":
+            options["poolclass"] = AsyncAdaptedQueuePool
+    # ファイルDBの既定プールはキュープールなので、サイズ指定はその場合のみ渡す
+    if pool_class in (None, "queue") and make_url(database.url).database not in (None, "", ":memory:"):
+        options["pool_size"] = database.pool_size
+        options["max_overflow"] = database.max_overflow
+    return options
+
+def apply_sqlite_pragmas(engine: Engine, pragmas: dict) -> None:
+    """接続ごとにPRAGMAを設定するイベントを登録する"""
+    if not pragmas:
+        return
+
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+def create_database_engine(database: DatabaseSettings) -> Engine:
+    engine = create_engine(
+        database.url,
+        connect_args={"check_same_thread": False},
+        **_engine_options(database)
+    )
+    apply_sqlite_pragmas(engine, database.pragmas())
+    return engine
+
+def create_async_database_engine(database: DatabaseSettings):
+    async_engine = create_async_engine(
+        database.effective_async_url, **_engine_options(database, is_async=True)
+    )
+    apply_sqlite_pragmas(async_engine.sync_engine, database.pragmas())
+    return async_engine
+
+def database_report(database: DatabaseSettings, bound_engine: Engine) -> dict:
+    """起動時に出力する実効データベース設定"""
+    return {
+        "url": bound_engine.url.render_as_string(hide_password=True),
+        "profile": database.profile,
+        "pool_class": bound_engine.pool.__class__.__name__,
+        "pool_size": database.pool_size,
+        "max_overflow": database.max_overflow,
+        "pragmas": database.pragmas(),
+    }
+
+SQLALCHEMY_DATABASE_URL = settings.database.url
+ASYNC_SQLALCHEMY_DATABASE_URL = settings.database.effective_async_url
+
+engine = create_database_engine(settings.database)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# 非同期アクセス用のエンジンとセッション（aiosqlite）
+async_engine = create_async_database_engine(settings.database)
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
 class Base(DeclarativeBase):
     pass
 
@@ -18,3 +90,7 @@ def get_db() -> Generator:
         yield db
     finally:
         db.close()
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as db:
+        yield db
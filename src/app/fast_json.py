@@ -0,0 +1,68 @@
+"""一覧の高速なJSON出力（FAST_JSON）
+
+既定では一覧のルートは ORM オブジェクトを識別マップに読み込み、response_model の検証
+（from_attributes）を経てJSONにする。高速出力を有効にすると、応答スキーマのフィールドに
+対応する列だけを行のタプルとして読み、事前に組み立てたシリアライザーで検証を省いて
+直接JSONのバイト列にする。出力は既定の経路と同じバイト列になる。
+"""
+import enum
+from functools import lru_cache
+from typing import Any, List, Optional, Sequence, Type
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+from typing_extensions import TypedDict
+from .config import settings
+
+def _serialized_type(annotation):
+    # 列の値はモデル側の列挙型なので、スキーマ側の列挙型ではなく値の推論でシリアライズする
+    if isinstance(annotation, type) and issubclass(annotation, enum.Enum):
+        return Any
+    return annotation
+
+class RowSerializer:
+    """応答スキーマのフィールド順の列タプルをJSONにするシリアライザー"""
+
+    def __init__(self, model, schema: Type[BaseModel]):
+        table = model.__table__
+        self.keys = list(schema.model_fields)
+        self.columns = [table.c[name] for name in self.keys]
+        row_type = TypedDict(f"{schema.__name__}Row", {
+            name: _serialized_type(field.annotation) for name, field in schema.model_fields.items()
+        })
+        self._adapter = TypeAdapter(List[row_type])
+
+    def dump_json(self, rows: Sequence) -> bytes:
+        keys = self.keys
+        return self._adapter.dump_json([dict(zip(keys, row)) for row in rows])
+
+@lru_cache(maxsize=None)
+def row_serializer(model, schema: Type[BaseModel]) -> RowSerializer:
+    return RowSerializer(model, schema)
+
+def load_page(query, model, schema: Type[BaseModel]) -> list:
+    """ページを読み込む（高速出力では列のタプル、それ以外は ORM オブジェクト）
+
+    どちらの要素も id や updated_at を属性として持つので、カーソルや検証子の計算はそのまま使える。
+    """
+    if not settings.fast_json:
+        return query.all()
+    return query.with_entities(*row_serializer(model, schema).columns).all()
+
+async def load_page_async(db, statement, model, schema: Type[BaseModel]) -> list:
+    """load_page の非同期セッション版（statement は select(model) の Select）"""
+    if not settings.fast_json:
+        return (await db.execute(statement)).scalars().all()
+    columns = row_serializer(model, schema).columns
+    return (await db.execute(statement.with_only_columns(*columns))).all()
+
+def list_response(items: list, model, schema: Type[BaseModel], response: Optional[Response] = None):
+    """高速出力ならJSONにした Response を、それ以外は items をそのまま返す
+
+    response に設定済みのヘッダー（カーソル・検証子）は返す Response に引き継ぐ。
+    """
+    if not settings.fast_json:
+        return items
+    content = Response(row_serializer(model, schema).dump_json(items), media_type="application/json")
+    if response is not None:
+        content.headers.raw.extend(response.headers.raw)
+    return content
@@ -0,0 +1,165 @@
+"""書き込みのグループコミット
+
+複数のリクエストから投入された書き込みをバックグラウンドのスレッドでまとめ、
+1トランザクション（1回のコミット）で反映する。投入ごとに連番を振り、
+呼び出し側はコミット結果を Future で待つか、投入した時点で応答できる。
+"""
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger("uvicorn.error")
+
+# バッチの既定値
+DEFAULT_MAX_BATCH_ROWS = 1000
+DEFAULT_MAX_DELAY_MS = 50.0
+
+class PendingWrite(Future):
+    """投入された1件の書き込み。結果は apply_batch がその要素に対して返した値"""
+
+    def __init__(self, sequence: int, item: Any):
+        super().__init__()
+        self.sequence = sequence
+        self.item = item
+        self.enqueued_at = time.monotonic()
+
+class GroupCommitWriter:
+    """投入された要素を max_delay_ms ごと、または max_batch_rows 件ごとにまとめてコミットする
+
+    apply_batch(session, items) は要素と同じ順で結果のリストを返す。コミットは書き込み側で行い、
+    apply_batch かコミットが失敗した場合はそのバッチの全要素に例外を設定する。
+    session_factory は書き込み用のセッションを作る呼び出し可能オブジェクトで、テストでは差し替える。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        apply_batch: Callable[[Session, List[Any]], List[Any]],
+        session_factory: Callable[[], Session],
+        max_batch_rows: int = DEFAULT_MAX_BATCH_ROWS,
+        max_delay_ms: float = DEFAULT_MAX_DELAY_MS
+    ):
+        self.name = name
+        self.apply_batch = apply_batch
+        self.session_factory = session_factory
+        self.max_batch_rows = max_batch_rows
+        self.max_delay_ms = max_delay_ms
+        self._condition = threading.Condition()
+        self._queue = deque()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._sequence = 0
+        self._last: Optional[PendingWrite] = None
+        self.committed_sequence = 0
+        self.batches = 0
+        self.rows = 0
+        self.failed_batches = 0
+
+    def start(self) -> None:
+        with self._condition:
+            self._start_locked()
+
+    def _start_locked(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name=f"group-commit-{self.name}", daemon=True)
+        self._thread.start()
+
+    def submit(self, item: Any) -> PendingWrite:
+        return self.submit_many([item])[0]
+
+    def submit_many(self, items: List[Any]) -> List[PendingWrite]:
+        """items を連続した連番でまとめて投入する（同じバッチに入るとは限らない）"""
+        with self._condition:
+            # 停止後の投入やライフサイクル外での利用では書き込みスレッドを起動し直す
+            self._start_locked()
+            pending = []
+            for item in items:
+                self._sequence += 1
+                pending.append(PendingWrite(self._sequence, item))
+            was_empty = not self._queue
+            self._queue.extend(pending)
+            if pending:
+                self._last = pending[-1]
+            # 待機中のスレッドを起こすのは、最初の要素が入ったときとバッチが満杯になったときだけでよい
+            if was_empty or len(self._queue) >= self.max_batch_rows:
+                self._condition.notify()
+        return pending
+
+    def _next_batch(self) -> Optional[List[PendingWrite]]:
+        with self._condition:
+            while not self._queue and not self._stopping:
+                self._condition.wait()
+            if not self._queue:
+                # 終了処理中の投入で起動し直せるよう、スレッドの終了をここで確定させる
+                self._thread = None
+                return None
+            # 先頭の要素の投入から max_delay_ms 経つか、max_batch_rows 件たまるまで待つ
+            deadline = self._queue[0].enqueued_at + self.max_delay_ms / 1000
+            while len(self._queue) < self.max_batch_rows and not self._stopping:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            size = min(len(self._queue), self.max_batch_rows)
+            return [self._queue.popleft() for _ in range(size)]
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            self._commit(batch)
+
+    def _commit(self, batch: List[PendingWrite]) -> None:
+        try:
+            with self.session_factory() as session:
+                results = self.apply_batch(session, [pending.item for pending in batch])
+                session.commit()
+        except Exception as exc:
+            logger.exception("Group commit %s failed for %d rows", self.name, len(batch))
+            with self._condition:
+                self.failed_batches += 1
+            for pending in batch:
+                pending.set_exception(exc)
+            return
+
+        with self._condition:
+            self.committed_sequence = batch[-1].sequence
+            self.batches += 1
+            self.rows += len(batch)
+        for pending, result in zip(batch, results):
+            pending.set_result(result)
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """現時点までに投入された要素の処理が終わるまで待つ"""
+        with self._condition:
+            last = self._last
+        if last is not None:
+            # 失敗の通知は投入した側が受け取るので、ここでは完了だけを待つ
+            last.exception(timeout)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """残っている要素をすべてコミットしてから書き込みスレッドを止める"""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def stats(self) -> dict:
+        with self._condition:
+            return {
+                "last_sequence": self._sequence,
+                "committed_sequence": self.committed_sequence,
+                "pending": len(self._queue),
+                "batches": self.batches,
+                "rows": self.rows,
+                "failed_batches": self.failed_batches,
+            }
@@ -0,0 +1,44 @@
+"""効果測定のバッファ付き取り込み
+
+取り込まれた効果測定はメモリ上のバッファに入り、グループコミットで
+効果測定・ロールアップ・分位点スケッチにまとめて反映される。
+"""
+from typing import List
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+from .config import settings
+from .database import SessionLocal
+from .group_commit import GroupCommitWriter
+from .models import models
+from .rollups import apply_effect_rollups
+from .sketches import apply_effect_sketches
+
+def apply_effect_batch(db: Session, effects: List[models.InitiativeEffect]) -> List[bool]:
+    """効果測定のバッチを反映し、要素ごとに反映できたか（施策が存在したか）を返す"""
+    initiative_ids = {effect.initiative_id for effect in effects}
+    existing = set(db.scalars(
+        select(models.Initiative.id).where(models.Initiative.id.in_(initiative_ids))
+    ))
+    accepted = [effect for effect in effects if effect.initiative_id in existing]
+    if accepted:
+        # ID は応答に使わないので、RETURNING なしの executemany で1文にまとめて INSERT する
+        db.execute(insert(models.InitiativeEffect.__table__), [
+            {
+                "initiative_id": effect.initiative_id,
+                "metric_name": effect.metric_name,
+                "metric_value": effect.metric_value,
+                "measurement_date": effect.measurement_date,
+            }
+            for effect in accepted
+        ])
+        apply_effect_rollups(db, accepted)
+        apply_effect_sketches(db, accepted)
+    return [effect.initiative_id in existing for effect in effects]
+
+effect_writer = GroupCommitWriter(
+    "effects",
+    apply_effect_batch,
+    SessionLocal,
+    max_batch_rows=settings.effect_buffer_max_rows,
+    max_delay_ms=settings.effect_buffer_max_delay_ms
+)
@@ -1,18 +1,96 @@
-from fastapi import FastAPI
-from .routers import initiatives, terms, development, releases
-
-app = FastAPI(
-    title="改善施策管理API",
-    description="改善施策の提案、評価、開発、リリースを管理するためのAPI",
-    version="1.0.0"
+import logging
+from contextlib import asynccontextmanager
+from fastapi import APIRouter, FastAPI
+from fastapi.routing import APIRoute
+from fastapi.responses import Response
+from .agreement_writer import agreement_writer
+from .analytics import portfolio_cache
+from .config import settings
+from .database import database_report, engine
+from .ingestion import effect_writer
+from .metrics import PROMETHEUS_CONTENT_TYPE, MetricsMiddleware, registry
+from .query_budget import QueryBudgetMiddleware
+from .terms_cache import latest_terms_cache
+from .terms_delivery import terms_response_cache
+from .routers import initiatives, terms, development, releases, search
+from .routers.aio import (
+    initiatives as aio_initiatives,
+    terms as aio_terms,
+    development as aio_development,
+    releases as aio_releases,
+    search as aio_search,
 )
 
-# ルーターの登録
-app.include_router(initiatives.router)
-app.include_router(terms.router)
-app.include_router(development.router)
-app.include_router(releases.router)
+# uvicorn が設定するロガーに出力する
+logger = logging.getLogger("uvicorn.error")
+
+registry.collectors.append(latest_terms_cache.render_metrics)
+registry.collectors.append(portfolio_cache.render_metrics)
+registry.collectors.append(terms_response_cache.render_metrics)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 起動時に実効設定を出力する
+    logger.info("Database settings: %s", database_report(settings.database, engine))
+    logger.info("Async database routers: %s", app.state.use_async_db)
+    yield
+    # バッファに残っている効果測定・同意登録をコミットしてから終了する
+    effect_writer.stop()
+    agreement_writer.stop()
+
+def _route_key(route: APIRoute) -> tuple:
+    return route.path, frozenset(route.methods)
+
+def _merge_routers(async_router: APIRouter, sync_router: APIRouter) -> APIRouter:
+    """非同期ルーターを優先し、未実装のエンドポイントは同期ルーターで補う
+
+    静的パス（/initiatives/analytics など）がパスパラメータのルートより先に
+    評価されるよう、同期ルーターの定義順を保ったまま差し替える。
+    """
+    async_routes = {_route_key(route): route for route in async_router.routes}
+    merged = APIRouter()
+    for route in sync_router.routes:
+        merged.routes.append(async_routes.pop(_route_key(route), route))
+    merged.routes.extend(async_routes.values())
+    return merged
+
+def create_app(use_async_db: bool = False, metrics_enabled: bool = True) -> FastAPI:
+    app = FastAPI(
+        title="改善施策管理API",
+        description="改善施策の提案、評価、開発、リリースを管理するためのAPI",
+        version="1.0.0",
+        lifespan=lifespan
+    )
+    app.state.use_async_db = use_async_db
+
+    # ルーターの登録（非同期DBモードではAsyncSession版のルーターを使用）
+    # 非同期版が未実装のエンドポイントは同期版をそのまま公開し、404 にしない
+    sync_routers = [initiatives, terms, development, releases, search]
+    async_routers = [aio_initiatives, aio_terms, aio_development, aio_releases, aio_search]
+    for sync_module, async_module in zip(sync_routers, async_routers):
+        if use_async_db:
+            app.include_router(_merge_routers(async_module.router, sync_module.router))
+        else:
+            app.include_router(sync_module.router)
+
+    @app.get("/")
+    def read_root():
+        return {"message": "改善施策管理APIへようこそ！"}
+
+    if metrics_enabled:
+        app.add_middleware(MetricsMiddleware)
+
+        @app.get("/metrics", include_in_schema=False)
+        def read_metrics():
+            return Response(registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+    if settings.query_budget_log:
+        app.add_middleware(
+            QueryBudgetMiddleware,
+            budget=settings.query_budget,
+            repeat_threshold=settings.query_repeat_threshold
+        )
+
+    return app
 
-@app.get("/")
-def read_root():
-    return {"message": "改善施策管理APIへようこそ！"}
+app = create_app(use_async_db=settings.use_async_db, metrics_enabled=settings.metrics_enabled)
@@ -0,0 +1,170 @@
+"""リクエスト単位のレイテンシ・DB時間の計測と Prometheus テキスト形式での出力"""
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# レイテンシ用のバケット境界（秒）
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# ルーティングできなかったリクエストのラベル（パスをそのまま使うとラベルが際限なく増えるため）
+UNMATCHED_ROUTE = "<unmatched>"
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_bound(bound: float) -> str:
+    return "+Inf" if bound == float("inf") else repr(bound)
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, label_names: Tuple[str, ...], buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        # ラベル値 -> [バケットごとの件数..., 合計値, 件数]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, labels: Tuple[str, ...], value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = {labels: list(series) for labels, series in self._series.items()}
+        for labels, series in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = f'le="{_format_bound(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, labels)} {series[-2]!r}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, labels)} {series[-1]}")
+        return lines
+
+class Gauge:
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self._lock = threading.Lock()
+        self.value = 0
+
+    def inc(self, amount: int = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: int = 1) -> None:
+        with self._lock:
+            self.value -= amount
+
+    def render(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} gauge",
+            f"{self.name} {self.value}",
+        ]
+
+class MetricsRegistry:
+    def __init__(self):
+        self.request_duration = Histogram(
+            "http_request_duration_seconds",
+            "HTTP request latency in seconds.",
+            ("method", "route", "status"),
+        )
+        self.request_db_duration = Histogram(
+            "http_request_db_duration_seconds",
+            "Time spent executing SQL statements per HTTP request in seconds.",
+            ("method", "route"),
+        )
+        self.requests_in_flight = Gauge(
+            "http_requests_in_flight",
+            "Number of HTTP requests currently being processed.",
+        )
+        # 追加の指標を出力する関数（Prometheus テキスト形式の行を返す）
+        self.collectors: List[Callable[[], List[str]]] = []
+
+    def render(self) -> str:
+        lines = []
+        for metric in (self.request_duration, self.request_db_duration, self.requests_in_flight):
+            lines.extend(metric.render())
+        for collector in self.collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+registry = MetricsRegistry()
+
+class RequestDbTimer:
+    __slots__ = ("seconds",)
+
+    def __init__(self):
+        self.seconds = 0.0
+
+# 処理中のリクエストのDB時間（スレッドプールにもコンテキストごと引き継がれる）
+current_db_timer: ContextVar[Optional[RequestDbTimer]] = ContextVar("current_db_timer", default=None)
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and current_db_timer.get() is not None:
+        context._metrics_started = time.perf_counter()
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    timer = current_db_timer.get()
+    started = getattr(context, "_metrics_started", None)
+    if timer is not None and started is not None:
+        timer.seconds += time.perf_counter() - started
+
+class MetricsMiddleware:
+    """ルート・メソッド・ステータスごとのレイテンシとDB時間を記録するASGIミドルウェア"""
+
+    def __init__(self, app, registry: MetricsRegistry = registry):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        timer = RequestDbTimer()
+        token = current_db_timer.set(timer)
+        self.registry.requests_in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.registry.requests_in_flight.dec()
+            current_db_timer.reset(token)
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or UNMATCHED_ROUTE
+            method = scope["method"]
+            self.registry.request_duration.observe((method, route_path, str(status_code)), elapsed)
+            self.registry.request_db_duration.observe((method, route_path), timer.seconds)
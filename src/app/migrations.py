@@ -0,0 +1,149 @@
+"""既存データベース向けのバージョン管理されたスキーマ移行
+
+適用済みのバージョンは SQLite の PRAGMA user_version に記録する。
+各移行は冪等に書き、create_all で作成したばかりのデータベースに
+適用しても問題がないようにする。
+"""
+import logging
+from dataclasses import dataclass
+from typing import Callable, List
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+from .rollups import rebuild_effect_rollups
+from .search import create_search_indexes
+from .sketches import rebuild_effect_sketches
+from .terms_content import migrate_terms_contents
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class Migration:
+    version: int
+    description: str
+    upgrade: Callable[[Connection], None]
+
+def _execute_all(*statements: str) -> Callable[[Connection], None]:
+    def upgrade(conn: Connection) -> None:
+        for statement in statements:
+            conn.execute(text(statement))
+    return upgrade
+
+def _then(*steps: Callable[[Connection], None]) -> Callable[[Connection], None]:
+    def upgrade(conn: Connection) -> None:
+        for step in steps:
+            step(conn)
+    return upgrade
+
+def _add_column(table: str, name: str, definition: str) -> Callable[[Connection], None]:
+    def upgrade(conn: Connection) -> None:
+        if name not in {column["name"] for column in inspect(conn).get_columns(table)}:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {definition}"))
+    return upgrade
+
+MIGRATIONS: List[Migration] = [
+    Migration(
+        1,
+        "検索条件に使う列のインデックスを追加",
+        _execute_all(
+            "CREATE INDEX IF NOT EXISTS ix_initiatives_status ON initiatives (status)",
+            "CREATE INDEX IF NOT EXISTS ix_initiative_assessments_initiative_id ON initiative_assessments (initiative_id)",
+            "CREATE INDEX IF NOT EXISTS ix_initiative_effects_initiative_id ON initiative_effects (initiative_id)",
+            "CREATE INDEX IF NOT EXISTS ix_terms_of_service_effective_date ON terms_of_service (effective_date)",
+            "CREATE INDEX IF NOT EXISTS ix_requirements_initiative_id ON requirements (initiative_id)",
+            "CREATE INDEX IF NOT EXISTS ix_development_tasks_requirement_id ON development_tasks (requirement_id)",
+            "CREATE INDEX IF NOT EXISTS ix_releases_status ON releases (status)",
+            "CREATE INDEX IF NOT EXISTS ix_release_rollbacks_release_id ON release_rollbacks (release_id)",
+        ),
+    ),
+    Migration(
+        2,
+        "利用規約への同意を (terms_id, member_id) で一意にする",
+        _execute_all(
+            # 既存の重複は最初の同意だけを残す
+            """
+            DELETE FROM terms_agreements
+            WHERE id NOT IN (
+                SELECT MIN(id) FROM terms_agreements GROUP BY terms_id, member_id
+            )
+            """,
+            "CREATE UNIQUE INDEX IF NOT EXISTS uq_terms_agreements_terms_id_member_id "
+            "ON terms_agreements (terms_id, member_id)",
+        ),
+    ),
+    Migration(
+        3,
+        "効果測定値の時間粒度別ロールアップを追加し、既存の効果測定から再集計する",
+        _then(_execute_all(
+            """
+            CREATE TABLE IF NOT EXISTS initiative_effect_rollups (
+                initiative_id INTEGER NOT NULL,
+                metric_name VARCHAR NOT NULL,
+                granularity VARCHAR NOT NULL,
+                bucket_start DATETIME NOT NULL,
+                count INTEGER NOT NULL,
+                sum FLOAT NOT NULL,
+                min FLOAT NOT NULL,
+                max FLOAT NOT NULL,
+                last_value FLOAT NOT NULL,
+                last_measured_at DATETIME NOT NULL,
+                PRIMARY KEY (initiative_id, metric_name, granularity, bucket_start),
+                FOREIGN KEY(initiative_id) REFERENCES initiatives (id)
+            )
+            """,
+        ), rebuild_effect_rollups),
+    ),
+    Migration(
+        4,
+        "効果測定値の分位点スケッチを追加し、既存の効果測定から作成する",
+        _then(_execute_all(
+            "CREATE INDEX IF NOT EXISTS ix_initiative_effects_metric_name_measurement_date "
+            "ON initiative_effects (metric_name, measurement_date)",
+            """
+            CREATE TABLE IF NOT EXISTS initiative_effect_sketches (
+                metric_name VARCHAR NOT NULL,
+                granularity VARCHAR NOT NULL,
+                bucket_start DATETIME NOT NULL,
+                count INTEGER NOT NULL,
+                sketch BLOB NOT NULL,
+                PRIMARY KEY (metric_name, granularity, bucket_start)
+            )
+            """,
+        ), rebuild_effect_sketches),
+    ),
+    Migration(
+        5,
+        "施策・要件・開発タスクの全文検索索引（FTS5）と同期トリガーを追加し、既存の行を索引する",
+        create_search_indexes,
+    ),
+    Migration(
+        6,
+        "利用規約の本文を圧縮（差分符号化）して保存し、平文の content 列を削除する",
+        migrate_terms_contents,
+    ),
+    Migration(
+        7,
+        "要件・開発タスクの一括登録で RETURNING を入力の順に並べるための sentinel 列を追加",
+        _then(
+            _add_column("requirements", "_sentinel", "INTEGER"),
+            _add_column("development_tasks", "_sentinel", "INTEGER"),
+        ),
+    ),
+]
+
+def get_schema_version(conn: Connection) -> int:
+    return conn.exec_driver_sql("PRAGMA user_version").scalar()
+
+def migrate(engine: Engine) -> List[int]:
+    """未適用の移行を順に適用し、適用したバージョンの一覧を返す"""
+    applied = []
+    with engine.begin() as conn:
+        current = get_schema_version(conn)
+    for migration in MIGRATIONS:
+        if migration.version <= current:
+            continue
+        with engine.begin() as conn:
+            logger.info("Applying migration %d: %s", migration.version, migration.description)
+            migration.upgrade(conn)
+            conn.exec_driver_sql(f"PRAGMA user_version = {migration.version}")
+        applied.append(migration.version)
+    return applied
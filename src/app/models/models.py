@@ -1,8 +1,9 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Boolean, Enum as SQLEnum
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Boolean, Index, LargeBinary, Enum as SQLEnum, insert_sentinel
+from sqlalchemy.orm import deferred, relationship
 from datetime import datetime
 import enum
 from ..database import Base
+from ..search import register_search_index
 
 class InitiativeStatus(enum.Enum):
     PROPOSED = "PROPOSED"
@@ -19,7 +20,7 @@ class Initiative(Base):
     description = Column(String)
     irr = Column(Float)  # Internal Rate of Return
     cost = Column(Float)
-    status = Column(SQLEnum(InitiativeStatus))
+    status = Column(SQLEnum(InitiativeStatus), index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -31,7 +32,7 @@ class InitiativeAssessment(Base):
     __tablename__ = "initiative_assessments"
 
     id = Column(Integer, primary_key=True, index=True)
-    initiative_id = Column(Integer, ForeignKey("initiatives.id"))
+    initiative_id = Column(Integer, ForeignKey("initiatives.id"), index=True)
     feasibility_score = Column(Float)
     compliance_check = Column(Boolean)
     terms_impact = Column(Boolean)
@@ -41,26 +42,64 @@ class InitiativeAssessment(Base):
 
 class InitiativeEffect(Base):
     __tablename__ = "initiative_effects"
+    __table_args__ = (
+        # 施策をまたいだ指標ごとの期間検索用
+        Index("ix_initiative_effects_metric_name_measurement_date", "metric_name", "measurement_date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    initiative_id = Column(Integer, ForeignKey("initiatives.id"))
+    initiative_id = Column(Integer, ForeignKey("initiatives.id"), index=True)
     metric_name = Column(String)
     metric_value = Column(Float)
     measurement_date = Column(DateTime, default=datetime.utcnow)
     
     initiative = relationship("Initiative", back_populates="effects")
 
+class InitiativeEffectRollup(Base):
+    """効果測定値の時間粒度（hour / day / month）ごとの集計"""
+    __tablename__ = "initiative_effect_rollups"
+
+    initiative_id = Column(Integer, ForeignKey("initiatives.id"), primary_key=True)
+    metric_name = Column(String, primary_key=True)
+    granularity = Column(String, primary_key=True)
+    bucket_start = Column(DateTime, primary_key=True)
+    count = Column(Integer, nullable=False)
+    sum = Column(Float, nullable=False)
+    min = Column(Float, nullable=False)
+    max = Column(Float, nullable=False)
+    last_value = Column(Float, nullable=False)
+    last_measured_at = Column(DateTime, nullable=False)
+
+class InitiativeEffectSketch(Base):
+    """効果測定値の指標・時間粒度ごとの分位点スケッチ（KLL、app.sketches の形式）"""
+    __tablename__ = "initiative_effect_sketches"
+
+    metric_name = Column(String, primary_key=True)
+    granularity = Column(String, primary_key=True)
+    bucket_start = Column(DateTime, primary_key=True)
+    count = Column(Integer, nullable=False)
+    sketch = Column(LargeBinary, nullable=False)
+
 class TermsOfService(Base):
     __tablename__ = "terms_of_service"
 
     id = Column(Integer, primary_key=True, index=True)
     version = Column(String, index=True)
-    content = Column(String)
-    effective_date = Column(DateTime)
+    effective_date = Column(DateTime, index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+    # 本文は圧縮して保存し、直近のキーフレームの版からの差分にすることもある（app/terms_content.py）。
+    # 一覧では本文を読まないよう content_data は遅延読み込みにする
+    content_codec = Column(String, nullable=False)
+    content_data = deferred(Column(LargeBinary, nullable=False))
+    content_base_id = Column(Integer, ForeignKey("terms_of_service.id"))
+    content_length = Column(Integer, nullable=False)  # 本文の文字数
 
 class TermsAgreement(Base):
     __tablename__ = "terms_agreements"
+    __table_args__ = (
+        # 同一会員による同一規約への重複同意を防ぐ
+        Index("uq_terms_agreements_terms_id_member_id", "terms_id", "member_id", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     terms_id = Column(Integer, ForeignKey("terms_of_service.id"))
@@ -78,12 +117,14 @@ class Requirement(Base):
     __tablename__ = "requirements"
 
     id = Column(Integer, primary_key=True, index=True)
-    initiative_id = Column(Integer, ForeignKey("initiatives.id"))
+    initiative_id = Column(Integer, ForeignKey("initiatives.id"), index=True)
     title = Column(String, index=True)
     description = Column(String)
     status = Column(SQLEnum(RequirementStatus))
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # 一括登録の RETURNING を入力の順に対応付けるための番号（SQLite は暗黙の sentinel に非対応）
+    _sentinel = insert_sentinel("_sentinel")
     
     initiative = relationship("Initiative", back_populates="requirements")
     development_tasks = relationship("DevelopmentTask", back_populates="requirement")
@@ -92,12 +133,14 @@ class DevelopmentTask(Base):
     __tablename__ = "development_tasks"
 
     id = Column(Integer, primary_key=True, index=True)
-    requirement_id = Column(Integer, ForeignKey("requirements.id"))
+    requirement_id = Column(Integer, ForeignKey("requirements.id"), index=True)
     title = Column(String, index=True)
     description = Column(String)
     status = Column(String)  # TODO: Consider making this an enum
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # 一括登録の RETURNING を入力の順に対応付けるための番号（SQLite は暗黙の sentinel に非対応）
+    _sentinel = insert_sentinel("_sentinel")
     
     requirement = relationship("Requirement", back_populates="development_tasks")
 
@@ -114,7 +157,7 @@ class Release(Base):
     id = Column(Integer, primary_key=True, index=True)
     version = Column(String, index=True)
     description = Column(String)
-    status = Column(SQLEnum(ReleaseStatus))
+    status = Column(SQLEnum(ReleaseStatus), index=True)
     planned_date = Column(DateTime)
     actual_date = Column(DateTime)
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -124,7 +167,11 @@ class ReleaseRollback(Base):
     __tablename__ = "release_rollbacks"
 
     id = Column(Integer, primary_key=True, index=True)
-    release_id = Column(Integer, ForeignKey("releases.id"))
+    release_id = Column(Integer, ForeignKey("releases.id"), index=True)
     reason = Column(String)
     rollback_date = Column(DateTime, default=datetime.utcnow)
     created_at = Column(DateTime, default=datetime.utcnow)
+
+# タイトル・説明の全文検索索引（FTS5）
+for _table in (Initiative.__table__, Requirement.__table__, DevelopmentTask.__table__):
+    register_search_index(_table)
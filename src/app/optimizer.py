@@ -0,0 +1,170 @@
+from typing import List
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from .models import models
+
+# 厳密解（動的計画法）で扱う 候補数 × 予算の分割数 の上限。
+# auto では超える場合に貪欲法に切り替え、exact の明示指定では受け付けない
+EXACT_MAX_CELLS = 20_000_000
+# 予算を何単位に分割してコストを整数化するか
+DEFAULT_RESOLUTION = 10_000
+
+def query_candidates(
+    db: Session,
+    statuses: List[models.InitiativeStatus],
+    require_compliance: bool = False
+) -> tuple:
+    """選定候補の (id, irr, cost) を配列で返す
+
+    require_compliance の場合は、最後に記録された評価で compliance_check が真の施策に限る。
+    """
+    initiative = models.Initiative.__table__
+    assessment = models.InitiativeAssessment.__table__
+    query = select(initiative.c.id, initiative.c.irr, initiative.c.cost)\
+        .where(initiative.c.status.in_([status.name for status in statuses]))
+    if require_compliance:
+        later = assessment.alias()
+        latest_assessment_id = select(func.max(later.c.id))\
+            .where(later.c.initiative_id == initiative.c.id)\
+            .scalar_subquery()
+        query = query.join_from(initiative, assessment, assessment.c.id == latest_assessment_id)\
+            .where(assessment.c.compliance_check.is_(True))
+    rows = db.execute(query).all()
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.empty(0), np.empty(0)
+    ids, irr, cost = zip(*rows)
+    return (
+        np.fromiter(ids, dtype=np.int64, count=len(rows)),
+        np.array(irr, dtype=np.float64),
+        np.array(cost, dtype=np.float64),
+    )
+
+def solve_exact(values: np.ndarray, costs: np.ndarray, budget: float, resolution: int) -> np.ndarray:
+    """コストを予算の 1/resolution 単位に切り上げて 0-1 ナップサックを動的計画法で解く
+
+    切り上げにより選んだ組は実コストでも必ず予算内に収まる。丸めた問題に対しては厳密解で、
+    候補のコストが単位に比べて十分大きいほど元の問題の最適解に近づく。選んだ候補のインデックスを返す。
+    """
+    unit = budget / resolution
+    weights = np.ceil(costs / unit).astype(np.int64)
+    capacity = resolution
+    best = np.zeros(capacity + 1)
+    taken = np.zeros((len(values), capacity + 1), dtype=bool)
+    for i, (weight, value) in enumerate(zip(weights, values)):
+        if weight > capacity:
+            continue
+        candidate = best[:capacity + 1 - weight] + value
+        improved = candidate > best[weight:]
+        best[weight:] = np.where(improved, candidate, best[weight:])
+        taken[i, weight:] = improved
+
+    # 選択の復元
+    selected = []
+    remaining = int(np.argmax(best))
+    for i in range(len(values) - 1, -1, -1):
+        if taken[i, remaining]:
+            selected.append(i)
+            remaining -= weights[i]
+    return np.array(selected[::-1], dtype=np.int64)
+
+def _fill(order: np.ndarray, costs: np.ndarray, remaining: float) -> list:
+    """order の順に、残りの予算に収まる候補を選ぶ"""
+    spent = np.cumsum(costs[order])
+    fits = spent <= remaining
+    selected = list(order[fits])
+    if fits.all():
+        return selected
+    remaining -= spent[fits][-1] if fits.any() else 0.0
+    # 予算を超えた時点以降も、残りの予算に収まる候補は順に詰める
+    cheapest = costs[order].min()
+    for i in order[~fits]:
+        if remaining < cheapest:
+            break
+        if costs[i] <= remaining:
+            selected.append(i)
+            remaining -= costs[i]
+    return selected
+
+def fill_remaining(selected: np.ndarray, values: np.ndarray, costs: np.ndarray, budget: float) -> np.ndarray:
+    """選択済みの組に、余った予算で選べる候補を価値/コストの高い順に追加する"""
+    rest = np.setdiff1d(np.arange(len(values)), selected)
+    if len(rest) == 0:
+        return selected
+    order = rest[np.argsort(-values[rest] / costs[rest], kind="stable")]
+    added = _fill(order, costs, budget - costs[selected].sum())
+    return np.sort(np.concatenate([selected, np.array(added, dtype=np.int64)]))
+
+def solve_greedy(values: np.ndarray, costs: np.ndarray, budget: float) -> np.ndarray:
+    """価値/コストの高い順に予算に収まる候補を詰める（LP緩和の貪欲解）
+
+    最も価値の高い単独の候補の方が良ければそちらを返す（最適値の 1/2 以上を保証）。
+    """
+    order = np.argsort(-values / costs, kind="stable")
+    selected = np.array(_fill(order, costs, budget), dtype=np.int64)
+
+    affordable = np.flatnonzero(costs <= budget)
+    if len(affordable):
+        single = affordable[np.argmax(values[affordable])]
+        if values[single] > values[selected].sum():
+            return np.array([single], dtype=np.int64)
+    return np.sort(selected)
+
+def lp_upper_bound(values: np.ndarray, costs: np.ndarray, budget: float) -> float:
+    """分割を許した場合（LP緩和）の最適値。整数解の最適値の上界になる"""
+    order = np.argsort(-values / costs, kind="stable")
+    spent = np.cumsum(costs[order])
+    whole = spent <= budget
+    bound = values[order][whole].sum()
+    if not whole.all():
+        first = int(np.argmin(whole))
+        already = spent[first - 1] if first > 0 else 0.0
+        bound += values[order[first]] * (budget - already) / costs[order[first]]
+    return float(bound)
+
+def optimize_portfolio(
+    ids: np.ndarray,
+    irr: np.ndarray,
+    cost: np.ndarray,
+    budget: float,
+    method: str = "auto",
+    resolution: int = DEFAULT_RESOLUTION
+) -> dict:
+    """予算内で期待リターン（irr × cost / 100）の合計が最大になる施策の組を選ぶ
+
+    method は "exact"（動的計画法）、"greedy"（LP緩和の貪欲法）、"auto"（規模に応じて選択）。
+    exact の表が EXACT_MAX_CELLS を超える場合は ValueError を送出する。
+    """
+    # IRR・コストが未設定、または期待リターンが正にならない施策は選ぶ意味がないので除外する
+    usable = ~np.isnan(irr) & ~np.isnan(cost) & (irr > 0) & (cost > 0)
+    ids, cost = ids[usable], cost[usable]
+    values = irr[usable] * cost / 100
+
+    exact_fits = len(ids) * (resolution + 1) <= EXACT_MAX_CELLS
+    if method == "auto":
+        method = "exact" if exact_fits else "greedy"
+    elif method == "exact" and not exact_fits:
+        raise ValueError(
+            f"Exact optimization supports at most {EXACT_MAX_CELLS} cells "
+            f"(candidates x (resolution + 1)); got {len(ids)} x {resolution + 1}"
+        )
+    if len(ids) == 0:
+        selected = np.empty(0, dtype=np.int64)
+    elif method == "exact":
+        # 切り上げで余った予算を埋め、コストの丸めで貪欲解に劣る場合は貪欲解を採る
+        selected = fill_remaining(solve_exact(values, cost, budget, resolution), values, cost, budget)
+        greedy = solve_greedy(values, cost, budget)
+        if values[greedy].sum() > values[selected].sum():
+            selected = greedy
+    else:
+        selected = solve_greedy(values, cost, budget)
+
+    return {
+        "method": method,
+        "budget": budget,
+        "candidate_count": len(ids),
+        "selected_ids": sorted(int(i) for i in ids[selected]),
+        "total_cost": float(cost[selected].sum()),
+        "total_value": float(values[selected].sum()),
+        "upper_bound": lp_upper_bound(values, cost, budget) if len(ids) else 0.0,
+    }
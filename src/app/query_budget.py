@@ -0,0 +1,105 @@
+"""SQL文の発行数の計測と、予算超過・同一形のSQLの繰り返し（N+1）の検出"""
+import logging
+import re
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# uvicorn が設定するロガーに出力する
+logger = logging.getLogger("uvicorn.error")
+
+_WHITESPACE = re.compile(r"\s+")
+_IN_LIST = re.compile(r"\(\s*(?:\?|__\[POSTCOMPILE_\w+\])(?:\s*,\s*\?)*\s*\)")
+_NUMBER = re.compile(r"\b\d+\b")
+
+def statement_shape(statement: str) -> str:
+    """パラメータやIN句の要素数の違いを無視したSQL文の形"""
+    shape = _WHITESPACE.sub(" ", statement).strip()
+    shape = _IN_LIST.sub("(?)", shape)
+    return _NUMBER.sub("?", shape)
+
+class QueryCounter:
+    def __init__(self):
+        self.statements: List[str] = []
+
+    def record(self, statement: str) -> None:
+        self.statements.append(statement)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def repeated_shapes(self, threshold: int) -> Dict[str, int]:
+        """threshold 回以上発行された同じ形のSQL文"""
+        shapes = Counter(statement_shape(statement) for statement in self.statements)
+        return {shape: n for shape, n in shapes.items() if n >= threshold}
+
+    def report(self) -> str:
+        return "\n".join(f"  {i + 1}. {_WHITESPACE.sub(' ', s)}" for i, s in enumerate(self.statements))
+
+@contextmanager
+def count_queries(engine: Engine) -> Iterator[QueryCounter]:
+    """ブロック内で engine に発行されたSQL文を数える"""
+    counter = QueryCounter()
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        counter.record(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+@contextmanager
+def assert_max_queries(engine: Engine, budget: int) -> Iterator[QueryCounter]:
+    """ブロック内で発行されたSQL文が budget 件を超えたら AssertionError にする"""
+    with count_queries(engine) as counter:
+        yield counter
+    if counter.count > budget:
+        raise AssertionError(
+            f"Expected at most {budget} SQL statements, got {counter.count}:\n{counter.report()}"
+        )
+
+# 実行時モードで処理中のリクエストのSQL文を数える
+current_query_counter: ContextVar[Optional[QueryCounter]] = ContextVar("current_query_counter", default=None)
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_request_statement(conn, cursor, statement, parameters, context, executemany):
+    counter = current_query_counter.get()
+    if counter is not None:
+        counter.record(statement)
+
+class QueryBudgetMiddleware:
+    """予算を超えたリクエストや、同じ形のSQLを繰り返すリクエストをログに出力するASGIミドルウェア"""
+
+    def __init__(self, app, budget: int, repeat_threshold: int):
+        self.app = app
+        self.budget = budget
+        self.repeat_threshold = repeat_threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        counter = QueryCounter()
+        token = current_query_counter.set(counter)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_query_counter.reset(token)
+            route = getattr(scope.get("route"), "path", scope["path"])
+            if counter.count > self.budget:
+                logger.warning(
+                    "Query budget exceeded: %s %s issued %d SQL statements (budget %d)",
+                    scope["method"], route, counter.count, self.budget
+                )
+            for shape, n in counter.repeated_shapes(self.repeat_threshold).items():
+                logger.warning(
+                    "Repeated SQL statement: %s %s issued the same statement %d times: %s",
+                    scope["method"], route, n, shape
+                )
@@ -0,0 +1,205 @@
+"""効果測定値の時間粒度別ロールアップの更新と時系列の読み出し
+
+ロールアップは (initiative_id, metric_name, granularity, bucket_start) ごとに
+件数・合計・最小・最大・最新値を保持し、効果測定の記録時に差分で更新する。
+"""
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional, Tuple
+from sqlalchemy import case, func, literal, select, text, union_all
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from .models import models
+
+# 細かい順
+GRANULARITIES = ("hour", "day", "month")
+# SQLite に保存される DateTime と同じ書式のバケット開始時刻
+_BUCKET_FORMATS = {
+    "hour": "%Y-%m-%d %H:00:00.000000",
+    "day": "%Y-%m-%d 00:00:00.000000",
+    "month": "%Y-%m-01 00:00:00.000000",
+}
+
+def truncate(moment: datetime, granularity: str) -> datetime:
+    """moment を含むバケットの開始時刻"""
+    if granularity == "hour":
+        return moment.replace(minute=0, second=0, microsecond=0)
+    if granularity == "day":
+        return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+def next_bucket(bucket_start: datetime, granularity: str) -> datetime:
+    """bucket_start の次のバケットの開始時刻"""
+    if granularity == "hour":
+        return bucket_start + timedelta(hours=1)
+    if granularity == "day":
+        return bucket_start + timedelta(days=1)
+    return (bucket_start + timedelta(days=32)).replace(day=1)
+
+def _ceil(moment: datetime, granularity: str) -> datetime:
+    bucket_start = truncate(moment, granularity)
+    return bucket_start if bucket_start == moment else next_bucket(bucket_start, granularity)
+
+def count_buckets(start: datetime, end: datetime, granularity: str) -> int:
+    """[start, end) に含まれる（部分的なものを含む）バケットの数"""
+    first = truncate(start, granularity)
+    if granularity == "month":
+        return (end.year - first.year) * 12 + end.month - first.month + (truncate(end, "month") != end)
+    seconds = 3600 if granularity == "hour" else 86400
+    return int(-(-(end - first).total_seconds() // seconds))
+
+def _merge(target: dict, count: int, total: float, low: float, high: float, last_value: float, last_measured_at: datetime) -> None:
+    target["count"] += count
+    target["sum"] += total
+    target["min"] = min(target["min"], low)
+    target["max"] = max(target["max"], high)
+    if last_measured_at >= target["last_measured_at"]:
+        target["last_value"] = last_value
+        target["last_measured_at"] = last_measured_at
+
+def apply_effect_rollups(db: Session, effects: Iterable) -> None:
+    """効果測定（initiative_id・metric_name・metric_value・measurement_date を持つ行）をロールアップに反映する
+
+    同じロールアップ行に入る値は先にまとめ、全粒度を1回の UPSERT（executemany）で反映する。
+    コミットは呼び出し側で行う。
+    """
+    pending = {}
+    for effect in effects:
+        value, measured_at = effect.metric_value, effect.measurement_date
+        for granularity in GRANULARITIES:
+            key = (effect.initiative_id, effect.metric_name, granularity, truncate(measured_at, granularity))
+            row = pending.get(key)
+            if row is None:
+                pending[key] = {
+                    "initiative_id": key[0], "metric_name": key[1], "granularity": key[2], "bucket_start": key[3],
+                    "count": 1, "sum": value, "min": value, "max": value,
+                    "last_value": value, "last_measured_at": measured_at,
+                }
+            else:
+                _merge(row, 1, value, value, value, value, measured_at)
+    if not pending:
+        return
+
+    table = models.InitiativeEffectRollup.__table__
+    statement = insert(table)
+    excluded = statement.excluded
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.initiative_id, table.c.metric_name, table.c.granularity, table.c.bucket_start],
+        set_={
+            "count": table.c.count + excluded.count,
+            "sum": table.c.sum + excluded.sum,
+            # SQLite の2引数の min() / max() はスカラー関数
+            "min": func.min(table.c.min, excluded.min),
+            "max": func.max(table.c.max, excluded.max),
+            "last_value": case(
+                (excluded.last_measured_at >= table.c.last_measured_at, excluded.last_value),
+                else_=table.c.last_value
+            ),
+            "last_measured_at": func.max(table.c.last_measured_at, excluded.last_measured_at),
+        }
+    )
+    db.execute(statement, list(pending.values()))
+
+def rebuild_effect_rollups(conn: Connection) -> None:
+    """生の効果測定からロールアップを全件作り直す（既存データへの移行やベンチマークのデータ投入用）"""
+    for granularity, bucket_format in _BUCKET_FORMATS.items():
+        # max() と同じ行の metric_value を返す SQLite の集計の仕様で最新値を得る
+        conn.execute(text(f"""
+            INSERT OR REPLACE INTO initiative_effect_rollups
+            SELECT initiative_id, metric_name, '{granularity}',
+                   strftime('{bucket_format}', measurement_date) AS bucket_start,
+                   COUNT(*), SUM(metric_value), MIN(metric_value), MAX(metric_value),
+                   metric_value, MAX(measurement_date)
+            FROM initiative_effects
+            WHERE metric_value IS NOT NULL AND measurement_date IS NOT NULL
+            GROUP BY initiative_id, metric_name, bucket_start
+        """))
+
+def _split(start: datetime, end: datetime, granularities: Tuple[str, ...]) -> List[Tuple[Optional[str], datetime, datetime]]:
+    if start >= end:
+        return []
+    for index in reversed(range(len(granularities))):
+        granularity = granularities[index]
+        low, high = _ceil(start, granularity), truncate(end, granularity)
+        if low < high:
+            finer = granularities[:index]
+            return _split(start, low, finer) + [(granularity, low, high)] + _split(high, end, finer)
+    return [(None, start, end)]
+
+def split_range(start: datetime, end: datetime, step: str) -> List[Tuple[Optional[str], datetime, datetime]]:
+    """[start, end) を (粒度, 開始, 終了) の区間に分ける
+
+    step 以下の粒度のうち、中央はバケット境界に揃う最も粗い粒度で覆い、残った両端を順に細かい粒度で覆う。
+    1時間に満たない端は粒度 None（生の効果測定を読む区間）になる。
+    """
+    return _split(start, end, GRANULARITIES[:GRANULARITIES.index(step) + 1])
+
+def describe_ranges(ranges: List[Tuple[Optional[str], datetime, datetime]]) -> str:
+    """読み出し元の粒度を粗い順に + でつないだ名前（生の効果測定は raw）"""
+    used = {granularity for granularity, _, _ in ranges}
+    names = [granularity for granularity in reversed(GRANULARITIES) if granularity in used]
+    return "+".join(names + ["raw"] if None in used else names)
+
+def query_effect_timeseries(
+    db: Session,
+    initiative_id: int,
+    metric_name: str,
+    start: datetime,
+    end: datetime,
+    step: str
+) -> Tuple[str, List[dict]]:
+    """[start, end) の効果測定値を step ごとに集計し、(読み出し元, ポイントの一覧) を返す
+
+    範囲を split_range で区間に分け、バケット境界に揃う区間はロールアップ、1時間に満たない端は
+    生の効果測定から読む（UNION ALL の1クエリ）。読んだ部分集計を step のバケットにまとめ直す。
+    """
+    ranges = split_range(start, end, step)
+    rollup = models.InitiativeEffectRollup
+    effect = models.InitiativeEffect
+    statements = []
+    for granularity, low, high in ranges:
+        if granularity is None:
+            # 生の値は件数1・最小＝最大＝最新の部分集計として扱う
+            value = effect.metric_value
+            statements.append(select(
+                effect.measurement_date, literal(1), value, value, value, value, effect.measurement_date
+            ).where(
+                effect.initiative_id == initiative_id,
+                effect.metric_name == metric_name,
+                effect.measurement_date >= low,
+                effect.measurement_date < high
+            ))
+        else:
+            statements.append(select(
+                rollup.bucket_start, rollup.count, rollup.sum, rollup.min, rollup.max,
+                rollup.last_value, rollup.last_measured_at
+            ).where(
+                rollup.initiative_id == initiative_id,
+                rollup.metric_name == metric_name,
+                rollup.granularity == granularity,
+                rollup.bucket_start >= low,
+                rollup.bucket_start < high
+            ))
+    statement = statements[0] if len(statements) == 1 else union_all(*statements)
+    partials = db.execute(statement).all()
+    source = describe_ranges(ranges)
+
+    points = {}
+    for bucket_start, count, total, low, high, last_value, last_measured_at in partials:
+        key = truncate(bucket_start, step)
+        point = points.get(key)
+        if point is None:
+            points[key] = {
+                "bucket_start": key, "count": count, "sum": total, "min": low, "max": high,
+                "last_value": last_value, "last_measured_at": last_measured_at,
+            }
+        else:
+            _merge(point, count, total, low, high, last_value, last_measured_at)
+
+    series = []
+    for key in sorted(points):
+        point = points[key]
+        point["mean"] = point["sum"] / point["count"]
+        del point["last_measured_at"]
+        series.append(point)
+    return source, series
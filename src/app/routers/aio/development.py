@@ -0,0 +1,184 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from ...conditional import item_not_modified_async, page_not_modified_async, set_item_validators, set_page_validators
+from ...database import get_async_db
+from ...fast_json import list_response, load_page_async
+from ...pagination import paginate, set_next_cursor
+from ...models import models
+from ...schemas import schemas
+
+router = APIRouter(
+    prefix="/development",
+    tags=["development"]
+)
+
+# Requirements endpoints
+@router.post("/requirements/", response_model=schemas.Requirement, status_code=status.HTTP_201_CREATED)
+async def create_requirement(
+    requirement: schemas.RequirementCreate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    # 施策の存在確認
+    initiative = await db.get(models.Initiative, requirement.initiative_id)
+    if not initiative:
+        raise HTTPException(status_code=404, detail="Initiative not found")
+
+    db_requirement = models.Requirement(
+        initiative_id=requirement.initiative_id,
+        title=requirement.title,
+        description=requirement.description,
+        status=requirement.status
+    )
+    db.add(db_requirement)
+    await db.commit()
+    await db.refresh(db_requirement)
+    return db_requirement
+
+@router.get("/requirements/", response_model=List[schemas.Requirement])
+async def list_requirements(
+    request: Request,
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    initiative_id: int = None,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    query = select(models.Requirement)
+    if initiative_id:
+        query = query.where(models.Requirement.initiative_id == initiative_id)
+    statement = paginate(query, models.Requirement.id, skip, limit, cursor)
+    not_modified = await page_not_modified_async(request, db, statement, models.Requirement)
+    if not_modified is not None:
+        return not_modified
+    requirements = await load_page_async(db, statement, models.Requirement, schemas.Requirement)
+    set_next_cursor(response, requirements, limit)
+    set_page_validators(response, models.Requirement, requirements)
+    return list_response(requirements, models.Requirement, schemas.Requirement, response)
+
+@router.get("/requirements/{requirement_id}", response_model=schemas.Requirement)
+async def get_requirement(
+    requirement_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db)
+):
+    not_modified = await item_not_modified_async(request, db, models.Requirement, requirement_id)
+    if not_modified is not None:
+        return not_modified
+    requirement = await db.get(models.Requirement, requirement_id)
+    if requirement is None:
+        raise HTTPException(status_code=404, detail="Requirement not found")
+    set_item_validators(response, models.Requirement, requirement)
+    return requirement
+
+@router.put("/requirements/{requirement_id}/status", response_model=schemas.Requirement)
+async def update_requirement_status(
+    requirement_id: int,
+    status_update: schemas.RequirementStatusUpdate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    requirement = await db.get(models.Requirement, requirement_id)
+    if requirement is None:
+        raise HTTPException(status_code=404, detail="Requirement not found")
+
+    requirement.status = status_update.status
+    await db.commit()
+    await db.refresh(requirement)
+    return requirement
+
+# Development Tasks endpoints
+@router.post("/tasks/", response_model=schemas.DevelopmentTask, status_code=status.HTTP_201_CREATED)
+async def create_development_task(
+    task: schemas.DevelopmentTaskCreate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    # 要件の存在確認
+    requirement = await db.get(models.Requirement, task.requirement_id)
+    if not requirement:
+        raise HTTPException(status_code=404, detail="Requirement not found")
+
+    db_task = models.DevelopmentTask(
+        requirement_id=task.requirement_id,
+        title=task.title,
+        description=task.description,
+        status=task.status
+    )
+    db.add(db_task)
+    await db.commit()
+    await db.refresh(db_task)
+    return db_task
+
+@router.get("/tasks/", response_model=List[schemas.DevelopmentTask])
+async def list_development_tasks(
+    request: Request,
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    requirement_id: int = None,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    query = select(models.DevelopmentTask)
+    if requirement_id:
+        query = query.where(models.DevelopmentTask.requirement_id == requirement_id)
+    statement = paginate(query, models.DevelopmentTask.id, skip, limit, cursor)
+    not_modified = await page_not_modified_async(request, db, statement, models.DevelopmentTask)
+    if not_modified is not None:
+        return not_modified
+    tasks = await load_page_async(db, statement, models.DevelopmentTask, schemas.DevelopmentTask)
+    set_next_cursor(response, tasks, limit)
+    set_page_validators(response, models.DevelopmentTask, tasks)
+    return list_response(tasks, models.DevelopmentTask, schemas.DevelopmentTask, response)
+
+@router.get("/tasks/{task_id}", response_model=schemas.DevelopmentTask)
+async def get_development_task(
+    task_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db)
+):
+    not_modified = await item_not_modified_async(request, db, models.DevelopmentTask, task_id)
+    if not_modified is not None:
+        return not_modified
+    task = await db.get(models.DevelopmentTask, task_id)
+    if task is None:
+        raise HTTPException(status_code=404, detail="Development task not found")
+    set_item_validators(response, models.DevelopmentTask, task)
+    return task
+
+@router.put("/tasks/{task_id}", response_model=schemas.DevelopmentTask)
+async def update_development_task(
+    task_id: int,
+    task_update: schemas.DevelopmentTaskCreate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    task = await db.get(models.DevelopmentTask, task_id)
+    if task is None:
+        raise HTTPException(status_code=404, detail="Development task not found")
+
+    for var, value in vars(task_update).items():
+        setattr(task, var, value)
+
+    await db.commit()
+    await db.refresh(task)
+    return task
+
+@router.get("/requirements/{requirement_id}/tasks", response_model=List[schemas.DevelopmentTask])
+async def get_tasks_by_requirement(
+    requirement_id: int,
+    db: AsyncSession = Depends(get_async_db)
+):
+    requirement = await db.get(models.Requirement, requirement_id)
+    if requirement is None:
+        raise HTTPException(status_code=404, detail="Requirement not found")
+
+    tasks = await load_page_async(
+        db,
+        select(models.DevelopmentTask).where(models.DevelopmentTask.requirement_id == requirement_id),
+        models.DevelopmentTask,
+        schemas.DevelopmentTask
+    )
+    return list_response(tasks, models.DevelopmentTask, schemas.DevelopmentTask)
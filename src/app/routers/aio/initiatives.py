@@ -0,0 +1,135 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from ...analytics import portfolio_cache
+from ...conditional import item_not_modified_async, page_not_modified_async, set_item_validators, set_page_validators
+from ...database import get_async_db
+from ...fast_json import list_response, load_page_async
+from ...pagination import paginate, set_next_cursor
+from ...models import models
+from ...rollups import apply_effect_rollups
+from ...sketches import apply_effect_sketches
+from ...schemas import schemas
+
+router = APIRouter(
+    prefix="/initiatives",
+    tags=["initiatives"]
+)
+
+@router.post("/", response_model=schemas.Initiative, status_code=status.HTTP_201_CREATED)
+async def create_initiative(initiative: schemas.InitiativeCreate, db: AsyncSession = Depends(get_async_db)):
+    db_initiative = models.Initiative(
+        title=initiative.title,
+        description=initiative.description,
+        irr=initiative.irr,
+        cost=initiative.cost,
+        status=models.InitiativeStatus.PROPOSED
+    )
+    db.add(db_initiative)
+    await db.commit()
+    portfolio_cache.invalidate()
+    await db.refresh(db_initiative)
+    return db_initiative
+
+@router.get("/", response_model=List[schemas.Initiative])
+async def list_initiatives(
+    request: Request,
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    statement = paginate(select(models.Initiative), models.Initiative.id, skip, limit, cursor)
+    not_modified = await page_not_modified_async(request, db, statement, models.Initiative)
+    if not_modified is not None:
+        return not_modified
+    initiatives = await load_page_async(db, statement, models.Initiative, schemas.Initiative)
+    set_next_cursor(response, initiatives, limit)
+    set_page_validators(response, models.Initiative, initiatives)
+    return list_response(initiatives, models.Initiative, schemas.Initiative, response)
+
+@router.get("/{initiative_id}", response_model=schemas.Initiative)
+async def get_initiative(
+    initiative_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db)
+):
+    not_modified = await item_not_modified_async(request, db, models.Initiative, initiative_id)
+    if not_modified is not None:
+        return not_modified
+    initiative = await db.get(models.Initiative, initiative_id)
+    if initiative is None:
+        raise HTTPException(status_code=404, detail="Initiative not found")
+    set_item_validators(response, models.Initiative, initiative)
+    return initiative
+
+@router.post("/{initiative_id}/assessments", response_model=schemas.InitiativeAssessment)
+async def create_initiative_assessment(
+    initiative_id: int,
+    assessment: schemas.InitiativeAssessmentCreate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    # 施策の存在確認
+    initiative = await db.get(models.Initiative, initiative_id)
+    if initiative is None:
+        raise HTTPException(status_code=404, detail="Initiative not found")
+
+    db_assessment = models.InitiativeAssessment(
+        initiative_id=initiative_id,
+        feasibility_score=assessment.feasibility_score,
+        compliance_check=assessment.compliance_check,
+        terms_impact=assessment.terms_impact
+    )
+
+    # 施策のステータス更新
+    initiative.status = models.InitiativeStatus.UNDER_REVIEW
+
+    db.add(db_assessment)
+    await db.commit()
+    portfolio_cache.invalidate()
+    await db.refresh(db_assessment)
+    return db_assessment
+
+@router.post("/{initiative_id}/effects", response_model=schemas.InitiativeEffect)
+async def record_initiative_effect(
+    initiative_id: int,
+    effect: schemas.InitiativeEffectCreate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    # 施策の存在確認
+    initiative = await db.get(models.Initiative, initiative_id)
+    if initiative is None:
+        raise HTTPException(status_code=404, detail="Initiative not found")
+
+    db_effect = models.InitiativeEffect(
+        initiative_id=initiative_id,
+        metric_name=effect.metric_name,
+        metric_value=effect.metric_value
+    )
+
+    db.add(db_effect)
+    await db.flush()
+    await db.run_sync(lambda session: apply_effect_rollups(session, [db_effect]))
+    await db.run_sync(lambda session: apply_effect_sketches(session, [db_effect]))
+    await db.commit()
+    await db.refresh(db_effect)
+    return db_effect
+
+@router.put("/{initiative_id}/status", response_model=schemas.Initiative)
+async def update_initiative_status(
+    initiative_id: int,
+    status_update: schemas.InitiativeStatusUpdate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    initiative = await db.get(models.Initiative, initiative_id)
+    if initiative is None:
+        raise HTTPException(status_code=404, detail="Initiative not found")
+
+    initiative.status = status_update.status
+    await db.commit()
+    portfolio_cache.invalidate()
+    await db.refresh(initiative)
+    return initiative
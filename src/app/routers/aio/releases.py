@@ -0,0 +1,168 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from datetime import datetime
+from ...conditional import item_not_modified_async, page_not_modified_async, set_item_validators, set_page_validators
+from ...database import get_async_db
+from ...fast_json import list_response, load_page_async
+from ...pagination import paginate, set_next_cursor
+from ...models import models
+from ...schemas import schemas
+
+router = APIRouter(
+    prefix="/releases",
+    tags=["releases"]
+)
+
+@router.post("/", response_model=schemas.Release, status_code=status.HTTP_201_CREATED)
+async def create_release(
+    release: schemas.ReleaseCreate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    db_release = models.Release(
+        version=release.version,
+        description=release.description,
+        status=release.status,
+        planned_date=release.planned_date
+    )
+    db.add(db_release)
+    await db.commit()
+    await db.refresh(db_release)
+    return db_release
+
+@router.get("/", response_model=List[schemas.Release])
+async def list_releases(
+    request: Request,
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    status: schemas.ReleaseStatus = None,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    query = select(models.Release)
+    if status:
+        query = query.where(models.Release.status == status)
+    statement = paginate(query, models.Release.id, skip, limit, cursor)
+    not_modified = await page_not_modified_async(request, db, statement, models.Release)
+    if not_modified is not None:
+        return not_modified
+    releases = await load_page_async(db, statement, models.Release, schemas.Release)
+    set_next_cursor(response, releases, limit)
+    set_page_validators(response, models.Release, releases)
+    return list_response(releases, models.Release, schemas.Release, response)
+
+@router.get("/{release_id}", response_model=schemas.Release)
+async def get_release(
+    release_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db)
+):
+    not_modified = await item_not_modified_async(request, db, models.Release, release_id)
+    if not_modified is not None:
+        return not_modified
+    release = await db.get(models.Release, release_id)
+    if release is None:
+        raise HTTPException(status_code=404, detail="Release not found")
+    set_item_validators(response, models.Release, release)
+    return release
+
+@router.put("/{release_id}/status", response_model=schemas.Release)
+async def update_release_status(
+    release_id: int,
+    status_update: schemas.ReleaseStatusUpdate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    release = await db.get(models.Release, release_id)
+    if release is None:
+        raise HTTPException(status_code=404, detail="Release not found")
+
+    release.status = status_update.status
+    if status_update.status == schemas.ReleaseStatus.COMPLETED:
+        release.actual_date = datetime.utcnow()
+
+    await db.commit()
+    await db.refresh(release)
+    return release
+
+@router.post("/{release_id}/rollback", response_model=schemas.ReleaseRollback)
+async def create_rollback(
+    release_id: int,
+    rollback: schemas.ReleaseRollbackCreate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    # リリースの存在確認
+    release = await db.get(models.Release, release_id)
+    if release is None:
+        raise HTTPException(status_code=404, detail="Release not found")
+
+    # リリースステータスの確認
+    if release.status != models.ReleaseStatus.COMPLETED:
+        raise HTTPException(
+            status_code=400,
+            detail="Only completed releases can be rolled back"
+        )
+
+    # ロールバックの記録
+    db_rollback = models.ReleaseRollback(
+        release_id=release_id,
+        reason=rollback.reason
+    )
+
+    # リリースステータスの更新
+    release.status = schemas.ReleaseStatus.ROLLED_BACK
+
+    db.add(db_rollback)
+    await db.commit()
+    await db.refresh(db_rollback)
+    return db_rollback
+
+@router.get("/{release_id}/rollbacks", response_model=List[schemas.ReleaseRollback])
+async def get_release_rollbacks(
+    release_id: int,
+    db: AsyncSession = Depends(get_async_db)
+):
+    # リリースの存在確認
+    release = await db.get(models.Release, release_id)
+    if release is None:
+        raise HTTPException(status_code=404, detail="Release not found")
+
+    rollbacks = await load_page_async(
+        db,
+        select(models.ReleaseRollback).where(models.ReleaseRollback.release_id == release_id),
+        models.ReleaseRollback,
+        schemas.ReleaseRollback
+    )
+    return list_response(rollbacks, models.ReleaseRollback, schemas.ReleaseRollback)
+
+@router.get("/pending/approval", response_model=List[schemas.Release])
+async def get_pending_releases(db: AsyncSession = Depends(get_async_db)):
+    releases = await load_page_async(
+        db,
+        select(models.Release).where(models.Release.status == schemas.ReleaseStatus.PENDING_APPROVAL),
+        models.Release,
+        schemas.Release
+    )
+    return list_response(releases, models.Release, schemas.Release)
+
+@router.put("/{release_id}/approve", response_model=schemas.Release)
+async def approve_release(
+    release_id: int,
+    db: AsyncSession = Depends(get_async_db)
+):
+    release = await db.get(models.Release, release_id)
+    if release is None:
+        raise HTTPException(status_code=404, detail="Release not found")
+
+    if release.status != models.ReleaseStatus.PENDING_APPROVAL:
+        raise HTTPException(
+            status_code=400,
+            detail="Only pending releases can be approved"
+        )
+
+    release.status = schemas.ReleaseStatus.APPROVED
+    await db.commit()
+    await db.refresh(release)
+    return release
@@ -0,0 +1,23 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from ...database import get_async_db
+from ...schemas import schemas
+from ...search import search_hits, search_statement
+from ..search import SEARCH_MAX_LIMIT, SEARCH_QUERY_MAX_LENGTH
+
+router = APIRouter(
+    prefix="/search",
+    tags=["search"]
+)
+
+@router.get("/", response_model=List[schemas.SearchHit])
+async def search(
+    q: str = Query(..., min_length=1, max_length=SEARCH_QUERY_MAX_LENGTH),
+    type: Optional[List[schemas.SearchType]] = Query(None),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=SEARCH_MAX_LIMIT),
+    db: AsyncSession = Depends(get_async_db)
+):
+    kinds = [kind.value for kind in type] if type else None
+    return search_hits(await db.execute(search_statement(q, kinds, skip, limit)))
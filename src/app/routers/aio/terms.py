@@ -0,0 +1,180 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import undefer
+from typing import List, Optional, Union
+from ...agreement_writer import record_agreement_coalesced
+from ...conditional import page_not_modified_async, set_page_validators
+from ...config import settings
+from ...database import get_async_db
+from ...fast_json import list_response, load_page_async
+from ...pagination import paginate, set_next_cursor
+from ...models import models
+from ...schemas import schemas
+from ...terms_cache import latest_terms_cache
+from ...terms_content import encode_terms_content, terms_diff, terms_schema, terms_with_content
+from ...terms_delivery import (
+    LATEST_TERMS_MAX_AGE_SECONDS, TERMS_MAX_AGE_SECONDS, cached_terms, terms_response, terms_response_cache,
+)
+
+router = APIRouter(
+    prefix="/terms",
+    tags=["terms"]
+)
+
+async def _get_latest_terms(db: AsyncSession):
+    # 同期版と同じプロセス内キャッシュを使い、期限切れのときだけ query_latest_terms で読み直す
+    return await db.run_sync(latest_terms_cache.get)
+
+@router.post("/", response_model=schemas.TermsOfService, status_code=status.HTTP_201_CREATED)
+async def create_terms(
+    terms: schemas.TermsOfServiceCreate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    db_terms = models.TermsOfService(
+        version=terms.version,
+        effective_date=terms.effective_date,
+        **await db.run_sync(encode_terms_content, terms.content)
+    )
+    db.add(db_terms)
+    await db.commit()
+    await db.refresh(db_terms)
+    created = terms_schema(db_terms, terms.content)
+    latest_terms_cache.update(created)
+    # 配信用の応答を作成時に圧縮しておく（圧縮はイベントループの外で行う）
+    await run_in_threadpool(terms_response_cache.put, created)
+    return created
+
+@router.get("/", response_model=List[Union[schemas.TermsOfService, schemas.TermsOfServiceSummary]])
+async def list_terms(
+    request: Request,
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    include_content: bool = False,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """利用規約の一覧（本文は include_content=true のときだけ含める）"""
+    statement = paginate(select(models.TermsOfService), models.TermsOfService.id, skip, limit, cursor)
+    # 本文の有無で表現が異なるので ETag も分ける
+    variant = "content" if include_content else ""
+    not_modified = await page_not_modified_async(request, db, statement, models.TermsOfService, variant)
+    if not_modified is not None:
+        return not_modified
+    if include_content:
+        result = await db.execute(statement.options(undefer(models.TermsOfService.content_data)))
+        terms = await db.run_sync(terms_with_content, result.scalars().all())
+        set_next_cursor(response, terms, limit)
+        set_page_validators(response, models.TermsOfService, terms, variant)
+        return terms
+    terms = await load_page_async(db, statement, models.TermsOfService, schemas.TermsOfServiceSummary)
+    set_next_cursor(response, terms, limit)
+    set_page_validators(response, models.TermsOfService, terms)
+    return list_response(terms, models.TermsOfService, schemas.TermsOfServiceSummary, response)
+
+async def _terms_response(request: Request, db: AsyncSession, terms, max_age: int, immutable: bool = False):
+    # 事前圧縮済みの応答がなければ本文を読み込んで組み立てる
+    encoded = terms_response_cache.get(terms.id, terms.created_at)
+    if encoded is None:
+        encoded = await db.run_sync(cached_terms, terms.id, terms.created_at)
+    return terms_response(request, encoded, max_age, immutable)
+
+@router.get("/latest", response_model=schemas.TermsOfService)
+async def get_latest_terms(request: Request, db: AsyncSession = Depends(get_async_db)):
+    terms = await _get_latest_terms(db)
+    if terms is None:
+        raise HTTPException(status_code=404, detail="No terms of service found")
+    # 応答はキャッシュ済みの利用規約から組み立てるので、DBアクセスは不要
+    encoded = terms_response_cache.get(terms.id, terms.created_at)
+    if encoded is None:
+        encoded = await run_in_threadpool(terms_response_cache.get_or_build, terms.id, terms.created_at, lambda: terms)
+    return terms_response(request, encoded, LATEST_TERMS_MAX_AGE_SECONDS)
+
+@router.get("/latest/cache-stats")
+async def get_latest_terms_cache_stats():
+    return latest_terms_cache.stats()
+
+@router.get("/{terms_id}", response_model=schemas.TermsOfService)
+async def get_terms(terms_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+    terms = await db.get(models.TermsOfService, terms_id)
+    if terms is None:
+        raise HTTPException(status_code=404, detail="Terms of service not found")
+    return await _terms_response(request, db, terms, TERMS_MAX_AGE_SECONDS, immutable=True)
+
+@router.get("/{terms_id}/diff", response_model=schemas.TermsDiff)
+async def get_terms_diff(terms_id: int, base_id: Optional[int] = None, db: AsyncSession = Depends(get_async_db)):
+    """base_id の版（省略時は1つ前の版）から terms_id の版への本文の変更箇所（文の単位）"""
+    return await db.run_sync(terms_diff, terms_id, base_id)
+
+@router.post("/{terms_id}/agreements", status_code=status.HTTP_201_CREATED)
+async def record_agreement(
+    terms_id: int,
+    member_id: str,
+    db: AsyncSession = Depends(get_async_db)
+):
+    # 同時に届いた同意登録は1トランザクションにまとめてコミットする
+    if settings.agreement_group_commit:
+        return await record_agreement_coalesced(terms_id, member_id)
+
+    # 利用規約の存在確認
+    terms = await db.get(models.TermsOfService, terms_id)
+    if terms is None:
+        raise HTTPException(status_code=404, detail="Terms of service not found")
+
+    # 新規同意の記録（重複は (terms_id, member_id) の一意制約で検出する）
+    db.add(models.TermsAgreement(
+        terms_id=terms_id,
+        member_id=member_id
+    ))
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=400,
+            detail="Member has already agreed to these terms"
+        )
+
+    return {"status": "success", "message": "Agreement recorded"}
+
+@router.get("/agreements/{member_id}", response_model=List[dict])
+async def get_member_agreements(member_id: str, db: AsyncSession = Depends(get_async_db)):
+    result = await db.execute(
+        select(models.TermsAgreement).where(models.TermsAgreement.member_id == member_id)
+    )
+
+    return [
+        {
+            "terms_id": agreement.terms_id,
+            "agreed_at": agreement.agreed_at,
+            "member_id": agreement.member_id
+        }
+        for agreement in result.scalars()
+    ]
+
+@router.get("/check-agreement/{member_id}")
+async def check_latest_agreement(member_id: str, db: AsyncSession = Depends(get_async_db)):
+    # 最新の利用規約を取得
+    latest_terms = await _get_latest_terms(db)
+
+    if not latest_terms:
+        raise HTTPException(status_code=404, detail="No terms of service found")
+
+    # 会員の同意を確認
+    result = await db.execute(
+        select(models.TermsAgreement.agreed_at).where(
+            models.TermsAgreement.terms_id == latest_terms.id,
+            models.TermsAgreement.member_id == member_id
+        ).limit(1)
+    )
+    agreed_at = result.scalar()
+
+    return {
+        "has_agreed": agreed_at is not None,
+        "latest_terms_version": latest_terms.version,
+        "latest_terms_id": latest_terms.id,
+        "agreement_date": agreed_at
+    }
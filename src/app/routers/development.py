@@ -1,15 +1,50 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import insert, select
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+from ..bulk import bulk_transition
+from ..conditional import item_not_modified, page_not_modified, set_item_validators, set_page_validators
 from ..database import get_db
+from ..fast_json import list_response, load_page
+from ..pagination import paginate, set_next_cursor
 from ..models import models
 from ..schemas import schemas
+from ..streaming import ndjson_response
 
 router = APIRouter(
     prefix="/development",
     tags=["development"]
 )
 
+# 一括登録で1回に受け付ける件数の上限
+BULK_CREATE_MAX_ITEMS = 5000
+
+def _bulk_create(db: Session, model, parent_model, parent_key: str, items: list, not_found: str) -> dict:
+    """親の存在を1回の IN クエリで確認し、親が存在する要素を1トランザクションで一括登録する"""
+    if len(items) > BULK_CREATE_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {BULK_CREATE_MAX_ITEMS} items can be created at once"
+        )
+    parent_ids = set(db.scalars(
+        select(parent_model.id).where(parent_model.id.in_({getattr(item, parent_key) for item in items}))
+    ))
+    valid = [index for index, item in enumerate(items) if getattr(item, parent_key) in parent_ids]
+    ids = []
+    if valid:
+        table = model.__table__
+        # RETURNING の行の順序は保証されないので、入力の順に並べて返させて要素と対応付ける
+        ids = db.scalars(
+            insert(table).returning(table.c.id, sort_by_parameter_order=True),
+            [items[index].model_dump() for index in valid]
+        ).all()
+        db.commit()
+
+    results = [{"index": index, "error": not_found} for index in range(len(items))]
+    for index, created_id in zip(valid, ids):
+        results[index] = {"index": index, "id": created_id}
+    return {"created": len(valid), "failed": len(items) - len(valid), "results": results}
+
 # Requirements endpoints
 @router.post("/requirements/", response_model=schemas.Requirement, status_code=status.HTTP_201_CREATED)
 def create_requirement(
@@ -32,24 +67,70 @@ def create_requirement(
     db.refresh(db_requirement)
     return db_requirement
 
+@router.post("/requirements/bulk", response_model=schemas.BulkCreateResult)
+def create_requirements_bulk(
+    requirements: List[schemas.RequirementCreate],
+    db: Session = Depends(get_db)
+):
+    """要件を一括登録し、入力順に作成したIDまたはエラーを返す（施策が存在しない要素のみ失敗する）"""
+    return _bulk_create(
+        db, models.Requirement, models.Initiative, "initiative_id", requirements, "Initiative not found"
+    )
+
 @router.get("/requirements/", response_model=List[schemas.Requirement])
 def list_requirements(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     initiative_id: int = None,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
     query = db.query(models.Requirement)
     if initiative_id:
         query = query.filter(models.Requirement.initiative_id == initiative_id)
-    requirements = query.offset(skip).limit(limit).all()
-    return requirements
+    query = paginate(query, models.Requirement.id, skip, limit, cursor)
+    not_modified = page_not_modified(request, query, models.Requirement)
+    if not_modified is not None:
+        return not_modified
+    requirements = load_page(query, models.Requirement, schemas.Requirement)
+    set_next_cursor(response, requirements, limit)
+    set_page_validators(response, models.Requirement, requirements)
+    return list_response(requirements, models.Requirement, schemas.Requirement, response)
+
+@router.get("/requirements/export")
+def export_requirements(
+    initiative_id: int = None,
+    db: Session = Depends(get_db)
+):
+    query = select(models.Requirement).order_by(models.Requirement.id)
+    if initiative_id:
+        query = query.where(models.Requirement.initiative_id == initiative_id)
+    return ndjson_response(db, query, schemas.Requirement)
+
+@router.put("/requirements/bulk/status", response_model=schemas.BulkTransitionResult)
+def update_requirement_statuses_bulk(
+    status_update: schemas.RequirementBulkStatusUpdate,
+    db: Session = Depends(get_db)
+):
+    """複数の要件のステータスを1回の UPDATE で変更し、IDごとの結果を返す"""
+    return bulk_transition(db, models.Requirement, status_update.ids, {"status": status_update.status})
 
 @router.get("/requirements/{requirement_id}", response_model=schemas.Requirement)
-def get_requirement(requirement_id: int, db: Session = Depends(get_db)):
+def get_requirement(
+    requirement_id: int,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db)
+):
+    not_modified = item_not_modified(request, db, models.Requirement, requirement_id)
+    if not_modified is not None:
+        return not_modified
     requirement = db.query(models.Requirement).filter(models.Requirement.id == requirement_id).first()
     if requirement is None:
         raise HTTPException(status_code=404, detail="Requirement not found")
+    set_item_validators(response, models.Requirement, requirement)
     return requirement
 
 @router.put("/requirements/{requirement_id}/status", response_model=schemas.Requirement)
@@ -89,24 +170,62 @@ def create_development_task(
     db.refresh(db_task)
     return db_task
 
+@router.post("/tasks/bulk", response_model=schemas.BulkCreateResult)
+def create_development_tasks_bulk(
+    tasks: List[schemas.DevelopmentTaskCreate],
+    db: Session = Depends(get_db)
+):
+    """開発タスクを一括登録し、入力順に作成したIDまたはエラーを返す（要件が存在しない要素のみ失敗する）"""
+    return _bulk_create(
+        db, models.DevelopmentTask, models.Requirement, "requirement_id", tasks, "Requirement not found"
+    )
+
 @router.get("/tasks/", response_model=List[schemas.DevelopmentTask])
 def list_development_tasks(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     requirement_id: int = None,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
     query = db.query(models.DevelopmentTask)
     if requirement_id:
         query = query.filter(models.DevelopmentTask.requirement_id == requirement_id)
-    tasks = query.offset(skip).limit(limit).all()
-    return tasks
+    query = paginate(query, models.DevelopmentTask.id, skip, limit, cursor)
+    not_modified = page_not_modified(request, query, models.DevelopmentTask)
+    if not_modified is not None:
+        return not_modified
+    tasks = load_page(query, models.DevelopmentTask, schemas.DevelopmentTask)
+    set_next_cursor(response, tasks, limit)
+    set_page_validators(response, models.DevelopmentTask, tasks)
+    return list_response(tasks, models.DevelopmentTask, schemas.DevelopmentTask, response)
+
+@router.get("/tasks/export")
+def export_development_tasks(
+    requirement_id: int = None,
+    db: Session = Depends(get_db)
+):
+    query = select(models.DevelopmentTask).order_by(models.DevelopmentTask.id)
+    if requirement_id:
+        query = query.where(models.DevelopmentTask.requirement_id == requirement_id)
+    return ndjson_response(db, query, schemas.DevelopmentTask)
 
 @router.get("/tasks/{task_id}", response_model=schemas.DevelopmentTask)
-def get_development_task(task_id: int, db: Session = Depends(get_db)):
+def get_development_task(
+    task_id: int,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db)
+):
+    not_modified = item_not_modified(request, db, models.DevelopmentTask, task_id)
+    if not_modified is not None:
+        return not_modified
     task = db.query(models.DevelopmentTask).filter(models.DevelopmentTask.id == task_id).first()
     if task is None:
         raise HTTPException(status_code=404, detail="Development task not found")
+    set_item_validators(response, models.DevelopmentTask, task)
     return task
 
 @router.put("/tasks/{task_id}", response_model=schemas.DevelopmentTask)
@@ -131,11 +250,12 @@ def get_tasks_by_requirement(
     requirement_id: int,
     db: Session = Depends(get_db)
 ):
-    requirement = db.query(models.Requirement).filter(models.Requirement.id == requirement_id).first()
-    if requirement is None:
+    tasks = load_page(
+        db.query(models.DevelopmentTask).filter(models.DevelopmentTask.requirement_id == requirement_id),
+        models.DevelopmentTask,
+        schemas.DevelopmentTask
+    )
+    # タスクが見つからない場合のみ要件の存在を確認する
+    if not tasks and db.query(models.Requirement.id).filter(models.Requirement.id == requirement_id).first() is None:
         raise HTTPException(status_code=404, detail="Requirement not found")
-    
-    tasks = db.query(models.DevelopmentTask)\
-        .filter(models.DevelopmentTask.requirement_id == requirement_id)\
-        .all()
-    return tasks
+    return list_response(tasks, models.DevelopmentTask, schemas.DevelopmentTask)
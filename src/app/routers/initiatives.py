@@ -1,15 +1,51 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.orm import Session, selectinload
+from typing import List, Optional
+from datetime import datetime, timezone
+from ..analytics import portfolio_cache, summarize_portfolio
+from ..bulk import bulk_transition
+from ..conditional import item_not_modified, page_not_modified, set_item_validators, set_page_validators
+from ..config import settings
 from ..database import get_db
+from ..fast_json import list_response, load_page
+from ..ingestion import effect_writer
+from ..optimizer import optimize_portfolio, query_candidates
+from ..rollups import apply_effect_rollups, count_buckets, query_effect_timeseries
+from ..sketches import apply_effect_sketches, query_effect_quantiles
+from ..pagination import paginate, set_next_cursor
 from ..models import models
 from ..schemas import schemas
+from ..streaming import ndjson_response
 
 router = APIRouter(
     prefix="/initiatives",
     tags=["initiatives"]
 )
 
+# 一度に取得できる施策ドシエの上限
+DOSSIER_MAX_IDS = 100
+# 効果測定の時系列で返すポイント数の上限
+TIMESERIES_MAX_POINTS = 10000
+# 1回の取り込みリクエストで受け付ける効果測定の上限
+EFFECT_INGEST_MAX_ITEMS = 10000
+
+def _dossier_query(db: Session):
+    # 関連を階層ごとに1本の IN クエリで読み込み、施策数や子の数に関係なく発行数を一定にする
+    return db.query(models.Initiative).options(
+        selectinload(models.Initiative.assessments),
+        selectinload(models.Initiative.effects),
+        selectinload(models.Initiative.requirements)
+            .selectinload(models.Requirement.development_tasks)
+    )
+
+def _as_utc(moment: datetime) -> datetime:
+    # 保存値はタイムゾーンなしのUTCなので揃える
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
 @router.post("/", response_model=schemas.Initiative, status_code=status.HTTP_201_CREATED)
 def create_initiative(initiative: schemas.InitiativeCreate, db: Session = Depends(get_db)):
     db_initiative = models.Initiative(
@@ -21,21 +57,178 @@ def create_initiative(initiative: schemas.InitiativeCreate, db: Session = Depend
     )
     db.add(db_initiative)
     db.commit()
+    portfolio_cache.invalidate()
     db.refresh(db_initiative)
     return db_initiative
 
 @router.get("/", response_model=List[schemas.Initiative])
 def list_initiatives(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    query = paginate(db.query(models.Initiative), models.Initiative.id, skip, limit, cursor)
+    not_modified = page_not_modified(request, query, models.Initiative)
+    if not_modified is not None:
+        return not_modified
+    initiatives = load_page(query, models.Initiative, schemas.Initiative)
+    set_next_cursor(response, initiatives, limit)
+    set_page_validators(response, models.Initiative, initiatives)
+    return list_response(initiatives, models.Initiative, schemas.Initiative, response)
+
+@router.get("/export")
+def export_initiatives(db: Session = Depends(get_db)):
+    return ndjson_response(
+        db, select(models.Initiative).order_by(models.Initiative.id), schemas.Initiative
+    )
+
+@router.get("/effects/export")
+def export_initiative_effects(
+    initiative_id: int = None,
+    db: Session = Depends(get_db)
+):
+    query = select(models.InitiativeEffect).order_by(models.InitiativeEffect.id)
+    if initiative_id:
+        query = query.where(models.InitiativeEffect.initiative_id == initiative_id)
+    return ndjson_response(db, query, schemas.InitiativeEffect)
+
+@router.get("/analytics", response_model=schemas.PortfolioAnalytics)
+def get_portfolio_analytics(
+    top_k: int = Query(10, ge=0, le=1000),
+    bins: int = Query(10, ge=1, le=1000),
+    status: Optional[List[schemas.InitiativeStatus]] = Query(None),
+    db: Session = Depends(get_db)
+):
+    statuses = [models.InitiativeStatus(s.value) for s in status] if status else None
+    return summarize_portfolio(portfolio_cache.get(db), top_k=top_k, bins=bins, statuses=statuses)
+
+@router.post("/optimize", response_model=schemas.PortfolioOptimization)
+def optimize_initiative_portfolio(
+    request: schemas.PortfolioOptimizationRequest,
+    db: Session = Depends(get_db)
+):
+    ids, irr, cost = query_candidates(
+        db,
+        [models.InitiativeStatus(s.value) for s in request.statuses],
+        require_compliance=request.require_compliance
+    )
+    try:
+        return optimize_portfolio(
+            ids, irr, cost, request.budget, method=request.method.value, resolution=request.resolution
+        )
+    except ValueError as exc:
+        # exact の明示指定で表が大きすぎる場合（貪欲法か resolution を下げての再試行を促す）
+        raise HTTPException(status_code=400, detail=str(exc))
+
+@router.get("/dossiers", response_model=List[schemas.InitiativeDossier])
+def get_initiative_dossiers(
+    ids: List[int] = Query(...),
+    db: Session = Depends(get_db)
+):
+    if len(ids) > DOSSIER_MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {DOSSIER_MAX_IDS} ids can be requested")
+    initiatives = _dossier_query(db).filter(models.Initiative.id.in_(ids)).all()
+    # 指定された順に返す（存在しないIDは除外）
+    by_id = {initiative.id: initiative for initiative in initiatives}
+    return [by_id[initiative_id] for initiative_id in dict.fromkeys(ids) if initiative_id in by_id]
+
+@router.get("/effects/quantiles", response_model=schemas.EffectQuantiles)
+def get_effect_quantiles(
+    metric_name: str,
+    start: datetime,
+    end: datetime,
+    q: List[float] = Query([0.5, 0.9, 0.99]),
+    db: Session = Depends(get_db)
+):
+    start, end = _as_utc(start), _as_utc(end)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    if any(not 0 <= value <= 1 for value in q):
+        raise HTTPException(status_code=400, detail="q must be between 0 and 1")
+    result = query_effect_quantiles(db, metric_name, start, end, q)
+    return {
+        "metric_name": metric_name,
+        "count": result["count"],
+        "source": result["source"],
+        "rank_error": result["rank_error"],
+        "quantiles": [{"q": value, "value": quantile} for value, quantile in zip(q, result["values"])],
+    }
+
+@router.post("/effects/ingest", response_model=schemas.EffectIngestAck, status_code=status.HTTP_202_ACCEPTED)
+async def ingest_initiative_effects(
+    effects: List[schemas.InitiativeEffectCreate],
+    durability: Optional[schemas.IngestDurability] = None
+):
+    # 効果測定はバッファに入れ、グループコミットでまとめて反映する
+    if not effects:
+        raise HTTPException(status_code=400, detail="effects must not be empty")
+    if len(effects) > EFFECT_INGEST_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {EFFECT_INGEST_MAX_ITEMS} effects can be ingested at once")
+    durability = durability or settings.effect_ingest_durability
+
+    # 測定日時は受け付けた時刻にする
+    measured_at = datetime.utcnow()
+    pending = effect_writer.submit_many([
+        models.InitiativeEffect(
+            initiative_id=effect.initiative_id,
+            metric_name=effect.metric_name,
+            metric_value=effect.metric_value,
+            measurement_date=measured_at
+        )
+        for effect in effects
+    ])
+    ack = {
+        "first_sequence": pending[0].sequence,
+        "last_sequence": pending[-1].sequence,
+        "count": len(pending),
+        "durability": durability,
+        "committed": False,
+    }
+    if durability == schemas.IngestDurability.COMMIT:
+        try:
+            applied = await asyncio.gather(*(asyncio.wrap_future(write) for write in pending))
+        except Exception:
+            raise HTTPException(status_code=503, detail="Failed to commit effects")
+        ack["committed"] = True
+        ack["rejected"] = [index for index, ok in enumerate(applied) if not ok]
+    return ack
+
+@router.get("/effects/ingest/status", response_model=schemas.EffectIngestStatus)
+def get_effect_ingest_status():
+    return effect_writer.stats()
+
+@router.put("/bulk/status", response_model=schemas.BulkTransitionResult)
+def update_initiative_statuses_bulk(
+    status_update: schemas.InitiativeBulkStatusUpdate,
     db: Session = Depends(get_db)
 ):
-    initiatives = db.query(models.Initiative).offset(skip).limit(limit).all()
-    return initiatives
+    """複数の施策のステータスを1回の UPDATE で変更し、IDごとの結果を返す"""
+    result = bulk_transition(db, models.Initiative, status_update.ids, {"status": status_update.status})
+    portfolio_cache.invalidate()
+    return result
 
 @router.get("/{initiative_id}", response_model=schemas.Initiative)
-def get_initiative(initiative_id: int, db: Session = Depends(get_db)):
+def get_initiative(
+    initiative_id: int,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db)
+):
+    not_modified = item_not_modified(request, db, models.Initiative, initiative_id)
+    if not_modified is not None:
+        return not_modified
     initiative = db.query(models.Initiative).filter(models.Initiative.id == initiative_id).first()
+    if initiative is None:
+        raise HTTPException(status_code=404, detail="Initiative not found")
+    set_item_validators(response, models.Initiative, initiative)
+    return initiative
+
+@router.get("/{initiative_id}/dossier", response_model=schemas.InitiativeDossier)
+def get_initiative_dossier(initiative_id: int, db: Session = Depends(get_db)):
+    initiative = _dossier_query(db).filter(models.Initiative.id == initiative_id).first()
     if initiative is None:
         raise HTTPException(status_code=404, detail="Initiative not found")
     return initiative
@@ -63,6 +256,7 @@ def create_initiative_assessment(
     
     db.add(db_assessment)
     db.commit()
+    portfolio_cache.invalidate()
     db.refresh(db_assessment)
     return db_assessment
 
@@ -84,10 +278,36 @@ def record_initiative_effect(
     )
     
     db.add(db_effect)
+    db.flush()
+    apply_effect_rollups(db, [db_effect])
+    apply_effect_sketches(db, [db_effect])
     db.commit()
     db.refresh(db_effect)
     return db_effect
 
+@router.get("/{initiative_id}/effects/timeseries", response_model=schemas.EffectTimeSeries)
+def get_initiative_effect_timeseries(
+    initiative_id: int,
+    metric_name: str,
+    start: datetime,
+    end: datetime,
+    step: schemas.TimeSeriesStep = schemas.TimeSeriesStep.DAY,
+    db: Session = Depends(get_db)
+):
+    start, end = _as_utc(start), _as_utc(end)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    if count_buckets(start, end, step.value) > TIMESERIES_MAX_POINTS:
+        raise HTTPException(status_code=400, detail=f"At most {TIMESERIES_MAX_POINTS} points can be requested")
+    source, points = query_effect_timeseries(db, initiative_id, metric_name, start, end, step.value)
+    return {
+        "initiative_id": initiative_id,
+        "metric_name": metric_name,
+        "step": step,
+        "source": source,
+        "points": points,
+    }
+
 @router.put("/{initiative_id}/status", response_model=schemas.Initiative)
 def update_initiative_status(
     initiative_id: int,
@@ -100,5 +320,6 @@ def update_initiative_status(
     
     initiative.status = status_update.status
     db.commit()
+    portfolio_cache.invalidate()
     db.refresh(initiative)
     return initiative
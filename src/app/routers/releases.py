@@ -1,10 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from datetime import datetime
+from ..bulk import bulk_transition
+from ..conditional import item_not_modified, page_not_modified, set_item_validators, set_page_validators
 from ..database import get_db
+from ..fast_json import list_response, load_page
+from ..pagination import paginate, set_next_cursor
 from ..models import models
 from ..schemas import schemas
+from ..streaming import ndjson_response
 
 router = APIRouter(
     prefix="/releases",
@@ -29,22 +35,77 @@ def create_release(
 
 @router.get("/", response_model=List[schemas.Release])
 def list_releases(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     status: schemas.ReleaseStatus = None,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
     query = db.query(models.Release)
     if status:
         query = query.filter(models.Release.status == status)
-    releases = query.offset(skip).limit(limit).all()
-    return releases
+    query = paginate(query, models.Release.id, skip, limit, cursor)
+    not_modified = page_not_modified(request, query, models.Release)
+    if not_modified is not None:
+        return not_modified
+    releases = load_page(query, models.Release, schemas.Release)
+    set_next_cursor(response, releases, limit)
+    set_page_validators(response, models.Release, releases)
+    return list_response(releases, models.Release, schemas.Release, response)
+
+@router.get("/export")
+def export_releases(
+    status: schemas.ReleaseStatus = None,
+    db: Session = Depends(get_db)
+):
+    query = select(models.Release).order_by(models.Release.id)
+    if status:
+        query = query.where(models.Release.status == status)
+    return ndjson_response(db, query, schemas.Release)
+
+@router.put("/bulk/status", response_model=schemas.BulkTransitionResult)
+def update_release_statuses_bulk(
+    status_update: schemas.ReleaseBulkStatusUpdate,
+    db: Session = Depends(get_db)
+):
+    """複数のリリースのステータスを1回の UPDATE で変更し、IDごとの結果を返す"""
+    values = {"status": status_update.status}
+    # 個別の変更と同じく、完了にしたリリースには実績日を記録する
+    if status_update.status == schemas.ReleaseStatus.COMPLETED:
+        values["actual_date"] = datetime.utcnow()
+    return bulk_transition(db, models.Release, status_update.ids, values)
+
+@router.put("/bulk/approve", response_model=schemas.BulkTransitionResult)
+def approve_releases_bulk(
+    approval: schemas.ReleaseBulkApprove,
+    db: Session = Depends(get_db)
+):
+    """承認待ちのリリースだけを1回の UPDATE でまとめて承認し、IDごとの結果を返す"""
+    return bulk_transition(
+        db,
+        models.Release,
+        approval.ids,
+        {"status": schemas.ReleaseStatus.APPROVED},
+        conditions=(models.Release.status == models.ReleaseStatus.PENDING_APPROVAL,),
+        invalid_detail="Only pending releases can be approved"
+    )
 
 @router.get("/{release_id}", response_model=schemas.Release)
-def get_release(release_id: int, db: Session = Depends(get_db)):
+def get_release(
+    release_id: int,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db)
+):
+    not_modified = item_not_modified(request, db, models.Release, release_id)
+    if not_modified is not None:
+        return not_modified
     release = db.query(models.Release).filter(models.Release.id == release_id).first()
     if release is None:
         raise HTTPException(status_code=404, detail="Release not found")
+    set_item_validators(response, models.Release, release)
     return release
 
 @router.put("/{release_id}/status", response_model=schemas.Release)
@@ -77,7 +138,7 @@ def create_rollback(
         raise HTTPException(status_code=404, detail="Release not found")
     
     # リリースステータスの確認
-    if release.status != schemas.ReleaseStatus.COMPLETED:
+    if release.status != models.ReleaseStatus.COMPLETED:
         raise HTTPException(
             status_code=400,
             detail="Only completed releases can be rolled back"
@@ -107,17 +168,21 @@ def get_release_rollbacks(
     if release is None:
         raise HTTPException(status_code=404, detail="Release not found")
     
-    rollbacks = db.query(models.ReleaseRollback)\
-        .filter(models.ReleaseRollback.release_id == release_id)\
-        .all()
-    return rollbacks
+    rollbacks = load_page(
+        db.query(models.ReleaseRollback).filter(models.ReleaseRollback.release_id == release_id),
+        models.ReleaseRollback,
+        schemas.ReleaseRollback
+    )
+    return list_response(rollbacks, models.ReleaseRollback, schemas.ReleaseRollback)
 
 @router.get("/pending/approval", response_model=List[schemas.Release])
 def get_pending_releases(db: Session = Depends(get_db)):
-    releases = db.query(models.Release)\
-        .filter(models.Release.status == schemas.ReleaseStatus.PENDING_APPROVAL)\
-        .all()
-    return releases
+    releases = load_page(
+        db.query(models.Release).filter(models.Release.status == schemas.ReleaseStatus.PENDING_APPROVAL),
+        models.Release,
+        schemas.Release
+    )
+    return list_response(releases, models.Release, schemas.Release)
 
 @router.put("/{release_id}/approve", response_model=schemas.Release)
 def approve_release(
@@ -128,7 +193,7 @@ def approve_release(
     if release is None:
         raise HTTPException(status_code=404, detail="Release not found")
     
-    if release.status != schemas.ReleaseStatus.PENDING_APPROVAL:
+    if release.status != models.ReleaseStatus.PENDING_APPROVAL:
         raise HTTPException(
             status_code=400,
             detail="Only pending releases can be approved"
@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from ..database import get_db
+from ..schemas import schemas
+from ..search import search_hits, search_statement
+
+router = APIRouter(
+    prefix="/search",
+    tags=["search"]
+)
+
+# 1ページで返す検索結果の上限
+SEARCH_MAX_LIMIT = 100
+SEARCH_QUERY_MAX_LENGTH = 200
+
+@router.get("/", response_model=List[schemas.SearchHit])
+def search(
+    q: str = Query(..., min_length=1, max_length=SEARCH_QUERY_MAX_LENGTH),
+    type: Optional[List[schemas.SearchType]] = Query(None),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=SEARCH_MAX_LIMIT),
+    db: Session = Depends(get_db)
+):
+    """施策・要件・開発タスクのタイトルと説明を全文検索し、関連の強い順に返す（空白区切りの語はすべて含む）"""
+    kinds = [kind.value for kind in type] if type else None
+    return search_hits(db.execute(search_statement(q, kinds, skip, limit)))
@@ -1,9 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, undefer
+from typing import AsyncIterator, Iterator, List, Optional, Union
+import csv
+import json
+from ..agreement_writer import record_agreement_coalesced
+from ..conditional import page_not_modified, set_page_validators
+from ..config import settings
 from ..database import get_db
+from ..fast_json import list_response, load_page
+from ..pagination import paginate, set_next_cursor
 from ..models import models
 from ..schemas import schemas
+from ..streaming import ndjson_response
+from ..terms_cache import latest_terms_cache
+from ..terms_content import encode_terms_content, terms_diff, terms_schema, terms_with_content
+from ..terms_delivery import (
+    LATEST_TERMS_MAX_AGE_SECONDS, TERMS_MAX_AGE_SECONDS, cached_terms, terms_response, terms_response_cache,
+)
 from datetime import datetime
 
 router = APIRouter(
@@ -11,6 +29,69 @@ router = APIRouter(
     tags=["terms"]
 )
 
+# 一括同意登録で1トランザクションにまとめる会員IDの件数
+BULK_AGREEMENT_CHUNK_SIZE = 5000
+# 一括同意確認で1回のIN句に含める会員IDの件数
+BATCH_CHECK_CHUNK_SIZE = 5000
+
+def _parse_member_id(line: str, csv_mode: bool, line_number: int):
+    if csv_mode:
+        fields = next(csv.reader([line]), [])
+        member_id = fields[0].strip() if fields else ""
+        # 1行目のヘッダーは読み飛ばす
+        if line_number == 1 and member_id == "member_id":
+            return None
+        return member_id or None
+
+    try:
+        value = json.loads(line)
+    except ValueError:
+        value = None
+    if isinstance(value, dict):
+        value = value.get("member_id")
+    if not isinstance(value, str) or not value:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid member ID at line {line_number}"
+        )
+    return value
+
+async def _iter_member_ids(request: Request) -> AsyncIterator[str]:
+    """リクエストボディ(NDJSON/CSV)を逐次読み込み、会員IDを1件ずつ返す"""
+    csv_mode = "csv" in request.headers.get("content-type", "")
+    buffer = b""
+    line_number = 0
+    async for chunk in request.stream():
+        buffer += chunk
+        lines = buffer.split(b"\n")
+        buffer = lines.pop()
+        for raw in lines:
+            line_number += 1
+            line = raw.decode("utf-8").strip()
+            if line:
+                member_id = _parse_member_id(line, csv_mode, line_number)
+                if member_id is not None:
+                    yield member_id
+    line = buffer.decode("utf-8").strip()
+    if line:
+        member_id = _parse_member_id(line, csv_mode, line_number + 1)
+        if member_id is not None:
+            yield member_id
+
+def _insert_agreement_chunk(db: Session, terms_id: int, member_ids: List[str]):
+    """チャンクを1トランザクションで一括登録し、(登録件数, 読み飛ばした件数) を返す
+
+    既存の同意（並行して登録されたものを含む）は一意制約で読み飛ばし、
+    実際に登録された行だけを RETURNING で数える。
+    """
+    rows = [{"terms_id": terms_id, "member_id": member_id} for member_id in dict.fromkeys(member_ids)]
+    statement = insert(models.TermsAgreement)\
+        .on_conflict_do_nothing(index_elements=["terms_id", "member_id"])\
+        .returning(models.TermsAgreement.id)
+    inserted = len(db.execute(statement, rows).all())
+    db.commit()
+    return inserted, len(member_ids) - inserted
+
 @router.post("/", response_model=schemas.TermsOfService, status_code=status.HTTP_201_CREATED)
 def create_terms(
     terms: schemas.TermsOfServiceCreate,
@@ -18,73 +99,160 @@ def create_terms(
 ):
     db_terms = models.TermsOfService(
         version=terms.version,
-        content=terms.content,
-        effective_date=terms.effective_date
+        effective_date=terms.effective_date,
+        **encode_terms_content(db, terms.content)
     )
     db.add(db_terms)
     db.commit()
     db.refresh(db_terms)
-    return db_terms
+    created = terms_schema(db_terms, terms.content)
+    latest_terms_cache.update(created)
+    # 配信用の応答を作成時に圧縮しておく
+    terms_response_cache.put(created)
+    return created
 
-@router.get("/", response_model=List[schemas.TermsOfService])
+@router.get("/", response_model=List[Union[schemas.TermsOfService, schemas.TermsOfServiceSummary]])
 def list_terms(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    include_content: bool = False,
     db: Session = Depends(get_db)
 ):
-    terms = db.query(models.TermsOfService).offset(skip).limit(limit).all()
-    return terms
+    """利用規約の一覧（本文は include_content=true のときだけ含める）"""
+    query = paginate(db.query(models.TermsOfService), models.TermsOfService.id, skip, limit, cursor)
+    # 本文の有無で表現が異なるので ETag も分ける
+    variant = "content" if include_content else ""
+    not_modified = page_not_modified(request, query, models.TermsOfService, variant)
+    if not_modified is not None:
+        return not_modified
+    if include_content:
+        terms = terms_with_content(db, query.options(undefer(models.TermsOfService.content_data)).all())
+        set_next_cursor(response, terms, limit)
+        set_page_validators(response, models.TermsOfService, terms, variant)
+        return terms
+    terms = load_page(query, models.TermsOfService, schemas.TermsOfServiceSummary)
+    set_next_cursor(response, terms, limit)
+    set_page_validators(response, models.TermsOfService, terms)
+    return list_response(terms, models.TermsOfService, schemas.TermsOfServiceSummary, response)
 
 @router.get("/latest", response_model=schemas.TermsOfService)
-def get_latest_terms(db: Session = Depends(get_db)):
-    terms = db.query(models.TermsOfService)\
-        .order_by(models.TermsOfService.effective_date.desc())\
-        .first()
+def get_latest_terms(request: Request, db: Session = Depends(get_db)):
+    terms = latest_terms_cache.get(db)
     if terms is None:
         raise HTTPException(status_code=404, detail="No terms of service found")
-    return terms
+    # 応答はキャッシュ済みの利用規約から組み立てるので、DBアクセスは不要
+    encoded = terms_response_cache.get_or_build(terms.id, terms.created_at, lambda: terms)
+    return terms_response(request, encoded, LATEST_TERMS_MAX_AGE_SECONDS)
 
-@router.get("/{terms_id}", response_model=schemas.TermsOfService)
-def get_terms(terms_id: int, db: Session = Depends(get_db)):
-    terms = db.query(models.TermsOfService).filter(models.TermsOfService.id == terms_id).first()
-    if terms is None:
-        raise HTTPException(status_code=404, detail="Terms of service not found")
-    return terms
+@router.get("/latest/cache-stats")
+def get_latest_terms_cache_stats():
+    return latest_terms_cache.stats()
 
-@router.post("/{terms_id}/agreements", status_code=status.HTTP_201_CREATED)
-def record_agreement(
+@router.get("/{terms_id}", response_model=schemas.TermsOfService)
+def get_terms(
     terms_id: int,
-    member_id: str,
+    request: Request,
     db: Session = Depends(get_db)
 ):
+    # 版は作成後に変更されないので、id と作成日時だけを読んで事前圧縮済みの応答を返す
+    terms = db.query(models.TermsOfService.id, models.TermsOfService.created_at)\
+        .filter(models.TermsOfService.id == terms_id)\
+        .first()
+    if terms is None:
+        raise HTTPException(status_code=404, detail="Terms of service not found")
+    encoded = cached_terms(db, terms.id, terms.created_at)
+    return terms_response(request, encoded, TERMS_MAX_AGE_SECONDS, immutable=True)
+
+@router.get("/{terms_id}/diff", response_model=schemas.TermsDiff)
+def get_terms_diff(terms_id: int, base_id: Optional[int] = None, db: Session = Depends(get_db)):
+    """base_id の版（省略時は1つ前の版）から terms_id の版への本文の変更箇所（文の単位）"""
+    return terms_diff(db, terms_id, base_id)
+
+def _record_agreement(db: Session, terms_id: int, member_id: str) -> dict:
     # 利用規約の存在確認
     terms = db.query(models.TermsOfService).filter(models.TermsOfService.id == terms_id).first()
     if terms is None:
         raise HTTPException(status_code=404, detail="Terms of service not found")
     
-    # 既存の同意確認
-    existing_agreement = db.query(models.TermsAgreement)\
-        .filter(
-            models.TermsAgreement.terms_id == terms_id,
-            models.TermsAgreement.member_id == member_id
-        ).first()
-    
-    if existing_agreement:
-        raise HTTPException(
-            status_code=400,
-            detail="Member has already agreed to these terms"
-        )
-    
-    # 新規同意の記録
+    # 新規同意の記録（重複は (terms_id, member_id) の一意制約で検出する）
     agreement = models.TermsAgreement(
         terms_id=terms_id,
         member_id=member_id
     )
     db.add(agreement)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(
+            status_code=400,
+            detail="Member has already agreed to these terms"
+        )
     
     return {"status": "success", "message": "Agreement recorded"}
 
+@router.post("/{terms_id}/agreements", status_code=status.HTTP_201_CREATED)
+async def record_agreement(
+    terms_id: int,
+    member_id: str,
+    db: Session = Depends(get_db)
+):
+    # 同時に届いた同意登録は1トランザクションにまとめてコミットする
+    if settings.agreement_group_commit:
+        return await record_agreement_coalesced(terms_id, member_id)
+    return await run_in_threadpool(_record_agreement, db, terms_id, member_id)
+
+@router.post("/{terms_id}/agreements/bulk")
+async def record_agreements_bulk(
+    terms_id: int,
+    request: Request,
+    db: Session = Depends(get_db)
+):
+    """NDJSON（1行1会員ID）またはCSV（1列目が会員ID）のボディから同意を一括登録する
+
+    ボディは逐次読み込み、BULK_AGREEMENT_CHUNK_SIZE 件ごとにコミットする。
+    途中で不正な行があった場合、それ以前のチャンクは登録済みのまま400を返す。
+    """
+    # 利用規約の存在確認
+    terms = await run_in_threadpool(
+        db.get, models.TermsOfService, terms_id
+    )
+    if terms is None:
+        raise HTTPException(status_code=404, detail="Terms of service not found")
+
+    inserted = skipped = 0
+    chunk = []
+    async for member_id in _iter_member_ids(request):
+        chunk.append(member_id)
+        if len(chunk) >= BULK_AGREEMENT_CHUNK_SIZE:
+            counts = await run_in_threadpool(_insert_agreement_chunk, db, terms_id, chunk)
+            inserted += counts[0]
+            skipped += counts[1]
+            chunk = []
+    if chunk:
+        counts = await run_in_threadpool(_insert_agreement_chunk, db, terms_id, chunk)
+        inserted += counts[0]
+        skipped += counts[1]
+
+    return {"status": "success", "inserted": inserted, "skipped": skipped}
+
+@router.get("/agreements/export")
+def export_agreements(
+    terms_id: int = None,
+    db: Session = Depends(get_db)
+):
+    query = select(models.TermsAgreement)
+    if terms_id:
+        # (terms_id, member_id) の一意インデックス順に読み出し、ソートを避ける
+        query = query.where(models.TermsAgreement.terms_id == terms_id)\
+            .order_by(models.TermsAgreement.member_id)
+    else:
+        query = query.order_by(models.TermsAgreement.id)
+    return ndjson_response(db, query, schemas.TermsAgreement)
+
 @router.get("/agreements/{member_id}", response_model=List[dict])
 def get_member_agreements(member_id: str, db: Session = Depends(get_db)):
     agreements = db.query(models.TermsAgreement)\
@@ -103,9 +271,7 @@ def get_member_agreements(member_id: str, db: Session = Depends(get_db)):
 @router.get("/check-agreement/{member_id}")
 def check_latest_agreement(member_id: str, db: Session = Depends(get_db)):
     # 最新の利用規約を取得
-    latest_terms = db.query(models.TermsOfService)\
-        .order_by(models.TermsOfService.effective_date.desc())\
-        .first()
+    latest_terms = latest_terms_cache.get(db)
     
     if not latest_terms:
         raise HTTPException(status_code=404, detail="No terms of service found")
@@ -123,3 +289,45 @@ def check_latest_agreement(member_id: str, db: Session = Depends(get_db)):
         "latest_terms_id": latest_terms.id,
         "agreement_date": agreement.agreed_at if agreement else None
     }
+
+def _iter_agreement_checks(
+    db: Session,
+    latest_terms: schemas.TermsOfService,
+    member_ids: List[str]
+) -> Iterator[bytes]:
+    for start in range(0, len(member_ids), BATCH_CHECK_CHUNK_SIZE):
+        chunk = member_ids[start:start + BATCH_CHECK_CHUNK_SIZE]
+        agreed = dict(db.execute(
+            select(models.TermsAgreement.member_id, models.TermsAgreement.agreed_at).where(
+                models.TermsAgreement.terms_id == latest_terms.id,
+                models.TermsAgreement.member_id.in_(set(chunk))
+            )
+        ).all())
+        lines = []
+        for member_id in chunk:
+            agreed_at = agreed.get(member_id)
+            lines.append(json.dumps({
+                "member_id": member_id,
+                "has_agreed": agreed_at is not None,
+                "latest_terms_version": latest_terms.version,
+                "latest_terms_id": latest_terms.id,
+                "agreement_date": agreed_at.isoformat() if agreed_at else None
+            }, ensure_ascii=False))
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+@router.post("/check-agreement/batch")
+def check_latest_agreement_batch(
+    check: schemas.AgreementBatchCheckRequest,
+    db: Session = Depends(get_db)
+):
+    """複数会員の最新利用規約への同意状況をNDJSONで返す（入力順、1行1会員）"""
+    # 最新の利用規約は一度だけ取得する
+    latest_terms = latest_terms_cache.get(db)
+
+    if not latest_terms:
+        raise HTTPException(status_code=404, detail="No terms of service found")
+
+    return StreamingResponse(
+        _iter_agreement_checks(db, latest_terms, check.member_ids),
+        media_type="application/x-ndjson"
+    )
@@ -32,6 +32,9 @@ class Initiative(InitiativeBase):
 class InitiativeStatusUpdate(BaseModel):
     status: InitiativeStatus
 
+class InitiativeBulkStatusUpdate(InitiativeStatusUpdate):
+    ids: List[int] = Field(min_length=1, max_length=1000)
+
 # Initiative Assessment Schemas
 class InitiativeAssessmentBase(BaseModel):
     initiative_id: int
@@ -65,6 +68,42 @@ class TermsOfService(TermsOfServiceBase):
     class Config:
         from_attributes = True
 
+# 一覧の既定の表現（本文を含まない）
+class TermsOfServiceSummary(BaseModel):
+    id: int
+    version: str
+    effective_date: datetime
+    created_at: datetime
+    content_length: int
+
+    class Config:
+        from_attributes = True
+
+class TermsChange(BaseModel):
+    base_offset: int
+    offset: int
+    removed: str
+    added: str
+
+class TermsDiff(BaseModel):
+    terms_id: int
+    version: str
+    base_id: int
+    base_version: str
+    changes: List[TermsChange]
+
+class TermsAgreement(BaseModel):
+    id: int
+    terms_id: int
+    member_id: str
+    agreed_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class AgreementBatchCheckRequest(BaseModel):
+    member_ids: List[str]
+
 # Requirement Schemas
 class RequirementStatus(str, Enum):
     DRAFT = "DRAFT"
@@ -93,6 +132,9 @@ class Requirement(RequirementBase):
 class RequirementStatusUpdate(BaseModel):
     status: RequirementStatus
 
+class RequirementBulkStatusUpdate(RequirementStatusUpdate):
+    ids: List[int] = Field(min_length=1, max_length=1000)
+
 # Development Task Schemas
 class DevelopmentTaskBase(BaseModel):
     requirement_id: int
@@ -111,6 +153,35 @@ class DevelopmentTask(DevelopmentTaskBase):
     class Config:
         from_attributes = True
 
+# Bulk Create Schemas
+class BulkCreateItemResult(BaseModel):
+    index: int
+    id: Optional[int] = None
+    error: Optional[str] = None
+
+class BulkCreateResult(BaseModel):
+    created: int
+    failed: int
+    # 入力順
+    results: List[BulkCreateItemResult]
+
+# Bulk Status Transition Schemas
+class BulkTransitionOutcome(str, Enum):
+    UPDATED = "updated"
+    NOT_FOUND = "not_found"
+    INVALID_TRANSITION = "invalid_transition"
+
+class BulkTransitionItemResult(BaseModel):
+    id: int
+    outcome: BulkTransitionOutcome
+    error: Optional[str] = None
+
+class BulkTransitionResult(BaseModel):
+    updated: int
+    failed: int
+    # 入力順（重複したIDは1件にまとめる）
+    results: List[BulkTransitionItemResult]
+
 # Release Schemas
 class ReleaseStatus(str, Enum):
     PLANNED = "PLANNED"
@@ -140,6 +211,12 @@ class Release(ReleaseBase):
 class ReleaseStatusUpdate(BaseModel):
     status: ReleaseStatus
 
+class ReleaseBulkStatusUpdate(ReleaseStatusUpdate):
+    ids: List[int] = Field(min_length=1, max_length=1000)
+
+class ReleaseBulkApprove(BaseModel):
+    ids: List[int] = Field(min_length=1, max_length=1000)
+
 # Release Rollback Schemas
 class ReleaseRollbackBase(BaseModel):
     release_id: int
@@ -171,3 +248,133 @@ class InitiativeEffect(InitiativeEffectBase):
 
     class Config:
         from_attributes = True
+
+# Initiative Dossier Schemas
+class RequirementDossier(Requirement):
+    development_tasks: List[DevelopmentTask] = []
+
+class InitiativeDossier(Initiative):
+    assessments: List[InitiativeAssessment] = []
+    effects: List[InitiativeEffect] = []
+    requirements: List[RequirementDossier] = []
+
+# Portfolio Analytics Schemas
+class InitiativeRanking(BaseModel):
+    id: int
+    irr: float
+    cost: Optional[float]
+    status: Optional[InitiativeStatus]
+
+class CostHistogram(BaseModel):
+    edges: List[float]
+    counts: List[int]
+
+class StatusAggregate(BaseModel):
+    status: InitiativeStatus
+    count: int
+    total_cost: float
+    mean_irr: Optional[float]
+    cost_weighted_irr: Optional[float]
+
+class PortfolioAnalytics(BaseModel):
+    count: int
+    total_cost: float
+    cost_weighted_irr: Optional[float]
+    top_by_irr: List[InitiativeRanking]
+    cost_histogram: CostHistogram
+    by_status: List[StatusAggregate]
+
+# Portfolio Optimization Schemas
+class OptimizationMethod(str, Enum):
+    AUTO = "auto"
+    EXACT = "exact"
+    GREEDY = "greedy"
+
+class PortfolioOptimizationRequest(BaseModel):
+    budget: float = Field(gt=0)
+    statuses: List[InitiativeStatus] = [InitiativeStatus.PROPOSED, InitiativeStatus.UNDER_REVIEW]
+    require_compliance: bool = False
+    method: OptimizationMethod = OptimizationMethod.AUTO
+    resolution: int = Field(default=10000, ge=10, le=100000)
+
+class PortfolioOptimization(BaseModel):
+    method: OptimizationMethod
+    budget: float
+    candidate_count: int
+    selected_ids: List[int]
+    total_cost: float
+    total_value: float
+    upper_bound: float
+
+# Effect Time Series Schemas
+class TimeSeriesStep(str, Enum):
+    HOUR = "hour"
+    DAY = "day"
+    MONTH = "month"
+
+class EffectTimeSeriesPoint(BaseModel):
+    bucket_start: datetime
+    count: int
+    sum: float
+    min: float
+    max: float
+    mean: float
+    last_value: float
+
+class EffectTimeSeries(BaseModel):
+    initiative_id: int
+    metric_name: str
+    step: TimeSeriesStep
+    source: str
+    points: List[EffectTimeSeriesPoint]
+
+# Effect Quantile Schemas
+class EffectQuantile(BaseModel):
+    q: float
+    value: Optional[float]
+
+class EffectQuantiles(BaseModel):
+    metric_name: str
+    count: int
+    source: str
+    rank_error: float
+    quantiles: List[EffectQuantile]
+
+# Effect Ingestion Schemas
+class IngestDurability(str, Enum):
+    # バッファに入った時点で応答する（プロセスが異常終了すると未コミット分は失われる）
+    BUFFER = "buffer"
+    # バッチのコミットを待って応答する
+    COMMIT = "commit"
+
+class EffectIngestAck(BaseModel):
+    first_sequence: int
+    last_sequence: int
+    count: int
+    durability: IngestDurability
+    committed: bool
+    # 施策が存在せず反映されなかった要素の位置（コミットを待った場合のみ）
+    rejected: List[int] = []
+
+class EffectIngestStatus(BaseModel):
+    last_sequence: int
+    committed_sequence: int
+    pending: int
+    batches: int
+    rows: int
+    failed_batches: int
+
+# Full-text Search Schemas
+class SearchType(str, Enum):
+    INITIATIVE = "initiative"
+    REQUIREMENT = "requirement"
+    TASK = "task"
+
+class SearchHit(BaseModel):
+    type: SearchType
+    id: int
+    title: str
+    # 一致箇所を <mark> で囲んだ抜粋（索引で検索できる語がない場合は None）
+    snippet: Optional[str] = None
+    # 大きいほど関連が強い（bm25）
+    score: float
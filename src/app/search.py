@@ -0,0 +1,136 @@
+"""施策・要件・開発タスクのタイトルと説明の全文検索（SQLite FTS5）
+
+各テーブルに外部コンテンツ型の FTS5 仮想テーブル（<テーブル名>_fts）を作り、
+本文は元のテーブルから読む。索引は INSERT / DELETE とタイトル・説明の UPDATE の
+トリガーで同期するので、ORM・Core・一括更新のどの経路で書き込んでも検索結果に反映される。
+
+日本語は単語の区切りがないため trigram トークナイザーで3文字単位に索引する。
+3文字以上の語は索引で絞り込み、bm25（タイトルを重く評価）の順に返す。
+2文字以下の語は索引を使えないので LIKE の部分一致で絞り込む（語がすべて短い場合は全件走査になる）。
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+from fastapi import HTTPException
+from sqlalchemy import event, text
+from sqlalchemy.engine import Connection
+
+# 検索対象の種類 -> テーブル名
+SEARCH_TABLES: Dict[str, str] = {
+    "initiative": "initiatives",
+    "requirement": "requirements",
+    "task": "development_tasks",
+}
+# bm25 の列ごとの重み（タイトル, 説明）
+TITLE_WEIGHT = 5.0
+DESCRIPTION_WEIGHT = 1.0
+# 索引で検索できる語の最小文字数（trigram）
+MIN_INDEXED_TERM_LENGTH = 3
+SNIPPET_TOKENS = 16
+
+def search_index_statements(table: str) -> List[str]:
+    """table の検索索引（仮想テーブルと同期トリガー）を作成するSQL"""
+    fts = f"{table}_fts"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"title, description, content='{table}', content_rowid='id', tokenize='trigram')",
+        # ORDER BY rank で重み付きの bm25 順に返す（ソートは FTS5 の中で行われる）
+        f"INSERT INTO {fts}({fts}, rank) VALUES ('rank', 'bm25({TITLE_WEIGHT}, {DESCRIPTION_WEIGHT})')",
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table} BEGIN
+            INSERT INTO {fts}(rowid, title, description) VALUES (new.id, new.title, new.description);
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table} BEGIN
+            INSERT INTO {fts}({fts}, rowid, title, description)
+            VALUES ('delete', old.id, old.title, old.description);
+        END
+        """,
+        # ステータスだけの更新では索引を書き換えない
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE OF title, description ON {table} BEGIN
+            INSERT INTO {fts}({fts}, rowid, title, description)
+            VALUES ('delete', old.id, old.title, old.description);
+            INSERT INTO {fts}(rowid, title, description) VALUES (new.id, new.title, new.description);
+        END
+        """,
+    ]
+
+def create_search_index(conn: Connection, table: str, rebuild: bool = False) -> None:
+    for statement in search_index_statements(table):
+        conn.execute(text(statement))
+    if rebuild:
+        # 既存の行から索引を作り直す
+        conn.execute(text(f"INSERT INTO {table}_fts({table}_fts) VALUES ('rebuild')"))
+
+def create_search_indexes(conn: Connection) -> None:
+    """既存のデータベースに検索索引を作成し、既存の行を索引する（移行用）"""
+    for table in SEARCH_TABLES.values():
+        create_search_index(conn, table, rebuild=True)
+
+def register_search_index(table) -> None:
+    """create_all でテーブルを作成したときに検索索引も作成し、drop_all では先に削除する"""
+    @event.listens_for(table, "after_create")
+    def _create(target, connection, **kw):
+        create_search_index(connection, target.name)
+
+    @event.listens_for(table, "before_drop")
+    def _drop(target, connection, **kw):
+        connection.execute(text(f"DROP TABLE IF EXISTS {target.name}_fts"))
+
+def _split_terms(q: str) -> Tuple[List[str], List[str]]:
+    """空白区切りの語を、索引で検索できる語とそれより短い語に分ける"""
+    terms = list(dict.fromkeys(q.split()))
+    indexed = [term for term in terms if len(term) >= MIN_INDEXED_TERM_LENGTH]
+    short = [term for term in terms if len(term) < MIN_INDEXED_TERM_LENGTH]
+    return indexed, short
+
+def _match_expression(terms: Sequence[str]) -> str:
+    # 語ごとに FTS5 の文字列として引用し、すべてを含む行（AND）に一致させる
+    return " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+def _like_pattern(term: str) -> str:
+    return "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+def search_statement(q: str, kinds: Optional[Sequence[str]], skip: int, limit: int):
+    """検索のSQLを組み立てる
+
+    種類ごとの検索を UNION ALL でつなぎ、FTS5 が rank（bm25）順に返す結果を
+    マージして関連の強い順にする。結果の列は (kind, id, title, snippet, rank)。
+    索引で検索できる語がない場合は rank を 0 とし、ID順に返す。kinds が空ならすべての種類を検索する。
+    """
+    indexed, short = _split_terms(q)
+    if not indexed and not short:
+        raise HTTPException(status_code=400, detail="Search query is empty")
+    kinds = list(dict.fromkeys(kinds)) if kinds else list(SEARCH_TABLES)
+    params = {"skip": skip, "limit": limit}
+    if indexed:
+        params["match"] = _match_expression(indexed)
+    for number, term in enumerate(short):
+        params[f"like_{number}"] = _like_pattern(term)
+
+    selects = []
+    for kind in kinds:
+        fts = f"{SEARCH_TABLES[kind]}_fts"
+        conditions = [
+            f"(title LIKE :like_{number} ESCAPE '\\' OR description LIKE :like_{number} ESCAPE '\\')"
+            for number in range(len(short))
+        ]
+        if indexed:
+            conditions.insert(0, f"{fts} MATCH :match")
+            columns = f"snippet({fts}, -1, '<mark>', '</mark>', '…', {SNIPPET_TOKENS}) AS snippet, rank"
+        else:
+            columns = "NULL AS snippet, 0.0 AS rank"
+        selects.append(
+            f"SELECT '{kind}' AS kind, rowid AS id, title, {columns} FROM {fts} WHERE {' AND '.join(conditions)}"
+        )
+    order = "rank" if indexed else "id"
+    return text(
+        " UNION ALL ".join(selects) + f" ORDER BY {order} LIMIT :limit OFFSET :skip"
+    ).bindparams(**params)
+
+def search_hits(rows) -> List[dict]:
+    """検索結果の行を応答の形にする（score は bm25 の符号を反転し、大きいほど関連が強い）"""
+    return [
+        {"type": kind, "id": id_, "title": title, "snippet": snippet, "score": -rank if rank else 0.0}
+        for kind, id_, title, snippet, rank in rows
+    ]
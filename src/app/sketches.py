@@ -0,0 +1,271 @@
+"""効果測定値の分位点スケッチ（KLL）
+
+metric_name・時間バケットごとに KLL スケッチを保持し、効果測定の記録時に更新する。
+スケッチ同士はマージでき、任意の期間の分位点を保存済みのスケッチだけから近似できる。
+"""
+import math
+import random
+import struct
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
+import numpy as np
+from sqlalchemy import select, union_all
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from .models import models
+from .rollups import GRANULARITIES, describe_ranges, split_range, truncate
+
+# 精度パラメータ。大きいほど誤差が小さく、スケッチが大きくなる
+DEFAULT_K = 200
+# 上位のレベルほど容量を c 倍ずつ大きくする
+_CAPACITY_RATIO = 2 / 3
+_MIN_CAPACITY = 8
+_SERIAL_VERSION = 1
+_HEADER = struct.Struct("<BHQddB")
+
+_rng = random.Random()
+
+def weighted_quantiles(values: np.ndarray, weights: np.ndarray, qs: Iterable[float], low: float, high: float) -> List[float]:
+    """累積の重みが q を初めて超える値（q=0 は最小値、q=1 は最大値）"""
+    order = np.argsort(values, kind="stable")
+    values, cumulative = values[order], np.cumsum(weights[order])
+    results = []
+    for q in qs:
+        if q <= 0:
+            results.append(low)
+        elif q >= 1:
+            results.append(high)
+        else:
+            index = int(np.searchsorted(cumulative, q * cumulative[-1], side="left"))
+            results.append(float(values[min(index, len(values) - 1)]))
+    return results
+
+def normalized_rank_error(k: int) -> float:
+    """単一の分位点の問い合わせに対する順位誤差（全体に対する割合、99%信頼）の近似値"""
+    return 2.296 / k ** 0.9723
+
+class KllSketch:
+    """KLL 分位点スケッチ
+
+    レベル h の要素は 2^h 件分の重みを持つ。レベルが容量を超えるとソートして1つおきに
+    上のレベルへ昇格させ（compaction）、全体の要素数を O(k) に保つ。
+    """
+
+    def __init__(self, k: int = DEFAULT_K):
+        self.k = k
+        self.n = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self.levels: List[List[float]] = [[]]
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(_MIN_CAPACITY, math.ceil(self.k * _CAPACITY_RATIO ** depth))
+
+    def _size(self) -> int:
+        return sum(len(items) for items in self.levels)
+
+    def _max_size(self) -> int:
+        return sum(self._capacity(level) for level in range(len(self.levels)))
+
+    def _compress(self) -> None:
+        while self._size() > self._max_size():
+            for level, items in enumerate(self.levels):
+                if len(items) < self._capacity(level):
+                    continue
+                if level + 1 == len(self.levels):
+                    self.levels.append([])
+                items.sort()
+                # 奇数件のときは1件をこのレベルに残す
+                leftover = [items.pop()] if len(items) % 2 else []
+                self.levels[level + 1].extend(items[_rng.getrandbits(1)::2])
+                self.levels[level] = leftover
+                break
+
+    def update(self, value: float) -> None:
+        self.levels[0].append(value)
+        self.n += 1
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if len(self.levels[0]) >= self._capacity(0):
+            self._compress()
+
+    def merge(self, other: "KllSketch") -> None:
+        while len(self.levels) < len(other.levels):
+            self.levels.append([])
+        for level, items in enumerate(other.levels):
+            self.levels[level].extend(items)
+        self.n += other.n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+
+    def quantiles(self, qs: Iterable[float]) -> List[Optional[float]]:
+        if self.n == 0:
+            return [None for _ in qs]
+        values = np.concatenate([np.asarray(items, dtype=np.float64) for items in self.levels])
+        weights = np.concatenate([np.full(len(items), 2 ** level) for level, items in enumerate(self.levels)])
+        return weighted_quantiles(values, weights, qs, self.min, self.max)
+
+    def rank_error(self) -> float:
+        # 圧縮が一度も起きていなければ全件を保持しているので厳密
+        return 0.0 if len(self.levels) == 1 else normalized_rank_error(self.k)
+
+    def to_bytes(self) -> bytes:
+        """ヘッダー・各レベルの件数・要素（float64）を詰めた形式にする"""
+        sizes = [len(items) for items in self.levels]
+        items = [value for level in self.levels for value in level]
+        return b"".join([
+            _HEADER.pack(_SERIAL_VERSION, self.k, self.n, self.min, self.max, len(self.levels)),
+            struct.pack(f"<{len(sizes)}I", *sizes),
+            struct.pack(f"<{len(items)}d", *items),
+        ])
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "KllSketch":
+        version, k, n, low, high, level_count = _HEADER.unpack_from(data)
+        if version != _SERIAL_VERSION:
+            raise ValueError(f"Unsupported sketch version: {version}")
+        offset = _HEADER.size
+        sizes = struct.unpack_from(f"<{level_count}I", data, offset)
+        offset += 4 * level_count
+        items = struct.unpack_from(f"<{sum(sizes)}d", data, offset)
+        sketch = cls(k)
+        sketch.n, sketch.min, sketch.max = n, low, high
+        sketch.levels = []
+        for size in sizes:
+            sketch.levels.append(list(items[:size]))
+            items = items[size:]
+        return sketch
+
+def _bucket_keys(effect) -> List[Tuple[str, str, datetime]]:
+    return [
+        (effect.metric_name, granularity, truncate(effect.measurement_date, granularity))
+        for granularity in GRANULARITIES
+    ]
+
+def apply_effect_sketches(db: Session, effects: Iterable) -> None:
+    """効果測定（metric_name・metric_value・measurement_date を持つ行）を分位点スケッチに反映する
+
+    対象のスケッチをまとめて読み、更新して1回の UPSERT で書き戻す。効果測定の INSERT で
+    書き込みロックを取った後に呼ぶことで、同時の記録による更新の取りこぼしを防ぐ。
+    コミットは呼び出し側で行う。
+    """
+    grouped = {}
+    for effect in effects:
+        for key in _bucket_keys(effect):
+            grouped.setdefault(key, []).append(effect.metric_value)
+    if not grouped:
+        return
+
+    table = models.InitiativeEffectSketch.__table__
+    key_columns = (table.c.metric_name, table.c.granularity, table.c.bucket_start)
+    # 各列の IN で主キーを引き、組み合わせとして余分に取れた行は読み捨てる
+    existing = {
+        (metric_name, granularity, bucket_start): data
+        for metric_name, granularity, bucket_start, data in db.execute(
+            select(*key_columns, table.c.sketch).where(*(
+                column.in_({key[i] for key in grouped}) for i, column in enumerate(key_columns)
+            ))
+        )
+    }
+
+    rows = []
+    for key, values in grouped.items():
+        sketch = KllSketch.from_bytes(existing[key]) if key in existing else KllSketch()
+        for value in values:
+            sketch.update(value)
+        rows.append({
+            "metric_name": key[0], "granularity": key[1], "bucket_start": key[2],
+            "count": sketch.n, "sketch": sketch.to_bytes(),
+        })
+
+    statement = insert(table)
+    statement = statement.on_conflict_do_update(
+        index_elements=list(key_columns),
+        set_={"count": statement.excluded.count, "sketch": statement.excluded.sketch}
+    )
+    db.execute(statement, rows)
+
+def rebuild_effect_sketches(conn: Connection) -> None:
+    """生の効果測定から分位点スケッチを全件作り直す（既存データへの移行やベンチマークのデータ投入用）"""
+    effect = models.InitiativeEffect.__table__
+    sketches = {}
+    result = conn.execute(
+        select(effect.c.metric_name, effect.c.metric_value, effect.c.measurement_date)
+        .where(effect.c.metric_value.is_not(None), effect.c.measurement_date.is_not(None))
+    )
+    for row in result:
+        for key in _bucket_keys(row):
+            sketch = sketches.get(key)
+            if sketch is None:
+                sketch = sketches[key] = KllSketch()
+            sketch.update(row.metric_value)
+
+    table = models.InitiativeEffectSketch.__table__
+    conn.execute(table.delete())
+    if sketches:
+        conn.execute(table.insert(), [
+            {"metric_name": key[0], "granularity": key[1], "bucket_start": key[2],
+             "count": sketch.n, "sketch": sketch.to_bytes()}
+            for key, sketch in sketches.items()
+        ])
+
+def query_effect_quantiles(
+    db: Session,
+    metric_name: str,
+    start: datetime,
+    end: datetime,
+    qs: List[float]
+) -> dict:
+    """[start, end) の効果測定値の分位点を返す
+
+    範囲を split_range で区間に分け、バケット境界に揃う区間のスケッチをマージし、1時間に満たない両端の
+    生の値をマージ後のスケッチに加えて近似する。範囲全体が1時間に満たない場合は生の値から厳密に計算する。
+    """
+    ranges = split_range(start, end, GRANULARITIES[-1])
+    effect = models.InitiativeEffect
+    raw_statements = [
+        select(effect.metric_value).where(
+            effect.metric_name == metric_name,
+            effect.measurement_date >= low,
+            effect.measurement_date < high
+        )
+        for granularity, low, high in ranges if granularity is None
+    ]
+    values = []
+    if raw_statements:
+        statement = raw_statements[0] if len(raw_statements) == 1 else union_all(*raw_statements)
+        values = db.execute(statement).scalars().all()
+
+    if len(ranges) == 1 and ranges[0][0] is None:
+        values = np.array(values, dtype=np.float64)
+        if len(values):
+            quantiles = weighted_quantiles(values, np.ones(len(values)), qs, float(values.min()), float(values.max()))
+        else:
+            quantiles = [None for _ in qs]
+        return {"source": "raw", "count": len(values), "rank_error": 0.0, "values": quantiles}
+
+    table = models.InitiativeEffectSketch.__table__
+    statements = [
+        select(table.c.sketch).where(
+            table.c.metric_name == metric_name,
+            table.c.granularity == granularity,
+            table.c.bucket_start >= low,
+            table.c.bucket_start < high
+        )
+        for granularity, low, high in ranges if granularity is not None
+    ]
+    statement = statements[0] if len(statements) == 1 else union_all(*statements)
+    merged = KllSketch()
+    for (data,) in db.execute(statement):
+        merged.merge(KllSketch.from_bytes(data))
+    for value in values:
+        merged.update(value)
+    return {
+        "source": describe_ranges(ranges),
+        "count": merged.n,
+        "rank_error": merged.rank_error(),
+        "values": merged.quantiles(qs),
+    }
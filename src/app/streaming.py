@@ -0,0 +1,28 @@
+from typing import Iterator, Type
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+# サーバー側で一度に読み込む行数
+EXPORT_BATCH_SIZE = 1000
+
+def iter_ndjson(db: Session, statement, schema: Type[BaseModel]) -> Iterator[bytes]:
+    """ORMの行を EXPORT_BATCH_SIZE 件ずつ読み込み、NDJSONのバイト列として返す"""
+    result = db.execute(
+        statement.execution_options(yield_per=EXPORT_BATCH_SIZE, stream_results=True)
+    )
+    try:
+        for partition in result.scalars().partitions():
+            lines = []
+            for obj in partition:
+                lines.append(schema.model_validate(obj).model_dump_json())
+                # 読み込み済みのオブジェクトを識別マップに溜めない
+                db.expunge(obj)
+            yield ("\n".join(lines) + "\n").encode("utf-8")
+    finally:
+        # クライアントが途中で切断した場合もカーソルを解放する
+        result.close()
+
+def ndjson_response(db: Session, statement, schema: Type[BaseModel]) -> StreamingResponse:
+    return StreamingResponse(iter_ndjson(db, statement, schema), media_type=NDJSON_MEDIA_TYPE)
@@ -0,0 +1,88 @@
+import threading
+import time
+from typing import Optional
+from sqlalchemy.orm import Session, undefer
+from .models import models
+from .schemas import schemas
+from .terms_content import terms_with_content
+
+# 他プロセスでの create_terms を取り込むための再読込間隔（秒）
+LATEST_TERMS_CACHE_TTL_SECONDS = 60.0
+
+def query_latest_terms(db: Session) -> Optional[models.TermsOfService]:
+    return db.query(models.TermsOfService)\
+        .options(undefer(models.TermsOfService.content_data))\
+        .order_by(models.TermsOfService.effective_date.desc(), models.TermsOfService.id.desc())\
+        .first()
+
+class LatestTermsCache:
+    """最新の利用規約をプロセス内にキャッシュする
+
+    create_terms からの書き込み時に更新し、それ以外は TTL 経過後に再読込する。
+    """
+
+    def __init__(self, ttl_seconds: float = LATEST_TERMS_CACHE_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entry = None  # (schemas.TermsOfService または None, 読込時刻)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, db: Session) -> Optional[schemas.TermsOfService]:
+        entry = self._entry
+        if entry is not None and time.monotonic() - entry[1] < self.ttl_seconds:
+            with self._lock:
+                self.hits += 1
+            return entry[0]
+
+        with self._lock:
+            self.misses += 1
+        row = query_latest_terms(db)
+        terms = terms_with_content(db, [row])[0] if row is not None else None
+        self._entry = (terms, time.monotonic())
+        return terms
+
+    def update(self, terms: schemas.TermsOfService) -> None:
+        """新しく作成された利用規約をキャッシュに反映する（write-through）"""
+        with self._lock:
+            entry = self._entry
+            if entry is None:
+                return
+            current = entry[0]
+            if current is None or (terms.effective_date, terms.id) >= (current.effective_date, current.id):
+                self._entry = (terms, time.monotonic())
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._entry = None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entry = None
+            self.hits = 0
+            self.misses = 0
+
+    def render_metrics(self) -> list:
+        """Prometheus テキスト形式のヒット・ミス数"""
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        return [
+            "# HELP latest_terms_cache_hits_total Latest terms cache hits.",
+            "# TYPE latest_terms_cache_hits_total counter",
+            f"latest_terms_cache_hits_total {hits}",
+            "# HELP latest_terms_cache_misses_total Latest terms cache misses.",
+            "# TYPE latest_terms_cache_misses_total counter",
+            f"latest_terms_cache_misses_total {misses}",
+        ]
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / total if total else 0.0,
+                "cached_terms_id": self._entry[0].id if self._entry and self._entry[0] else None
+            }
+
+latest_terms_cache = LatestTermsCache()
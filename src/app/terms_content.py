@@ -0,0 +1,233 @@
+"""利用規約の本文の圧縮保存と版どうしの差分
+
+本文は zlib で圧縮して content_data に保存する（codec "zlib"）。差分符号化（TERMS_DELTA_ENCODING）が
+有効なら、直近のキーフレーム（全文を保存した版）からの差分を圧縮して保存する（codec "delta"、
+基準の版は content_base_id）。差分の基準は常にキーフレームなので、どの版も高々1つの基準の版から
+復元できる。改定が重なって差分が全文の圧縮の DELTA_MAX_RATIO 倍を超えたら、その版を新しいキーフレームにする。
+
+差分符号化と GET /terms/{id}/diff は、本文を文（「。」または改行で終わる区切り）の単位で比較する。
+"""
+import json
+import re
+import zlib
+from difflib import SequenceMatcher
+from itertools import accumulate
+from typing import Dict, List, Optional, Sequence, Tuple
+from fastapi import HTTPException
+from sqlalchemy import inspect, select, text, tuple_, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import undefer
+from .config import settings
+from .models import models
+from .schemas import schemas
+
+CODEC_ZLIB = "zlib"
+CODEC_DELTA = "delta"
+COMPRESSION_LEVEL = 9
+# 差分が全文の圧縮サイズのこの割合を超えたら、差分ではなく全文（新しいキーフレーム）を保存する
+DELTA_MAX_RATIO = 0.2
+
+# 「。」の直後（続く改行は同じ文に含める）と改行の直後で区切る
+_SEGMENT_END = re.compile(r"(?<=。)(?!\n)|(?<=\n)")
+
+def split_segments(content: str) -> List[str]:
+    """本文を文の単位に分ける（区切り文字は前の文に含めるので、連結すると元の本文に戻る）"""
+    return [segment for segment in _SEGMENT_END.split(content) if segment]
+
+def _opcodes(base_segments: List[str], segments: List[str]):
+    return SequenceMatcher(None, base_segments, segments, autojunk=False).get_opcodes()
+
+def _compress(payload: str) -> bytes:
+    return zlib.compress(payload.encode("utf-8"), COMPRESSION_LEVEL)
+
+def _decompress(data: bytes) -> str:
+    return zlib.decompress(data).decode("utf-8")
+
+def encode_delta(base: str, content: str) -> bytes:
+    """base から content を組み立てる命令列を圧縮する
+
+    命令列はJSONの配列で、[開始, 終了] は base の文の範囲のコピー、文字列はそのままの挿入を表す。
+    """
+    base_segments, segments = split_segments(base), split_segments(content)
+    ops = []
+    for tag, i1, i2, j1, j2 in _opcodes(base_segments, segments):
+        if tag == "equal":
+            ops.append([i1, i2])
+        elif tag != "delete":
+            ops.append("".join(segments[j1:j2]))
+    return _compress(json.dumps(ops, ensure_ascii=False, separators=(",", ":")))
+
+def decode_delta(base: str, data: bytes) -> str:
+    base_segments = split_segments(base)
+    parts = []
+    for op in json.loads(_decompress(data)):
+        if isinstance(op, str):
+            parts.append(op)
+        else:
+            parts.extend(base_segments[op[0]:op[1]])
+    return "".join(parts)
+
+def encode_content(content: str, keyframe: Optional[Tuple[int, str]] = None) -> dict:
+    """本文を保存する列の値を求める
+
+    keyframe（(id, 本文)）を渡すと、差分の方が十分小さい場合は差分として保存する。
+    """
+    data = _compress(content)
+    values = {
+        "content_codec": CODEC_ZLIB,
+        "content_data": data,
+        "content_base_id": None,
+        "content_length": len(content),
+    }
+    if keyframe is not None:
+        delta = encode_delta(keyframe[1], content)
+        if len(delta) <= len(data) * DELTA_MAX_RATIO:
+            values.update(content_codec=CODEC_DELTA, content_data=delta, content_base_id=keyframe[0])
+    return values
+
+def latest_keyframe(db) -> Optional[Tuple[int, str]]:
+    """最後に作成された版が基準にしているキーフレーム（その版自身がキーフレームならその版）
+
+    db は Session・Connection のどちらでもよい。
+    """
+    table = models.TermsOfService.__table__
+    latest = db.execute(
+        select(table.c.id, table.c.content_codec, table.c.content_data, table.c.content_base_id)
+        .order_by(table.c.id.desc())
+        .limit(1)
+    ).first()
+    if latest is None:
+        return None
+    if latest.content_codec != CODEC_DELTA:
+        return latest.id, _decompress(latest.content_data)
+    data = db.execute(
+        select(table.c.content_data).where(table.c.id == latest.content_base_id)
+    ).scalar_one()
+    return latest.content_base_id, _decompress(data)
+
+def encode_terms_content(db, content: str) -> dict:
+    """新しい版の本文を保存する列の値（設定で有効なら直近のキーフレームからの差分）"""
+    keyframe = latest_keyframe(db) if settings.terms_delta_encoding else None
+    return encode_content(content, keyframe)
+
+def load_contents(db, rows: Sequence) -> Dict[int, str]:
+    """content_data を読み込み済みの rows の本文を復元する（id -> 本文）
+
+    差分で保存された版の基準のうち rows に含まれないものは、まとめて1回のクエリで読む。
+    """
+    stored = {row.id: (row.content_codec, row.content_data) for row in rows}
+    missing = {row.content_base_id for row in rows if row.content_codec == CODEC_DELTA} - stored.keys()
+    if missing:
+        table = models.TermsOfService.__table__
+        stored.update(
+            (id_, (codec, data)) for id_, codec, data in db.execute(
+                select(table.c.id, table.c.content_codec, table.c.content_data).where(table.c.id.in_(missing))
+            )
+        )
+
+    keyframes: Dict[int, str] = {}
+
+    def keyframe(id_: int) -> str:
+        if id_ not in keyframes:
+            keyframes[id_] = _decompress(stored[id_][1])
+        return keyframes[id_]
+
+    contents = {}
+    for row in rows:
+        if row.content_codec == CODEC_DELTA:
+            contents[row.id] = decode_delta(keyframe(row.content_base_id), row.content_data)
+        elif row.content_codec == CODEC_ZLIB:
+            contents[row.id] = keyframe(row.id)
+        else:
+            raise ValueError(f"Unknown terms content codec: {row.content_codec}")
+    return contents
+
+def terms_schema(row, content: str) -> schemas.TermsOfService:
+    return schemas.TermsOfService(
+        id=row.id,
+        version=row.version,
+        content=content,
+        effective_date=row.effective_date,
+        created_at=row.created_at,
+    )
+
+def terms_with_content(db, rows: Sequence) -> List[schemas.TermsOfService]:
+    """content_data を読み込み済みの rows を本文付きの応答の形にする"""
+    contents = load_contents(db, rows)
+    return [terms_schema(row, contents[row.id]) for row in rows]
+
+def diff_contents(base: str, content: str) -> List[dict]:
+    """base から content への変更箇所（文の単位）
+
+    base_offset・offset はそれぞれの本文での変更箇所の開始位置（文字数）。
+    """
+    base_segments, segments = split_segments(base), split_segments(content)
+    base_offsets = list(accumulate(map(len, base_segments), initial=0))
+    offsets = list(accumulate(map(len, segments), initial=0))
+    return [
+        {
+            "base_offset": base_offsets[i1],
+            "offset": offsets[j1],
+            "removed": "".join(base_segments[i1:i2]),
+            "added": "".join(segments[j1:j2]),
+        }
+        for tag, i1, i2, j1, j2 in _opcodes(base_segments, segments)
+        if tag != "equal"
+    ]
+
+def _previous_terms(query, terms):
+    # 最新の版と同じ (effective_date, id) の順で1つ前の版
+    model = models.TermsOfService
+    return query\
+        .filter(tuple_(model.effective_date, model.id) < tuple_(terms.effective_date, terms.id))\
+        .order_by(model.effective_date.desc(), model.id.desc())\
+        .first()
+
+def terms_diff(db, terms_id: int, base_id: Optional[int] = None) -> dict:
+    """base_id の版（省略時は1つ前の版）から terms_id の版への本文の変更箇所"""
+    model = models.TermsOfService
+    query = db.query(model).options(undefer(model.content_data))
+    terms = query.filter(model.id == terms_id).first()
+    if terms is None:
+        raise HTTPException(status_code=404, detail="Terms of service not found")
+    if base_id is None:
+        base = _previous_terms(query, terms)
+        if base is None:
+            raise HTTPException(status_code=404, detail="Previous terms of service not found")
+    else:
+        base = query.filter(model.id == base_id).first()
+        if base is None:
+            raise HTTPException(status_code=404, detail="Base terms of service not found")
+
+    contents = load_contents(db, [terms, base])
+    return {
+        "terms_id": terms.id,
+        "version": terms.version,
+        "base_id": base.id,
+        "base_version": base.version,
+        "changes": diff_contents(contents[base.id], contents[terms.id]),
+    }
+
+def migrate_terms_contents(conn: Connection) -> None:
+    """本文を平文の content 列に持つ既存のデータベースを圧縮保存に移行する（移行用）"""
+    columns = {column["name"] for column in inspect(conn).get_columns("terms_of_service")}
+    if "content" not in columns:
+        return
+    for name, definition in (
+        ("content_codec", "VARCHAR"),
+        ("content_data", "BLOB"),
+        ("content_base_id", "INTEGER REFERENCES terms_of_service (id)"),
+        ("content_length", "INTEGER"),
+    ):
+        if name not in columns:
+            conn.execute(text(f"ALTER TABLE terms_of_service ADD COLUMN {name} {definition}"))
+
+    table = models.TermsOfService.__table__
+    keyframe = None
+    for id_, content in conn.execute(text("SELECT id, content FROM terms_of_service ORDER BY id")).all():
+        content = content or ""
+        values = encode_content(content, keyframe if settings.terms_delta_encoding else None)
+        if values["content_codec"] == CODEC_ZLIB:
+            keyframe = (id_, content)
+        conn.execute(update(table).where(table.c.id == id_).values(**values))
+    conn.execute(text("ALTER TABLE terms_of_service DROP COLUMN content"))
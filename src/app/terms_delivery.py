@@ -0,0 +1,280 @@
+"""利用規約の1件の応答の事前圧縮キャッシュ
+
+利用規約の版は作成後に変更されないので、1件の応答（JSON）を版ごとに一度だけ組み立て、
+gzip（brotli・zstandard がインストールされていればそれらも）で圧縮した表現とあわせてプロセス内に保持する。
+表現は応答本文の SHA-256 をキーに保持し（content-addressed）、同じ値を強い ETag にも使う。
+版（id, created_at）から本文のハッシュへの索引を別に持つので、ID が再利用されても古い表現は返さない。
+
+応答は Accept-Encoding で表現を選んで Content-Encoding を付け、長期の Cache-Control を返す。
+Range（単一の範囲）と If-Range にも対応する。キャッシュに載った版の応答は、本文の読み込み・復元・
+シリアライズ・圧縮のいずれも行わずに返せる。
+"""
+import gzip
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+from sqlalchemy.orm import Session, undefer
+from .conditional import item_validators, not_modified_response
+from .models import models
+from .schemas import schemas
+from .terms_content import terms_with_content
+
+try:
+    import brotli
+except ImportError:  # 任意の依存（pip install brotli）
+    brotli = None
+try:
+    import zstandard
+except ImportError:  # 任意の依存（pip install zstandard）
+    zstandard = None
+
+# 版ごとの応答（/terms/{id}）は変更されないので1年間キャッシュさせる
+TERMS_MAX_AGE_SECONDS = 365 * 24 * 60 * 60
+# 最新の利用規約は新しい版の作成で変わるので、プロセス内キャッシュの再読込間隔と同じにする
+LATEST_TERMS_MAX_AGE_SECONDS = 60
+RESPONSE_CACHE_MAX_ENTRIES = 32
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+ZSTD_LEVEL = 19
+
+IDENTITY = "identity"
+
+def _encoders() -> Dict[str, Callable[[bytes], bytes]]:
+    # 圧縮率の高い順（Accept-Encoding の q 値が同じなら先のものを選ぶ）
+    encoders = {}
+    if brotli is not None:
+        encoders["br"] = lambda body: brotli.compress(body, quality=BROTLI_QUALITY)
+    if zstandard is not None:
+        encoders["zstd"] = lambda body: zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(body)
+    encoders["gzip"] = lambda body: gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    return encoders
+
+ENCODERS = _encoders()
+_ADAPTER = TypeAdapter(schemas.TermsOfService)
+
+@dataclass(frozen=True)
+class EncodedTerms:
+    """1つの版の応答本文と、その圧縮済みの表現"""
+    digest: str
+    last_modified: Optional[str]
+    bodies: Dict[str, bytes]
+
+    def etag(self, encoding: str) -> str:
+        # 符号化ごとに別の表現なので、強い ETag も符号化ごとに分ける
+        return f'"{self.digest}"' if encoding == IDENTITY else f'"{self.digest}-{encoding}"'
+
+    @property
+    def size(self) -> int:
+        return sum(len(body) for body in self.bodies.values())
+
+def encode_terms(terms: schemas.TermsOfService) -> EncodedTerms:
+    """応答本文（response_model と同じJSON）を組み立て、利用できるすべての符号化で圧縮する"""
+    body = _ADAPTER.dump_json(terms)
+    bodies = {IDENTITY: body}
+    for encoding, compress in ENCODERS.items():
+        bodies[encoding] = compress(body)
+    return EncodedTerms(
+        digest=hashlib.sha256(body).hexdigest()[:32],
+        last_modified=item_validators(models.TermsOfService, terms)[1],
+        bodies=bodies,
+    )
+
+class TermsResponseCache:
+    """版（id, created_at）ごとの事前圧縮済みの応答を LRU で保持する"""
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # 同じ版を同時に組み立てないようにする（初回のアクセス集中でも圧縮は1回）
+        self._build_lock = threading.Lock()
+        self._entries: "OrderedDict[str, EncodedTerms]" = OrderedDict()
+        self._digests: Dict[Tuple[int, Optional[datetime]], str] = {}
+        self.hits = 0
+        self.misses = 0
+        self.builds = 0
+
+    def get(self, terms_id: int, created_at: Optional[datetime]) -> Optional[EncodedTerms]:
+        with self._lock:
+            digest = self._digests.get((terms_id, created_at))
+            encoded = self._entries.get(digest) if digest is not None else None
+            if encoded is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(digest)
+            self.hits += 1
+            return encoded
+
+    def put(self, terms: schemas.TermsOfService) -> EncodedTerms:
+        """作成した版の応答を組み立ててキャッシュに入れる"""
+        encoded = encode_terms(terms)
+        with self._lock:
+            self.builds += 1
+            self._entries[encoded.digest] = encoded
+            self._entries.move_to_end(encoded.digest)
+            self._digests[(terms.id, terms.created_at)] = encoded.digest
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                self._digests = {k: d for k, d in self._digests.items() if d != evicted}
+        return encoded
+
+    def get_or_build(
+        self, terms_id: int, created_at: Optional[datetime], load: Callable[[], schemas.TermsOfService]
+    ) -> EncodedTerms:
+        encoded = self.get(terms_id, created_at)
+        if encoded is not None:
+            return encoded
+        with self._build_lock:
+            # 待っている間に他のリクエストが組み立てていればそれを使う
+            with self._lock:
+                digest = self._digests.get((terms_id, created_at))
+                encoded = self._entries.get(digest) if digest is not None else None
+            return encoded if encoded is not None else self.put(load())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._digests.clear()
+            self.hits = self.misses = self.builds = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": sum(encoded.size for encoded in self._entries.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "builds": self.builds,
+            }
+
+    def render_metrics(self) -> list:
+        """Prometheus テキスト形式のヒット・ミス数と保持しているバイト数"""
+        stats = self.stats()
+        return [
+            "# HELP terms_response_cache_hits_total Precompressed terms response cache hits.",
+            "# TYPE terms_response_cache_hits_total counter",
+            f"terms_response_cache_hits_total {stats['hits']}",
+            "# HELP terms_response_cache_misses_total Precompressed terms response cache misses.",
+            "# TYPE terms_response_cache_misses_total counter",
+            f"terms_response_cache_misses_total {stats['misses']}",
+            "# HELP terms_response_cache_bytes Bytes held by the precompressed terms response cache.",
+            "# TYPE terms_response_cache_bytes gauge",
+            f"terms_response_cache_bytes {stats['bytes']}",
+        ]
+
+terms_response_cache = TermsResponseCache()
+
+def _load_terms(db: Session, terms_id: int) -> schemas.TermsOfService:
+    row = db.query(models.TermsOfService)\
+        .options(undefer(models.TermsOfService.content_data))\
+        .filter(models.TermsOfService.id == terms_id)\
+        .one()
+    return terms_with_content(db, [row])[0]
+
+def cached_terms(db: Session, terms_id: int, created_at: Optional[datetime]) -> EncodedTerms:
+    """版の事前圧縮済みの応答（キャッシュになければ本文を読み込んで組み立てる）"""
+    return terms_response_cache.get_or_build(terms_id, created_at, lambda: _load_terms(db, terms_id))
+
+def _accepted_encodings(header: str) -> Dict[str, float]:
+    accepted = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        match = re.search(r"q\s*=\s*([0-9.]+)", params)
+        if match:
+            try:
+                q = float(match.group(1))
+            except ValueError:
+                q = 0.0
+        accepted[name] = q
+    return accepted
+
+def negotiate_encoding(header: Optional[str], available: List[str]) -> str:
+    """Accept-Encoding から応答の符号化を選ぶ
+
+    q 値が最大の符号化（同じなら available の順）を、明示された identity の q 値以上なら選ぶ。
+    """
+    if not header:
+        return IDENTITY
+    accepted = _accepted_encodings(header)
+    wildcard = accepted.get("*", 0.0)
+    if not available:
+        return IDENTITY
+    q, _, encoding = max((accepted.get(name, wildcard), -index, name) for index, name in enumerate(available))
+    return encoding if q > 0 and q >= accepted.get(IDENTITY, 0.0) else IDENTITY
+
+_RANGE = re.compile(r"bytes=(\d*)-(\d*)$")
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+def parse_range(header: Optional[str], length: int) -> Optional[Tuple[int, int]]:
+    """Range ヘッダーの単一の範囲（両端を含む）。解釈できない・複数の範囲の場合は None（全体を返す）"""
+    match = _RANGE.match(header.replace(" ", "")) if header else None
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first:
+        if not last:
+            return None
+        suffix = int(last)
+        if suffix == 0 or length == 0:
+            raise RangeNotSatisfiable()
+        return max(0, length - suffix), length - 1
+    start = int(first)
+    end = int(last) if last else length - 1
+    if last and end < start:
+        return None
+    if start >= length:
+        raise RangeNotSatisfiable()
+    return start, min(end, length - 1)
+
+def _if_range_matches(request: Request, etag: str, last_modified: Optional[str]) -> bool:
+    # If-Range は強い比較（ETag）または Last-Modified との完全一致
+    if_range = request.headers.get("if-range")
+    if if_range is None:
+        return True
+    if_range = if_range.strip()
+    return if_range == etag if if_range.startswith('"') else if_range == last_modified
+
+def terms_response(request: Request, encoded: EncodedTerms, max_age: int, immutable: bool = False) -> Response:
+    """事前圧縮済みの表現から、符号化・条件付きリクエスト・Range に応じた応答を返す"""
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"), list(ENCODERS))
+    body = encoded.bodies[encoding]
+    etag = encoded.etag(encoding)
+    headers = {
+        "Cache-Control": f"public, max-age={max_age}" + (", immutable" if immutable else ""),
+        "Vary": "Accept-Encoding",
+        "Accept-Ranges": "bytes",
+    }
+    not_modified = not_modified_response(request, etag, encoded.last_modified)
+    if not_modified is not None:
+        not_modified.headers.update(headers)
+        return not_modified
+
+    headers["ETag"] = etag
+    if encoded.last_modified is not None:
+        headers["Last-Modified"] = encoded.last_modified
+    if encoding != IDENTITY:
+        headers["Content-Encoding"] = encoding
+
+    byte_range = None
+    if "range" in request.headers and _if_range_matches(request, etag, encoded.last_modified):
+        try:
+            byte_range = parse_range(request.headers["range"], len(body))
+        except RangeNotSatisfiable:
+            headers["Content-Range"] = f"bytes */{len(body)}"
+            return Response(status_code=416, headers=headers)
+    if byte_range is None:
+        return Response(content=body, media_type="application/json", headers=headers)
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{len(body)}"
+    return Response(content=body[start:end + 1], status_code=206, media_type="application/json", headers=headers)
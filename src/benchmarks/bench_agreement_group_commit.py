@@ -0,0 +1,160 @@
+"""同意登録の負荷試験（グループコミットの有無でスループットとテールレイテンシを比較する）
+
+利用規約の公開直後を想定し、多数の会員が同時に同意を登録する。
+一部のリクエストは登録済みの会員による重複（400）になる。
+--direct を指定すると HTTP を介さず、スレッドから登録処理を直接呼び出して
+コミットの待ち合わせだけを比較する（HTTP の処理が支配的な環境向け）。
+
+使い方:
+    cd src
+    python -m benchmarks.bench_agreement_group_commit --duration 10 --concurrency 50 200
+    python -m benchmarks.bench_agreement_group_commit --direct --profile durable
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import tempfile
+import threading
+import time
+
+import httpx
+from fastapi import HTTPException
+from sqlalchemy.orm import sessionmaker
+
+from app.agreement_writer import apply_agreement_batch
+from app.config import load_settings
+from app.database import create_database_engine
+from app.group_commit import GroupCommitWriter
+from app.routers.terms import _record_agreement
+from .common import create_database, seed_terms, start_server, stop_server, summarize, print_table
+
+# 重複登録になるリクエストの割合
+DUPLICATE_RATIO = 0.05
+
+async def _worker(client, terms_id, deadline, latencies, statuses, members, rng):
+    while time.perf_counter() < deadline:
+        if rng.random() < DUPLICATE_RATIO:
+            member_id = "member_00000000"
+        else:
+            member_id = f"load_{next(members):08d}"
+        started = time.perf_counter()
+        response = await client.post(f"/terms/{terms_id}/agreements", params={"member_id": member_id})
+        latencies.append(time.perf_counter() - started)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+async def run_load(base_url, terms_id, concurrency, duration, members):
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    latencies, statuses = [], {}
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        # ウォームアップ
+        await asyncio.gather(*(client.get("/") for _ in range(min(concurrency, 50))))
+        started = time.perf_counter()
+        deadline = started + duration
+        await asyncio.gather(*(
+            _worker(client, terms_id, deadline, latencies, statuses, members, random.Random(i))
+            for i in range(concurrency)
+        ))
+        elapsed = time.perf_counter() - started
+    return summarize(latencies, elapsed), statuses
+
+def _direct_worker(record, deadline, latencies, statuses, members, rng):
+    while time.perf_counter() < deadline:
+        if rng.random() < DUPLICATE_RATIO:
+            member_id = "member_00000000"
+        else:
+            member_id = f"load_{next(members):08d}"
+        started = time.perf_counter()
+        try:
+            record(member_id)
+            code = 201
+        except HTTPException as exc:
+            code = exc.status_code
+        latencies.append(time.perf_counter() - started)
+        statuses[code] = statuses.get(code, 0) + 1
+
+def _row(mode, concurrency, result, statuses):
+    return [
+        mode, concurrency, result["requests"],
+        f"{result['rps']:.1f}", f"{result['p50_ms']:.1f}", f"{result['p99_ms']:.1f}",
+        statuses.get(201, 0), statuses.get(400, 0),
+        sum(count for code, count in statuses.items() if code not in (201, 400)),
+    ]
+
+def run_direct(workdir, profile, coalesce, concurrency, duration, members):
+    """HTTP を介さずに concurrency 本のスレッドから同意を登録する"""
+    settings = load_settings(environ={
+        "DB_PROFILE": profile,
+        "DB_URL": f"sqlite:///{os.path.join(workdir, 'improvement_initiatives.db')}",
+        "DB_POOL_SIZE": str(concurrency + 1),
+        "DB_BUSY_TIMEOUT": "60000",
+    })
+    engine = create_database_engine(settings.database)
+    Session = sessionmaker(bind=engine)
+    writer = GroupCommitWriter("bench", apply_agreement_batch, Session, max_delay_ms=0)
+
+    def record(member_id):
+        if coalesce:
+            if writer.submit((1, member_id)).result() != "created":
+                raise HTTPException(status_code=400)
+        else:
+            with Session() as db:
+                _record_agreement(db, 1, member_id)
+
+    latencies, statuses = [], {}
+    deadline = time.perf_counter() + duration
+    threads = [
+        threading.Thread(target=_direct_worker, args=(record, deadline, latencies, statuses, members, random.Random(i)))
+        for i in range(concurrency)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    writer.stop()
+    engine.dispose()
+    return summarize(latencies, elapsed), statuses
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[50, 200])
+    parser.add_argument("--profile", default="default", help="SQLiteの性能プロファイル（DB_PROFILE）")
+    parser.add_argument("--direct", action="store_true", help="HTTP を介さずに登録処理を直接呼び出す")
+    args = parser.parse_args()
+
+    rows = []
+    for mode, enabled in (("per-request", "0"), ("group-commit", "1")):
+        # モードごとに同じ状態のデータベースから始める
+        with tempfile.TemporaryDirectory() as workdir:
+            engine = create_database(os.path.join(workdir, "improvement_initiatives.db"))
+            seed_terms(engine, versions=1, agreements_per_version=1)
+            engine.dispose()
+
+            members = itertools.count()
+            if args.direct:
+                for concurrency in args.concurrency:
+                    result, statuses = run_direct(
+                        workdir, args.profile, enabled == "1", concurrency, args.duration, members
+                    )
+                    rows.append(_row(mode, concurrency, result, statuses))
+                continue
+
+            process, base_url = start_server(workdir, env={
+                "DB_PROFILE": args.profile,
+                "AGREEMENT_GROUP_COMMIT": enabled,
+            })
+            try:
+                for concurrency in args.concurrency:
+                    result, statuses = asyncio.run(run_load(base_url, 1, concurrency, args.duration, members))
+                    rows.append(_row(mode, concurrency, result, statuses))
+            finally:
+                stop_server(process)
+
+    print_table(["mode", "clients", "requests", "req/s", "p50(ms)", "p99(ms)", "201", "400", "errors"], rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""同期(Session)と非同期(AsyncSession)のDBパスを同時接続数ごとに比較する
+
+使い方:
+    cd src
+    python -m benchmarks.bench_async_db --duration 10 --concurrency 50 200 1000
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+import httpx
+
+from .common import (
+    create_database, seed_initiatives, seed_terms, start_server, stop_server,
+    summarize, print_table,
+)
+
+INITIATIVES = 10000
+MEMBERS = 10000
+
+async def _worker(client, deadline, latencies, rng):
+    while time.perf_counter() < deadline:
+        choice = rng.random()
+        if choice < 0.4:
+            url = f"/initiatives/{rng.randint(1, INITIATIVES)}"
+        elif choice < 0.7:
+            url = f"/terms/check-agreement/member_{rng.randint(0, MEMBERS * 2):08d}"
+        else:
+            url = f"/initiatives/?skip={rng.randint(0, INITIATIVES - 20)}&limit=20"
+        started = time.perf_counter()
+        response = await client.get(url)
+        latencies.append(time.perf_counter() - started)
+        response.raise_for_status()
+
+async def run_load(base_url, concurrency, duration):
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    latencies = []
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        # ウォームアップ
+        await asyncio.gather(*(client.get("/") for _ in range(min(concurrency, 50))))
+        started = time.perf_counter()
+        deadline = started + duration
+        await asyncio.gather(*(
+            _worker(client, deadline, latencies, random.Random(i))
+            for i in range(concurrency)
+        ))
+        elapsed = time.perf_counter() - started
+    return summarize(latencies, elapsed)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[50, 200, 1000])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        engine = create_database(os.path.join(workdir, "improvement_initiatives.db"))
+        seed_initiatives(engine, INITIATIVES)
+        seed_terms(engine, versions=2, agreements_per_version=MEMBERS)
+        engine.dispose()
+
+        rows = []
+        for mode, env in (("sync", {"ASYNC_DB": "0"}), ("async", {"ASYNC_DB": "1"})):
+            process, base_url = start_server(workdir, env=env)
+            try:
+                for concurrency in args.concurrency:
+                    result = asyncio.run(run_load(base_url, concurrency, args.duration))
+                    rows.append([
+                        mode, concurrency, result["requests"],
+                        f"{result['rps']:.1f}", f"{result['p50_ms']:.1f}", f"{result['p99_ms']:.1f}",
+                    ])
+            finally:
+                stop_server(process)
+
+    print_table(["mode", "clients", "requests", "req/s", "p50(ms)", "p99(ms)"], rows)
+
+if __name__ == "__main__":
+    main()
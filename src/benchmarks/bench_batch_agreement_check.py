@@ -0,0 +1,75 @@
+"""会員ごとの同意確認ループと一括同意確認エンドポイントを比較する
+
+ループ側はHTTPを介さずハンドラー関数を直接呼び出すため、実運用の
+リクエスト単位の確認よりも有利な条件での比較になる。
+
+使い方:
+    cd src
+    python -m benchmarks.bench_batch_agreement_check --members 10000 100000
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from sqlalchemy.orm import sessionmaker
+
+from app.routers import terms
+from app.schemas import schemas
+from .common import create_database, seed_terms, print_table
+
+def run_loop(db, member_ids):
+    started = time.perf_counter()
+    for member_id in member_ids:
+        terms.check_latest_agreement(member_id, db)
+    return time.perf_counter() - started
+
+async def _drain(body_iterator):
+    async for _ in body_iterator:
+        pass
+
+def run_batch(db, member_ids):
+    started = time.perf_counter()
+    response = terms.check_latest_agreement_batch(
+        schemas.AgreementBatchCheckRequest(member_ids=member_ids), db
+    )
+    asyncio.run(_drain(response.body_iterator))
+    return time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--members", type=int, nargs="+", default=[10000, 100000])
+    args = parser.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as workdir:
+        engine = create_database(os.path.join(workdir, "bench.db"))
+        # 確認対象の半数が最新規約に同意済みの状態を作る
+        seed_terms(engine, versions=2, agreements_per_version=max(args.members) // 2)
+        Session = sessionmaker(bind=engine)
+        for count in args.members:
+            # 同意済み・未同意の会員IDを半数ずつ混在させる
+            member_ids = [
+                f"member_{m // 2:08d}" if m % 2 == 0 else f"absent_{m:08d}"
+                for m in range(count)
+            ]
+            with Session() as db:
+                loop_seconds = run_loop(db, member_ids)
+            with Session() as db:
+                batch_seconds = run_batch(db, member_ids)
+            rows.append([
+                count,
+                f"{loop_seconds:.2f}", f"{count / loop_seconds:.0f}",
+                f"{batch_seconds:.3f}", f"{count / batch_seconds:.0f}",
+                f"{loop_seconds / batch_seconds:.1f}x",
+            ])
+        engine.dispose()
+
+    print_table(
+        ["members", "loop(s)", "loop members/s", "batch(s)", "batch members/s", "speedup"],
+        rows,
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""一覧のJSON出力を既定の経路（ORM + response_model の検証）と高速出力（FAST_JSON）で比較する
+
+アプリをプロセス内で動かし、ルートごとに同じリクエストを両方の経路で処理して
+レイテンシと、応答の本文がバイト単位で一致することを確認する。
+
+使い方:
+    cd src
+    python -m benchmarks.bench_fast_json --limit 1000 --repeat 20
+"""
+import argparse
+import os
+import tempfile
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+from sqlalchemy.orm import sessionmaker
+
+from app.config import settings
+from app.database import get_db
+from app.main import create_app
+from app.models import models
+from .common import (
+    create_database, seed_initiatives, seed_development, seed_releases, seed_terms, time_call, print_table
+)
+
+def _routes(limit):
+    return [
+        ("GET /initiatives/", f"/initiatives/?limit={limit}"),
+        ("GET /development/requirements/", f"/development/requirements/?limit={limit}"),
+        ("GET /development/tasks/", f"/development/tasks/?limit={limit}"),
+        ("GET /development/requirements/{id}/tasks", "/development/requirements/1/tasks"),
+        ("GET /releases/", f"/releases/?limit={limit}"),
+        ("GET /releases/{id}/rollbacks", "/releases/1/rollbacks"),
+        ("GET /releases/pending/approval", "/releases/pending/approval"),
+        ("GET /terms/", f"/terms/?limit={limit}"),
+    ]
+
+def _attach_children(engine, count):
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(insert(models.DevelopmentTask), [
+            {"requirement_id": 1, "title": f"追加タスク{i}", "description": "要件1のタスク", "status": "TODO",
+             "created_at": now, "updated_at": now}
+            for i in range(count)
+        ])
+        conn.execute(insert(models.ReleaseRollback), [
+            {"release_id": 1, "reason": f"追加のロールバック理由{i}", "rollback_date": now, "created_at": now}
+            for i in range(count)
+        ])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--limit", type=int, default=1000)
+    parser.add_argument("--rows", type=int, default=10000, help="各一覧の行数")
+    parser.add_argument("--terms", type=int, default=50, help="利用規約のバージョン数（本文が大きい）")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as workdir:
+        engine = create_database(os.path.join(workdir, "bench.db"))
+        seed_initiatives(engine, args.rows)
+        seed_development(engine, args.rows, args.rows, args.rows)
+        seed_releases(engine, args.rows, args.rows)
+        seed_terms(engine, versions=args.terms)
+        # 親ごとの一覧（ページングなし）も limit 件程度にする
+        _attach_children(engine, args.limit)
+        Session = sessionmaker(bind=engine)
+
+        def override_get_db():
+            with Session() as db:
+                yield db
+
+        app = create_app()
+        app.dependency_overrides[get_db] = override_get_db
+        original = settings.fast_json
+        try:
+            with TestClient(app) as client:
+                for label, url in _routes(args.limit):
+                    results = {}
+                    for enabled in (False, True):
+                        settings.fast_json = enabled
+                        client.get(url)  # シリアライザーの構築を計測から外す
+                        results[enabled] = time_call(lambda: client.get(url), repeat=args.repeat)
+                    (default_s, expected), (fast_s, actual) = results[False], results[True]
+                    rows.append([
+                        label, len(actual.json()), f"{len(actual.content) / 1024:.0f}",
+                        f"{default_s * 1000:.2f}", f"{fast_s * 1000:.2f}", f"{default_s / fast_s:.2f}x",
+                        "yes" if actual.content == expected.content else "NO",
+                    ])
+        finally:
+            settings.fast_json = original
+        engine.dispose()
+
+    print_table(["route", "items", "KiB", "default(ms)", "fast(ms)", "speedup", "identical"], rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""MetricsMiddleware が1リクエストあたりに追加する処理時間を計測する
+
+使い方:
+    cd src
+    python -m benchmarks.bench_metrics_overhead --requests 200000
+"""
+import argparse
+import asyncio
+import time
+from types import SimpleNamespace
+
+from app.metrics import MetricsMiddleware, MetricsRegistry
+from .common import print_table
+
+ROUTE = SimpleNamespace(path="/initiatives/{initiative_id}")
+
+async def _app(scope, receive, send):
+    scope["route"] = ROUTE
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+async def _receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+async def _send(message):
+    pass
+
+async def _run(app, requests):
+    started = time.perf_counter()
+    for _ in range(requests):
+        await app({"type": "http", "method": "GET", "path": "/initiatives/1"}, _receive, _send)
+    return time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200000)
+    args = parser.parse_args()
+
+    wrapped = MetricsMiddleware(_app, registry=MetricsRegistry())
+    baseline = min(asyncio.run(_run(_app, args.requests)) for _ in range(3))
+    instrumented = min(asyncio.run(_run(wrapped, args.requests)) for _ in range(3))
+    overhead_us = (instrumented - baseline) / args.requests * 1e6
+    print_table(
+        ["requests", "baseline(us/req)", "with metrics(us/req)", "overhead(us/req)"],
+        [[args.requests,
+          f"{baseline / args.requests * 1e6:.2f}",
+          f"{instrumented / args.requests * 1e6:.2f}",
+          f"{overhead_us:.2f}"]],
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""offset ページングとカーソル（キーセット）ページングの深いページでの遅延を比較する
+
+使い方:
+    cd src
+    python -m benchmarks.bench_pagination --rows 1000000 --page 1000 --limit 100
+"""
+import argparse
+import os
+import tempfile
+
+from fastapi import Request, Response
+from sqlalchemy.orm import sessionmaker
+
+from app.pagination import encode_cursor
+from app.routers import initiatives
+from .common import create_database, seed_initiatives, time_call, print_table
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--page", type=int, default=1000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    skip = (args.page - 1) * args.limit
+    rows = []
+    with tempfile.TemporaryDirectory() as workdir:
+        engine = create_database(os.path.join(workdir, "bench.db"))
+        seed_initiatives(engine, args.rows)
+        Session = sessionmaker(bind=engine)
+        with Session() as db:
+            # 直前のページの最終IDからカーソルを作る（IDは1から連番）
+            cursor = encode_cursor(skip)
+            for label, kwargs in (
+                ("offset", {"skip": skip, "cursor": None}),
+                ("cursor", {"skip": 0, "cursor": cursor}),
+            ):
+                seconds, page = time_call(
+                    lambda: initiatives.list_initiatives(
+                        Request({"type": "http", "method": "GET", "headers": []}), Response(),
+                        limit=args.limit, db=db, **kwargs
+                    ),
+                    repeat=args.repeat,
+                )
+                db.expunge_all()
+                rows.append([label, args.page, len(page), page[0].id, f"{seconds * 1000:.2f}"])
+        engine.dispose()
+
+    print_table(["mode", "page", "rows", "first id", "latency(ms)"], rows)
+
+if __name__ == "__main__":
+    main()
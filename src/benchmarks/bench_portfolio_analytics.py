@@ -0,0 +1,50 @@
+"""施策のポートフォリオ分析エンドポイントを計測する
+
+配列の読込（キャッシュミス時）と、キャッシュ済み配列に対する集計を分けて計測する。
+
+使い方:
+    cd src
+    python -m benchmarks.bench_portfolio_analytics --initiatives 100000 1000000
+"""
+import argparse
+import os
+import tempfile
+import time
+from statistics import median
+
+from sqlalchemy.orm import sessionmaker
+
+from app.analytics import portfolio_cache
+from app.routers import initiatives
+from .common import create_database, seed_initiatives, print_table
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--initiatives", type=int, nargs="+", default=[100000, 1000000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rows = []
+    for count in args.initiatives:
+        with tempfile.TemporaryDirectory() as workdir:
+            engine = create_database(os.path.join(workdir, "bench.db"))
+            seed_initiatives(engine, count)
+            Session = sessionmaker(bind=engine)
+            with Session() as db:
+                portfolio_cache.clear()
+                started = time.perf_counter()
+                initiatives.get_portfolio_analytics(top_k=10, bins=20, status=None, db=db)
+                cold = time.perf_counter() - started
+
+                warm = []
+                for _ in range(args.repeat):
+                    started = time.perf_counter()
+                    initiatives.get_portfolio_analytics(top_k=10, bins=20, status=None, db=db)
+                    warm.append(time.perf_counter() - started)
+            engine.dispose()
+        rows.append([count, f"{cold * 1000:.0f}", f"{median(warm) * 1000:.2f}", f"{max(warm) * 1000:.2f}"])
+
+    print_table(["initiatives", "cold(ms)", "warm p50(ms)", "warm max(ms)"], rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""予算制約つきの施策選定（ナップサック）を候補数ごとに計測する
+
+厳密解（動的計画法）と貪欲法の処理時間と、LP緩和の上界に対する達成率を比較する。
+厳密解は 候補数 × 分割数 が EXACT_MAX_CELLS を超える規模では計測しない。
+最後の列はDBからの候補読込を含むハンドラー全体（method=auto）の時間。
+
+使い方:
+    cd src
+    python -m benchmarks.bench_portfolio_optimizer --candidates 1000 10000 100000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from sqlalchemy.orm import sessionmaker
+
+from app.optimizer import EXACT_MAX_CELLS, optimize_portfolio, query_candidates
+from app.routers import initiatives
+from app.schemas import schemas
+from .common import create_database, seed_initiatives, print_table
+
+ALL_STATUSES = list(schemas.InitiativeStatus)
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--candidates", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--resolution", type=int, default=1000)
+    parser.add_argument("--budget-ratio", type=float, default=0.1, help="全候補の合計コストに対する予算の割合")
+    args = parser.parse_args()
+
+    rows = []
+    for count in args.candidates:
+        with tempfile.TemporaryDirectory() as workdir:
+            engine = create_database(os.path.join(workdir, "bench.db"))
+            seed_initiatives(engine, count)
+            Session = sessionmaker(bind=engine)
+            with Session() as db:
+                ids, irr, cost = query_candidates(db, [s for s in initiatives.models.InitiativeStatus])
+                budget = float(cost.sum()) * args.budget_ratio
+
+                greedy, greedy_seconds = timed(lambda: optimize_portfolio(ids, irr, cost, budget, "greedy"))
+                if count * (args.resolution + 1) <= EXACT_MAX_CELLS:
+                    exact, exact_seconds = timed(
+                        lambda: optimize_portfolio(ids, irr, cost, budget, "exact", args.resolution)
+                    )
+                    exact_cells = [f"{exact_seconds * 1000:.1f}", f"{exact['total_value'] / exact['upper_bound']:.4f}"]
+                else:
+                    exact_cells = ["-", "-"]
+
+                request = schemas.PortfolioOptimizationRequest(
+                    budget=budget, statuses=ALL_STATUSES, resolution=args.resolution
+                )
+                _, handler_seconds = timed(lambda: initiatives.optimize_initiative_portfolio(request, db))
+            engine.dispose()
+
+        rows.append([
+            count,
+            *exact_cells,
+            f"{greedy_seconds * 1000:.1f}", f"{greedy['total_value'] / greedy['upper_bound']:.4f}",
+            f"{handler_seconds * 1000:.1f}",
+        ])
+
+    print_table(
+        ["candidates", "exact(ms)", "exact/bound", "greedy(ms)", "greedy/bound", "handler auto(ms)"],
+        rows,
+    )
+
+if __name__ == "__main__":
+    main()
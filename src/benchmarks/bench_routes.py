@@ -0,0 +1,348 @@
+"""全ルートのハンドラーを ORMクエリ / Pydantic検証 / JSONエンコード に分けて計測する
+
+結果はJSONファイルに出力し、--compare で以前の結果と比較できる。
+
+使い方:
+    cd src
+    python -m benchmarks.bench_routes --scale 1.0 --output bench_results.json
+    python -m benchmarks.bench_routes --scale 0.1 --compare bench_results.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from statistics import median
+from typing import Callable, Optional
+
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.routing import APIRoute
+from pydantic import TypeAdapter
+from sqlalchemy.orm import sessionmaker
+from starlette.requests import Request
+from starlette.responses import StreamingResponse
+
+from app.models import models
+from app.routers import initiatives, terms, development, releases, search
+from app.schemas import schemas
+from app.terms_cache import latest_terms_cache
+from .common import (
+    SRC_DIR, create_database, seed_initiatives, seed_initiative_details,
+    seed_development, seed_releases, seed_terms, print_table,
+)
+
+# scale=1.0 のときのデータ件数
+BASE_VOLUMES = {
+    "initiatives": 100000,
+    "assessments": 100000,
+    "effects": 500000,
+    "requirements": 100000,
+    "tasks": 500000,
+    "releases": 10000,
+    "rollbacks": 1000,
+    "agreements": 1000000,
+}
+
+@dataclass
+class RouteCase:
+    endpoint: Callable
+    # (db, 繰り返し番号) を受け取りハンドラーを呼び出す
+    call: Callable
+    # 状態遷移を伴うルートが毎回成功するよう、計測前に対象の状態を整える
+    setup: Optional[Callable] = None
+    # 同じルートを条件を変えて計測する場合の区別（結果のルート名に付ける）
+    variant: Optional[str] = None
+
+def _set_release_status(release_id, status):
+    def setup(db):
+        db.query(models.Release).filter(models.Release.id == release_id).update({"status": status})
+        db.commit()
+    return setup
+
+def _ndjson_request(body: bytes) -> Request:
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+    scope = {"type": "http", "method": "POST", "headers": [(b"content-type", b"application/x-ndjson")]}
+    return Request(scope, receive)
+
+def _get_request(headers=()) -> Request:
+    # 条件付きGETのヘッダーを持たない通常のリクエスト
+    return Request({"type": "http", "method": "GET", "headers": list(headers)})
+
+async def _drain(body_iterator) -> bytes:
+    return b"".join([chunk async for chunk in body_iterator])
+
+def build_cases(volumes):
+    mid = lambda name: max(1, volumes[name] // 2)
+    bulk_ids = lambda name: list(range(mid(name), mid(name) + 100))
+    future = (datetime.utcnow() + timedelta(days=30)).isoformat()
+    task_payload = lambda i: schemas.DevelopmentTaskCreate(
+        requirement_id=mid("requirements"), title=f"ベンチタスク{i}", description="説明", status="TODO"
+    )
+    return [
+        # initiatives
+        RouteCase(initiatives.create_initiative, lambda db, i: initiatives.create_initiative(
+            schemas.InitiativeCreate(title=f"ベンチ施策{i}", description="説明", irr=5.0, cost=1000.0), db)),
+        RouteCase(initiatives.list_initiatives, lambda db, i: initiatives.list_initiatives(
+            _get_request(), Response(), skip=mid("initiatives"), limit=100, cursor=None, db=db)),
+        RouteCase(initiatives.export_initiatives, lambda db, i: initiatives.export_initiatives(db)),
+        RouteCase(initiatives.export_initiative_effects, lambda db, i: initiatives.export_initiative_effects(
+            initiative_id=mid("initiatives"), db=db)),
+        RouteCase(initiatives.get_effect_quantiles, lambda db, i: initiatives.get_effect_quantiles(
+            "コスト削減率", datetime(2000, 1, 1), datetime(2100, 1, 1), q=[0.5, 0.9, 0.99], db=db), variant="aligned"),
+        RouteCase(initiatives.get_effect_quantiles, lambda db, i: initiatives.get_effect_quantiles(
+            "コスト削減率", datetime(2000, 1, 1, 0, 30), datetime(2100, 1, 1, 0, 30), q=[0.5, 0.9, 0.99], db=db),
+            variant="unaligned"),
+        RouteCase(initiatives.get_initiative, lambda db, i: initiatives.get_initiative(mid("initiatives"), _get_request(), Response(), db)),
+        RouteCase(initiatives.get_portfolio_analytics, lambda db, i: initiatives.get_portfolio_analytics(
+            top_k=10, bins=10, status=None, db=db)),
+        RouteCase(initiatives.optimize_initiative_portfolio, lambda db, i: initiatives.optimize_initiative_portfolio(
+            schemas.PortfolioOptimizationRequest(budget=1e8), db)),
+        RouteCase(initiatives.get_initiative_dossier, lambda db, i: initiatives.get_initiative_dossier(
+            mid("initiatives"), db)),
+        RouteCase(initiatives.get_initiative_dossiers, lambda db, i: initiatives.get_initiative_dossiers(
+            ids=list(range(mid("initiatives"), mid("initiatives") + 100)), db=db)),
+        RouteCase(initiatives.create_initiative_assessment, lambda db, i: initiatives.create_initiative_assessment(
+            mid("initiatives"),
+            schemas.InitiativeAssessmentCreate(
+                initiative_id=mid("initiatives"), feasibility_score=80, compliance_check=True, terms_impact=False),
+            db)),
+        RouteCase(initiatives.record_initiative_effect, lambda db, i: initiatives.record_initiative_effect(
+            mid("initiatives"),
+            schemas.InitiativeEffectCreate(initiative_id=mid("initiatives"), metric_name="コスト削減率", metric_value=1.0),
+            db)),
+        RouteCase(initiatives.get_initiative_effect_timeseries, lambda db, i: initiatives.get_initiative_effect_timeseries(
+            mid("initiatives"), "コスト削減率", datetime(2000, 1, 1), datetime(2100, 1, 1),
+            step=schemas.TimeSeriesStep.MONTH, db=db), variant="aligned"),
+        RouteCase(initiatives.get_initiative_effect_timeseries, lambda db, i: initiatives.get_initiative_effect_timeseries(
+            mid("initiatives"), "コスト削減率", datetime(2000, 1, 1, 0, 30), datetime(2100, 1, 1, 0, 30),
+            step=schemas.TimeSeriesStep.MONTH, db=db), variant="unaligned"),
+        RouteCase(initiatives.update_initiative_statuses_bulk, lambda db, i: initiatives.update_initiative_statuses_bulk(
+            schemas.InitiativeBulkStatusUpdate(ids=bulk_ids("initiatives"), status="APPROVED"), db)),
+        RouteCase(initiatives.update_initiative_status, lambda db, i: initiatives.update_initiative_status(
+            mid("initiatives"), schemas.InitiativeStatusUpdate(status="APPROVED"), db)),
+        # terms
+        RouteCase(terms.create_terms, lambda db, i: terms.create_terms(
+            schemas.TermsOfServiceCreate(version=f"9.{i}.0", content="ベンチ用の利用規約", effective_date="2000-01-01T00:00:00"),
+            db)),
+        RouteCase(terms.list_terms, lambda db, i: terms.list_terms(_get_request(), Response(), skip=0, limit=100, cursor=None, db=db)),
+        RouteCase(terms.get_latest_terms, lambda db, i: terms.get_latest_terms(_get_request(), db)),
+        RouteCase(terms.get_latest_terms_cache_stats, lambda db, i: terms.get_latest_terms_cache_stats()),
+        RouteCase(terms.get_terms, lambda db, i: terms.get_terms(1, _get_request(), db)),
+        RouteCase(terms.get_terms_diff, lambda db, i: terms.get_terms_diff(1, base_id=None, db=db)),
+        RouteCase(terms.record_agreement, lambda db, i: asyncio.run(terms.record_agreement(1, f"bench_member_{i}", db))),
+        RouteCase(terms.record_agreements_bulk, lambda db, i: asyncio.run(terms.record_agreements_bulk(
+            1,
+            _ndjson_request("\n".join(f'"bulk_{i}_{m}"' for m in range(1000)).encode()),
+            db))),
+        RouteCase(terms.export_agreements, lambda db, i: terms.export_agreements(terms_id=1, db=db)),
+        RouteCase(terms.get_member_agreements, lambda db, i: terms.get_member_agreements("member_00000001", db)),
+        RouteCase(terms.check_latest_agreement, lambda db, i: terms.check_latest_agreement("member_00000001", db)),
+        RouteCase(terms.check_latest_agreement_batch, lambda db, i: terms.check_latest_agreement_batch(
+            schemas.AgreementBatchCheckRequest(member_ids=[f"member_{m:08d}" for m in range(0, 20000, 2)]), db)),
+        # development
+        RouteCase(development.create_requirement, lambda db, i: development.create_requirement(
+            schemas.RequirementCreate(initiative_id=mid("initiatives"), title=f"ベンチ要件{i}", description="説明", status="DRAFT"),
+            db)),
+        RouteCase(development.create_requirements_bulk, lambda db, i: development.create_requirements_bulk([
+            schemas.RequirementCreate(initiative_id=mid("initiatives"), title=f"ベンチ要件{i}-{n}", description="説明", status="DRAFT")
+            for n in range(100)
+        ], db)),
+        RouteCase(development.update_requirement_statuses_bulk, lambda db, i: development.update_requirement_statuses_bulk(
+            schemas.RequirementBulkStatusUpdate(ids=bulk_ids("requirements"), status="REVIEW"), db)),
+        RouteCase(development.list_requirements, lambda db, i: development.list_requirements(
+            _get_request(), Response(), skip=0, limit=100, initiative_id=mid("initiatives"), cursor=None, db=db)),
+        RouteCase(development.export_requirements, lambda db, i: development.export_requirements(
+            initiative_id=mid("initiatives"), db=db)),
+        RouteCase(development.get_requirement, lambda db, i: development.get_requirement(mid("requirements"), _get_request(), Response(), db)),
+        RouteCase(development.update_requirement_status, lambda db, i: development.update_requirement_status(
+            mid("requirements"), schemas.RequirementStatusUpdate(status="REVIEW"), db)),
+        RouteCase(development.create_development_task, lambda db, i: development.create_development_task(
+            task_payload(i), db)),
+        RouteCase(development.create_development_tasks_bulk, lambda db, i: development.create_development_tasks_bulk(
+            [task_payload(i) for _ in range(100)], db)),
+        RouteCase(development.list_development_tasks, lambda db, i: development.list_development_tasks(
+            _get_request(), Response(), skip=0, limit=100, requirement_id=mid("requirements"), cursor=None, db=db)),
+        RouteCase(development.export_development_tasks, lambda db, i: development.export_development_tasks(
+            requirement_id=mid("requirements"), db=db)),
+        RouteCase(development.get_development_task, lambda db, i: development.get_development_task(mid("tasks"), _get_request(), Response(), db)),
+        RouteCase(development.update_development_task, lambda db, i: development.update_development_task(
+            mid("tasks"), task_payload(i), db)),
+        RouteCase(development.get_tasks_by_requirement, lambda db, i: development.get_tasks_by_requirement(
+            mid("requirements"), db)),
+        # releases
+        RouteCase(releases.create_release, lambda db, i: releases.create_release(
+            schemas.ReleaseCreate(version=f"bench.{i}", description="説明", status="PLANNED", planned_date=future), db)),
+        RouteCase(releases.list_releases, lambda db, i: releases.list_releases(
+            _get_request(), Response(), skip=0, limit=100, status=schemas.ReleaseStatus.PLANNED, cursor=None, db=db)),
+        RouteCase(releases.export_releases, lambda db, i: releases.export_releases(
+            status=schemas.ReleaseStatus.PLANNED, db=db)),
+        RouteCase(releases.get_release, lambda db, i: releases.get_release(mid("releases"), _get_request(), Response(), db)),
+        RouteCase(releases.update_release_status, lambda db, i: releases.update_release_status(
+            mid("releases"), schemas.ReleaseStatusUpdate(status="COMPLETED"), db)),
+        RouteCase(releases.create_rollback, lambda db, i: releases.create_rollback(
+            mid("releases"), schemas.ReleaseRollbackCreate(release_id=mid("releases"), reason="ベンチ"), db),
+            setup=_set_release_status(mid("releases"), models.ReleaseStatus.COMPLETED)),
+        RouteCase(releases.get_release_rollbacks, lambda db, i: releases.get_release_rollbacks(1, db)),
+        RouteCase(releases.get_pending_releases, lambda db, i: releases.get_pending_releases(db)),
+        RouteCase(releases.update_release_statuses_bulk, lambda db, i: releases.update_release_statuses_bulk(
+            schemas.ReleaseBulkStatusUpdate(ids=bulk_ids("releases"), status="COMPLETED"), db)),
+        RouteCase(releases.approve_releases_bulk, lambda db, i: releases.approve_releases_bulk(
+            schemas.ReleaseBulkApprove(ids=bulk_ids("releases")), db)),
+        RouteCase(releases.approve_release, lambda db, i: releases.approve_release(mid("releases"), db),
+            setup=_set_release_status(mid("releases"), models.ReleaseStatus.PENDING_APPROVAL)),
+        # search: 3文字以上の語は trigram 索引で絞り込み、2文字以下の語だけなら LIKE で全件を走査する
+        RouteCase(search.search, lambda db, i: search.search(
+            f"要件{mid('requirements')}", type=None, skip=0, limit=20, db=db), variant="trigram"),
+        RouteCase(search.search, lambda db, i: search.search(
+            "件 12", type=None, skip=0, limit=20, db=db), variant="short terms"),
+    ]
+
+def _route_metadata():
+    return {
+        route.endpoint: route
+        for module in (initiatives, terms, development, releases, search)
+        for route in module.router.routes
+        if isinstance(route, APIRoute)
+    }
+
+def measure(Session, case, route, repeat):
+    adapter = TypeAdapter(route.response_model) if route.response_model is not None else None
+    samples = {"query": [], "validate": [], "encode": []}
+    size = 0
+    for i in range(repeat):
+        latest_terms_cache.invalidate()
+        with Session() as db:
+            if case.setup is not None:
+                case.setup(db)
+            started = time.perf_counter()
+            result = case.call(db, i)
+            if isinstance(result, StreamingResponse):
+                # ストリーミング応答は検証・エンコードを含めて読み切る時間を計測する
+                body = asyncio.run(_drain(result.body_iterator))
+                samples["query"].append(time.perf_counter() - started)
+                samples["validate"].append(0.0)
+                samples["encode"].append(0.0)
+                size = len(body)
+                continue
+            if isinstance(result, Response):
+                # 組み立て済みの応答（事前圧縮済みの利用規約など）は検証・エンコードを行わない
+                samples["query"].append(time.perf_counter() - started)
+                samples["validate"].append(0.0)
+                samples["encode"].append(0.0)
+                size = len(result.body)
+                continue
+            queried = time.perf_counter()
+            if adapter is not None:
+                content = adapter.validate_python(result, from_attributes=True)
+                validated = time.perf_counter()
+                body = json.dumps(
+                    adapter.dump_python(content, mode="json"),
+                    ensure_ascii=False, allow_nan=False, separators=(",", ":")
+                ).encode("utf-8")
+            else:
+                validated = time.perf_counter()
+                body = json.dumps(
+                    jsonable_encoder(result), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+                ).encode("utf-8")
+            encoded = time.perf_counter()
+            samples["query"].append(queried - started)
+            samples["validate"].append(validated - queried)
+            samples["encode"].append(encoded - validated)
+            size = len(body)
+    result = {f"{part}_ms": median(values) * 1000 for part, values in samples.items()}
+    result["total_ms"] = sum(result.values())
+    result["bytes"] = size
+    return result
+
+def _git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=SRC_DIR, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(current, baseline_path, threshold):
+    """以前の結果と比較し、threshold を超えて遅くなったルートを返す"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)["routes"]
+    rows, regressions = [], []
+    for name, result in current["routes"].items():
+        if name not in baseline:
+            continue
+        before, after = baseline[name]["total_ms"], result["total_ms"]
+        ratio = after / before if before else 1.0
+        rows.append([name, f"{before:.2f}", f"{after:.2f}", f"{ratio:.2f}x"])
+        if ratio > 1 + threshold:
+            regressions.append(name)
+    print_table(["route", "baseline(ms)", "current(ms)", "ratio"], rows)
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", help="比較対象の結果ファイル")
+    parser.add_argument("--threshold", type=float, default=0.2, help="回帰とみなす遅延の増加率")
+    args = parser.parse_args()
+
+    volumes = {name: max(2, int(count * args.scale)) for name, count in BASE_VOLUMES.items()}
+    routes = _route_metadata()
+    cases = build_cases(volumes)
+    missing = [route.path for endpoint, route in routes.items() if endpoint not in {c.endpoint for c in cases}]
+    if missing:
+        print(f"warning: routes without a benchmark case: {', '.join(sorted(missing))}", file=sys.stderr)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        engine = create_database(os.path.join(workdir, "bench.db"))
+        seed_initiatives(engine, volumes["initiatives"])
+        seed_initiative_details(engine, volumes["initiatives"], volumes["assessments"], volumes["effects"])
+        seed_development(engine, volumes["initiatives"], volumes["requirements"], volumes["tasks"])
+        seed_releases(engine, volumes["releases"], volumes["rollbacks"])
+        seed_terms(engine, versions=1, agreements_per_version=volumes["agreements"])
+        Session = sessionmaker(bind=engine, autoflush=False)
+
+        for case in cases:
+            route = routes[case.endpoint]
+            name = f"{','.join(sorted(route.methods))} {route.path}"
+            if case.variant is not None:
+                name += f" ({case.variant})"
+            results[name] = measure(Session, case, route, args.repeat)
+        engine.dispose()
+
+    report = {
+        "commit": _git_commit(),
+        "timestamp": datetime.utcnow().isoformat(),
+        "scale": args.scale,
+        "volumes": volumes,
+        "routes": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print_table(
+        ["route", "query(ms)", "validate(ms)", "encode(ms)", "total(ms)", "bytes"],
+        [
+            [name, f"{r['query_ms']:.2f}", f"{r['validate_ms']:.2f}", f"{r['encode_ms']:.2f}",
+             f"{r['total_ms']:.2f}", r["bytes"]]
+            for name, r in results.items()
+        ],
+    )
+
+    if args.compare:
+        regressions = compare(report, args.compare, args.threshold)
+        if regressions:
+            print(f"regressions: {', '.join(regressions)}", file=sys.stderr)
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
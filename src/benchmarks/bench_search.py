@@ -0,0 +1,115 @@
+"""全文検索（FTS5 trigram + bm25）の検索レイテンシを文書数を増やして計測する
+
+施策・要件・開発タスクに語彙からランダムに組み立てた日本語のタイトルと説明を登録し
+（索引はトリガーで作られる）、頻度の異なる語・複数語・2文字の語・深いページで
+GET /search/ のハンドラーを呼び出す。
+
+使い方:
+    cd src
+    python -m benchmarks.bench_search --documents 1000000 --repeat 20
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime
+
+from sqlalchemy import insert
+from sqlalchemy.orm import sessionmaker
+
+from app.models import models
+from app.routers import search
+from app.schemas import schemas
+from .common import create_database, percentile, print_table
+
+NOUNS = [
+    "在庫", "管理", "物流", "決済", "顧客", "請求", "検索", "性能", "監視", "通知", "認証", "帳票", "分析", "予測",
+    "配送", "倉庫", "受注", "発注", "会計", "人事", "勤怠", "契約", "問い合わせ", "画面", "基盤", "データ連携",
+    "バッチ処理", "権限", "ログ", "障害対応", "品質", "テスト自動化", "移行", "外部API", "モバイルアプリ", "ポイント",
+    "キャンペーン", "レコメンド", "セキュリティ", "バックアップ", "運用手順", "コスト", "承認フロー", "ダッシュボード",
+]
+ACTIONS = ["の改善", "の刷新", "の導入", "の見直し", "の自動化", "の高速化", "の統合", "の標準化"]
+TABLES = [
+    (models.Initiative, 0.4),
+    (models.Requirement, 0.3),
+    (models.DevelopmentTask, 0.3),
+]
+CHUNK_SIZE = 20000
+
+QUERIES = [
+    ("rare term", {"q": "SKU-01234"}),
+    ("common term", {"q": "の改善"}),
+    ("adjacent words", {"q": "在庫管理"}),
+    ("two terms", {"q": "決済 基盤の刷新"}),
+    ("no match", {"q": "存在しない語句"}),
+    ("2-char term (LIKE)", {"q": "倉庫"}),
+    ("indexed + 2-char", {"q": "在庫管理 倉庫"}),
+    ("tasks only", {"q": "在庫管理", "type": [schemas.SearchType.TASK]}),
+    ("deep page", {"q": "の改善", "skip": 1000}),
+]
+
+def _document(rng, i):
+    title = "".join(rng.sample(NOUNS, 2)) + rng.choice(ACTIONS)
+    words = rng.choices(NOUNS, k=rng.randint(6, 12))
+    # 一部の文書だけに現れる型番（出現頻度の低い語）
+    words.append(f"SKU-{rng.randrange(10 ** 5):05d}")
+    return title, "、".join(words) + f"に関する作業{i}"
+
+def seed_documents(engine, documents, seed=0):
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        for model, share in TABLES:
+            count = int(documents * share)
+            for start in range(0, count, CHUNK_SIZE):
+                rows = []
+                for i in range(start, min(count, start + CHUNK_SIZE)):
+                    title, description = _document(rng, i)
+                    row = {"title": title, "description": description, "created_at": now, "updated_at": now}
+                    if model is models.Requirement:
+                        row.update(initiative_id=i % 1000 + 1, status=models.RequirementStatus.DRAFT)
+                    elif model is models.DevelopmentTask:
+                        row.update(requirement_id=i % 1000 + 1, status="TODO")
+                    else:
+                        row.update(irr=1.0, cost=1.0, status=models.InitiativeStatus.PROPOSED)
+                    rows.append(row)
+                conn.execute(insert(model), rows)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--documents", type=int, nargs="+", default=[100000, 1000000])
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rows = []
+    for documents in args.documents:
+        with tempfile.TemporaryDirectory() as workdir:
+            path = os.path.join(workdir, "bench.db")
+            engine = create_database(path)
+            started = time.perf_counter()
+            seed_documents(engine, documents)
+            load_s = time.perf_counter() - started
+            size_mb = os.path.getsize(path) / 1024 / 1024
+            print(f"{documents} documents: loaded in {load_s:.1f}s ({documents / load_s:.0f} docs/s), {size_mb:.0f} MiB")
+
+            Session = sessionmaker(bind=engine)
+            with Session() as db:
+                for label, params in QUERIES:
+                    kwargs = {"type": None, "skip": 0, "limit": args.limit, **params}
+                    latencies = []
+                    for _ in range(args.repeat):
+                        started = time.perf_counter()
+                        hits = search.search(db=db, **kwargs)
+                        latencies.append(time.perf_counter() - started)
+                    rows.append([
+                        documents, label, len(hits),
+                        f"{percentile(latencies, 50) * 1000:.2f}", f"{percentile(latencies, 99) * 1000:.2f}",
+                    ])
+            engine.dispose()
+
+    print_table(["documents", "query", "hits", "p50(ms)", "p99(ms)"], rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""SQLiteの性能プロファイルごとに読み書き混在の負荷をかけてスループットを比較する
+
+使い方:
+    cd src
+    python -m benchmarks.bench_sqlite_profiles --readers 8 --writers 2 --duration 10
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.config import DATABASE_PROFILES, load_settings
+from app.database import Base, create_database_engine
+from app.models import models
+from .common import seed_initiatives, summarize, print_table
+
+INITIATIVES = 10000
+
+def _reader(Session, deadline, latencies, errors, seed):
+    rng = random.Random(seed)
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            with Session() as db:
+                db.get(models.Initiative, rng.randint(1, INITIATIVES))
+        except OperationalError:
+            errors.append(1)
+            continue
+        latencies.append(time.perf_counter() - started)
+
+def _writer(Session, deadline, latencies, errors, seed):
+    rng = random.Random(seed)
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            with Session() as db:
+                db.add(models.InitiativeEffect(
+                    initiative_id=rng.randint(1, INITIATIVES),
+                    metric_name="コスト削減率",
+                    metric_value=rng.random() * 100
+                ))
+                db.commit()
+        except OperationalError:
+            errors.append(1)
+            continue
+        latencies.append(time.perf_counter() - started)
+
+def run_profile(workdir, profile, readers, writers, duration):
+    settings = load_settings(environ={
+        "DB_PROFILE": profile,
+        "DB_URL": f"sqlite:///{os.path.join(workdir, profile + '.db')}",
+        "DB_POOL_SIZE": str(readers + writers),
+    })
+    engine = create_database_engine(settings.database)
+    Base.metadata.create_all(bind=engine)
+    seed_initiatives(engine, INITIATIVES)
+    Session = sessionmaker(bind=engine)
+
+    read_latencies, write_latencies, errors = [], [], []
+    deadline = time.perf_counter() + duration
+    threads = [
+        threading.Thread(target=_reader, args=(Session, deadline, read_latencies, errors, i))
+        for i in range(readers)
+    ] + [
+        threading.Thread(target=_writer, args=(Session, deadline, write_latencies, errors, 1000 + i))
+        for i in range(writers)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    engine.dispose()
+    return summarize(read_latencies, elapsed), summarize(write_latencies, elapsed), len(errors)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--profiles", nargs="+", default=list(DATABASE_PROFILES))
+    args = parser.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for profile in args.profiles:
+            reads, writes, errors = run_profile(
+                workdir, profile, args.readers, args.writers, args.duration
+            )
+            rows.append([
+                profile,
+                f"{reads['rps']:.0f}", f"{reads['p99_ms']:.2f}",
+                f"{writes['rps']:.0f}", f"{writes['p99_ms']:.2f}",
+                errors,
+            ])
+
+    print_table(["profile", "reads/s", "read p99(ms)", "writes/s", "write p99(ms)", "errors"], rows)
+
+if __name__ == "__main__":
+    main()
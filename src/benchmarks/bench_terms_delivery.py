@@ -0,0 +1,89 @@
+"""利用規約の1件の配信（/terms/latest・/terms/{id}）を事前圧縮キャッシュの有無で比較する
+
+大きな本文の版を登録し、アプリをプロセス内で動かして同じリクエストを繰り返す。
+キャッシュなしは毎回キャッシュを空にして本文の読み込み・復元・シリアライズ・圧縮を行う場合で、
+キャッシュありは作成時に圧縮した応答をそのまま返す場合。1リクエストあたりのCPU時間と応答のバイト数を表示する。
+
+使い方:
+    cd src
+    python -m benchmarks.bench_terms_delivery --versions 10 --articles 300 --requests 200
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import sessionmaker
+
+from app.database import get_db
+from app.main import create_app
+from app.terms_cache import latest_terms_cache
+from app.terms_delivery import ENCODERS, terms_response_cache
+from .bench_terms_storage import generate_versions
+from .common import create_database, print_table
+
+def _cpu_per_request(client, url, headers, requests, before=None):
+    started = time.process_time()
+    for _ in range(requests):
+        if before is not None:
+            before()
+        response = client.get(url, headers=headers)
+    return (time.process_time() - started) / requests, response
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--versions", type=int, default=10)
+    parser.add_argument("--articles", type=int, default=300, help="初版の条文数")
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    contents = generate_versions(args.versions, args.articles)
+    print(f"encodings: identity, {', '.join(ENCODERS)}; {len(contents[-1])} characters in the last version")
+
+    rows = []
+    with tempfile.TemporaryDirectory() as workdir:
+        engine = create_database(os.path.join(workdir, "bench.db"))
+        Session = sessionmaker(bind=engine)
+
+        def override_get_db():
+            with Session() as db:
+                yield db
+
+        app = create_app()
+        app.dependency_overrides[get_db] = override_get_db
+        latest_terms_cache.clear()
+        terms_response_cache.clear()
+        with TestClient(app) as client:
+            start = datetime(2024, 1, 1)
+            for number, content in enumerate(contents):
+                client.post("/terms/", json={
+                    "version": f"1.{number}.0", "content": content,
+                    "effective_date": (start + timedelta(days=number)).isoformat(),
+                })
+            cases = [
+                ("GET /terms/latest", "/terms/latest", {"Accept-Encoding": "identity"}),
+                ("GET /terms/latest (gzip)", "/terms/latest", {"Accept-Encoding": "gzip"}),
+                ("GET /terms/{id}", f"/terms/{len(contents)}", {"Accept-Encoding": "identity"}),
+                ("GET /terms/{id} (gzip)", f"/terms/{len(contents)}", {"Accept-Encoding": "gzip"}),
+                ("GET /terms/{id} (Range)", f"/terms/{len(contents)}",
+                 {"Accept-Encoding": "identity", "Range": "bytes=0-65535"}),
+            ]
+            for label, url, headers in cases:
+                uncached_s, _ = _cpu_per_request(
+                    client, url, headers, args.requests, before=terms_response_cache.clear
+                )
+                cached_s, response = _cpu_per_request(client, url, headers, args.requests)
+                rows.append([
+                    label, response.status_code, f"{int(response.headers['content-length']) / 1024:.1f}",
+                    f"{uncached_s * 1000:.2f}", f"{cached_s * 1000:.2f}", f"{uncached_s / cached_s:.1f}x",
+                ])
+        engine.dispose()
+        terms_response_cache.clear()
+        latest_terms_cache.clear()
+
+    print_table(["route", "status", "KiB", "uncached CPU(ms)", "cached CPU(ms)", "speedup"], rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""利用規約の本文の保存サイズ・一覧の応答サイズ・読み出しのレイテンシを計測する
+
+条文を少しずつ改定した版を POST /terms/ で順に登録し、本文の平文の合計と保存した content_data の
+合計を、圧縮のみ（TERMS_DELTA_ENCODING=0）と差分符号化ありで比較する。あわせて一覧の応答サイズ
+（本文あり・なし）と、1件の取得（キーフレーム・差分の版）・差分の取得のレイテンシを計測する。
+
+使い方:
+    cd src
+    python -m benchmarks.bench_terms_storage --versions 50 --articles 300
+"""
+import argparse
+import os
+import random
+import tempfile
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+from sqlalchemy.orm import sessionmaker
+
+from app.config import settings
+from app.database import get_db
+from app.main import create_app
+from app.models import models
+from app.terms_cache import latest_terms_cache
+from .common import create_database, time_call, print_table
+
+WORDS = [
+    "利用者", "当社", "本サービス", "登録情報", "個人情報", "利用料金", "支払方法", "解約", "禁止事項", "免責事項",
+    "損害賠償", "準拠法", "管轄裁判所", "通知", "第三者", "知的財産権", "アカウント", "パスワード", "反社会的勢力",
+    "サービスの変更", "サービスの停止", "契約期間", "更新", "退会", "未成年者", "外部サービス", "広告", "ポイント",
+]
+
+def _sentence(rng):
+    return f"{'、'.join(rng.sample(WORDS, rng.randint(3, 7)))}については、{rng.choice(WORDS)}の定めに従うものとします。"
+
+def _initial_articles(rng, articles):
+    return [[_sentence(rng) for _ in range(rng.randint(2, 5))] for _ in range(articles)]
+
+def _revise(rng, articles):
+    """1〜3箇所の文を書き換え、ときどき条文を追加する"""
+    articles = [list(article) for article in articles]
+    for _ in range(rng.randint(1, 3)):
+        article = rng.choice(articles)
+        article[rng.randrange(len(article))] = _sentence(rng)
+    if rng.random() < 0.2:
+        articles.insert(rng.randrange(len(articles) + 1), [_sentence(rng) for _ in range(rng.randint(2, 5))])
+    return articles
+
+def _render(articles):
+    return "".join(f"第{number}条\n" + "".join(article) + "\n" for number, article in enumerate(articles, 1))
+
+def generate_versions(versions, articles, seed=0):
+    rng = random.Random(seed)
+    current = _initial_articles(rng, articles)
+    contents = []
+    for _ in range(versions):
+        contents.append(_render(current))
+        current = _revise(rng, current)
+    return contents
+
+def _measure(contents, delta_encoding, repeat):
+    with tempfile.TemporaryDirectory() as workdir:
+        engine = create_database(os.path.join(workdir, "bench.db"))
+        Session = sessionmaker(bind=engine)
+
+        def override_get_db():
+            with Session() as db:
+                yield db
+
+        app = create_app()
+        app.dependency_overrides[get_db] = override_get_db
+        original = settings.terms_delta_encoding
+        settings.terms_delta_encoding = delta_encoding
+        latest_terms_cache.clear()
+        try:
+            with TestClient(app) as client:
+                start = datetime(2024, 1, 1)
+                for number, content in enumerate(contents):
+                    client.post("/terms/", json={
+                        "version": f"1.{number}.0",
+                        "content": content,
+                        "effective_date": (start + timedelta(days=number)).isoformat(),
+                    })
+                with Session() as db:
+                    stored, deltas = db.execute(select(
+                        func.sum(func.length(models.TermsOfService.content_data)),
+                        func.count().filter(models.TermsOfService.content_codec == "delta"),
+                    )).one()
+                last = len(contents)
+                results = {
+                    "stored": stored,
+                    "deltas": deltas,
+                    "list": len(client.get("/terms/").content),
+                    "list_with_content": len(client.get("/terms/?include_content=true").content),
+                    "get_first": time_call(lambda: client.get("/terms/1"), repeat=repeat)[0],
+                    "get_last": time_call(lambda: client.get(f"/terms/{last}"), repeat=repeat)[0],
+                    "diff": time_call(lambda: client.get(f"/terms/{last}/diff"), repeat=repeat)[0],
+                }
+        finally:
+            settings.terms_delta_encoding = original
+            latest_terms_cache.clear()
+        engine.dispose()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--versions", type=int, default=50)
+    parser.add_argument("--articles", type=int, default=300, help="初版の条文数")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    contents = generate_versions(args.versions, args.articles)
+    raw = sum(len(content.encode("utf-8")) for content in contents)
+    print(f"{args.versions} versions, {len(contents[-1])} characters in the last version, {raw / 1024:.0f} KiB of plain text")
+
+    rows = []
+    for label, delta_encoding in (("zlib", False), ("zlib + delta", True)):
+        results = _measure(contents, delta_encoding, args.repeat)
+        rows.append([
+            label, results["deltas"], f"{results['stored'] / 1024:.1f}", f"{raw / results['stored']:.1f}x",
+            f"{results['list_with_content'] / 1024:.1f}", f"{results['list'] / 1024:.1f}",
+            f"{results['get_first'] * 1000:.2f}", f"{results['get_last'] * 1000:.2f}", f"{results['diff'] * 1000:.2f}",
+        ])
+
+    print_table([
+        "storage", "delta rows", "stored(KiB)", "ratio", "list+content(KiB)", "list(KiB)",
+        "get first(ms)", "get last(ms)", "diff(ms)",
+    ], rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""ベンチマーク共通ユーティリティ（データ投入・計測・集計）"""
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+from statistics import mean
+
+from sqlalchemy import create_engine, insert
+
+from app.database import Base
+from app.models import models
+from app.rollups import rebuild_effect_rollups
+from app.sketches import rebuild_effect_sketches
+from app.terms_content import encode_terms_content
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def create_database(path):
+    """指定パスにスキーマを作成したSQLiteエンジンを返す"""
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+def _insert_generated(conn, model, count, make_row, chunk_size=10000):
+    """make_row(i) で生成した行をチャンク単位で一括登録する"""
+    for start in range(0, count, chunk_size):
+        rows = [make_row(i) for i in range(start, min(count, start + chunk_size))]
+        conn.execute(insert(model), rows)
+
+def seed_initiatives(engine, count, seed=0):
+    rng = random.Random(seed)
+    statuses = list(models.InitiativeStatus)
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        _insert_generated(conn, models.Initiative, count, lambda i: {
+            "title": f"施策{i}",
+            "description": f"これはベンチマーク用の改善施策{i}です",
+            "irr": rng.uniform(0, 30),
+            "cost": rng.uniform(1e4, 1e7),
+            "status": rng.choice(statuses),
+            "created_at": now,
+            "updated_at": now,
+        })
+
+def seed_initiative_details(engine, initiatives, assessments, effects, seed=0):
+    """施策ごとの評価・効果測定を施策IDに均等に割り当てて登録する"""
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    metrics = ["コスト削減率", "売上増加率", "顧客満足度"]
+    with engine.begin() as conn:
+        _insert_generated(conn, models.InitiativeAssessment, assessments, lambda i: {
+            "initiative_id": i % initiatives + 1,
+            "feasibility_score": rng.uniform(0, 100),
+            "compliance_check": rng.random() < 0.8,
+            "terms_impact": rng.random() < 0.2,
+            "assessment_date": now,
+        })
+        _insert_generated(conn, models.InitiativeEffect, effects, lambda i: {
+            "initiative_id": i % initiatives + 1,
+            "metric_name": metrics[i % len(metrics)],
+            "metric_value": rng.uniform(0, 100),
+            "measurement_date": now - timedelta(minutes=effects - i),
+        })
+        rebuild_effect_rollups(conn)
+        rebuild_effect_sketches(conn)
+
+def seed_development(engine, initiatives, requirements, tasks, seed=0):
+    rng = random.Random(seed)
+    requirement_statuses = list(models.RequirementStatus)
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        _insert_generated(conn, models.Requirement, requirements, lambda i: {
+            "initiative_id": i % initiatives + 1,
+            "title": f"要件{i}",
+            "description": f"これはベンチマーク用の要件{i}です",
+            "status": rng.choice(requirement_statuses),
+            "created_at": now,
+            "updated_at": now,
+        })
+        _insert_generated(conn, models.DevelopmentTask, tasks, lambda i: {
+            "requirement_id": i % requirements + 1,
+            "title": f"タスク{i}",
+            "description": f"これはベンチマーク用の開発タスク{i}です",
+            "status": rng.choice(["TODO", "IN_PROGRESS", "DONE"]),
+            "created_at": now,
+            "updated_at": now,
+        })
+
+def seed_releases(engine, releases, rollbacks, seed=0):
+    rng = random.Random(seed)
+    statuses = list(models.ReleaseStatus)
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        _insert_generated(conn, models.Release, releases, lambda i: {
+            "version": f"{i // 100}.{i % 100}.0",
+            "description": f"これはベンチマーク用のリリース{i}です",
+            "status": rng.choice(statuses),
+            "planned_date": now + timedelta(days=i % 30),
+            "created_at": now,
+            "updated_at": now,
+        })
+        _insert_generated(conn, models.ReleaseRollback, rollbacks, lambda i: {
+            "release_id": i % releases + 1,
+            "reason": f"ロールバック理由{i}",
+            "rollback_date": now,
+            "created_at": now,
+        })
+
+def seed_terms(engine, versions=3, agreements_per_version=0):
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        for v in range(versions):
+            terms_id = conn.execute(
+                insert(models.TermsOfService).values(
+                    version=f"1.{v}.0",
+                    effective_date=now - timedelta(days=versions - v),
+                    created_at=now,
+                    **encode_terms_content(conn, f"これはバージョン1.{v}.0の利用規約です。" * 200),
+                )
+            ).inserted_primary_key[0]
+            _insert_generated(conn, models.TermsAgreement, agreements_per_version, lambda m: {
+                "terms_id": terms_id, "member_id": f"member_{m:08d}", "agreed_at": now,
+            })
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+def summarize(latencies, elapsed):
+    """レイテンシ(秒)の配列から req/s・平均・p50・p99(ミリ秒)を求める"""
+    return {
+        "requests": len(latencies),
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "mean_ms": mean(latencies) * 1000 if latencies else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+def time_call(fn, repeat=5):
+    """関数を repeat 回実行し、最小実行時間(秒)と最後の戻り値を返す"""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_server(workdir, env=None, port=None):
+    """workdir をカレントディレクトリとして uvicorn を起動する"""
+    port = port or free_port()
+    process_env = dict(os.environ)
+    process_env["PYTHONPATH"] = SRC_DIR
+    process_env.update(env or {})
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app",
+         "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=workdir,
+        env=process_env,
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                return process, f"http://127.0.0.1:{port}"
+        except OSError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("uvicorn did not start")
+
+def stop_server(process):
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+def print_table(headers, rows):
+    widths = [max(len(str(h)), *(len(str(r[i])) for r in rows)) for i, h in enumerate(headers)]
+    print("  ".join(str(h).ljust(w) for h, w in zip(headers, widths)))
+    for row in rows:
+        print("  ".join(str(c).ljust(w) for c, w in zip(row, widths)))
@@ -1,8 +1,11 @@
 import uvicorn
 from app.database import Base, engine
+from app.migrations import migrate
 
 # データベースの初期化
 Base.metadata.create_all(bind=engine)
+# 既存データベースへのスキーマ変更の適用
+migrate(engine)
 
 if __name__ == "__main__":
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
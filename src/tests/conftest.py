@@ -4,8 +4,13 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
+from ..app.agreement_writer import agreement_writer
+from ..app.analytics import portfolio_cache
 from ..app.database import Base, get_db
+from ..app.ingestion import effect_writer
 from ..app.main import app
+from ..app.terms_cache import latest_terms_cache
+from ..app.terms_delivery import terms_response_cache
 
 # テスト用のデータベースを作成
 SQLALCHEMY_DATABASE_URL = "sqlite://"  # インメモリデータベース
@@ -21,6 +26,9 @@ TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engin
 def db():
     # テストごとにデータベースを作成
     Base.metadata.create_all(bind=engine)
+    latest_terms_cache.clear()
+    terms_response_cache.clear()
+    portfolio_cache.clear()
     
     try:
         db = TestingSessionLocal()
@@ -38,9 +46,12 @@ def override_get_db():
         db.close()
 
 app.dependency_overrides[get_db] = override_get_db
+# グループコミットの書き込みスレッドもテスト用のデータベースを使う
+effect_writer.session_factory = TestingSessionLocal
+agreement_writer.session_factory = TestingSessionLocal
 
 @pytest.fixture(scope="function")
-def client():
+def client(db):
     # テストクライアントを作成
     with TestClient(app) as test_client:
         yield test_client
@@ -0,0 +1,340 @@
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from ..app.analytics import portfolio_cache
+from ..app.config import settings
+from ..app.database import Base, get_async_db, get_db
+from ..app.main import create_app
+from ..app.terms_cache import latest_terms_cache
+from ..app.terms_delivery import terms_response_cache
+
+@pytest.fixture(scope="function")
+def async_client(tmp_path):
+    # aiosqlite は接続ごとにスレッドを持つため、ファイルDBで同期・非同期エンジンを共有する
+    db_path = tmp_path / "async_test.db"
+    sync_engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(bind=sync_engine)
+    # プロセス内のキャッシュは同期版のルーターと共有なので、テストごとに空にする
+    latest_terms_cache.clear()
+    terms_response_cache.clear()
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}", poolclass=NullPool)
+    TestingAsyncSessionLocal = async_sessionmaker(
+        async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+    )
+
+    # 非同期版が未実装のエンドポイントは同期版で提供されるため、同じファイルDBに向ける
+    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=sync_engine)
+
+    async def override_get_async_db():
+        async with TestingAsyncSessionLocal() as db:
+            yield db
+
+    def override_get_db():
+        db = TestingSessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = create_app(use_async_db=True)
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_db] = override_get_db
+    with TestClient(app) as test_client:
+        yield test_client
+    sync_engine.dispose()
+
+def test_async_initiative_flow(async_client):
+    response = async_client.post(
+        "/initiatives/",
+        json={
+            "title": "非同期テスト施策",
+            "description": "これは非同期ルーターのテストです",
+            "irr": 7.5,
+            "cost": 500000
+        }
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    initiative_id = response.json()["id"]
+
+    response = async_client.post(
+        f"/initiatives/{initiative_id}/assessments",
+        json={
+            "initiative_id": initiative_id,
+            "feasibility_score": 85.5,
+            "compliance_check": True,
+            "terms_impact": False
+        }
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+    response = async_client.get(f"/initiatives/{initiative_id}")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["status"] == "UNDER_REVIEW"
+
+    response = async_client.get("/initiatives/")
+    assert len(response.json()) == 1
+
+def test_async_terms_agreement_flow(async_client):
+    terms_response = async_client.post(
+        "/terms/",
+        json={
+            "version": "1.0.0",
+            "content": "これはテスト用の利用規約です。",
+            "effective_date": (datetime.utcnow() + timedelta(days=30)).isoformat()
+        }
+    )
+    terms_id = terms_response.json()["id"]
+
+    member_id = "test_member_001"
+    response = async_client.get(f"/terms/check-agreement/{member_id}")
+    assert response.json()["has_agreed"] is False
+
+    response = async_client.post(f"/terms/{terms_id}/agreements?member_id={member_id}")
+    assert response.status_code == status.HTTP_201_CREATED
+    response = async_client.post(f"/terms/{terms_id}/agreements?member_id={member_id}")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    response = async_client.get(f"/terms/check-agreement/{member_id}")
+    data = response.json()
+    assert data["has_agreed"] is True
+    assert data["latest_terms_id"] == terms_id
+
+def test_async_development_flow(async_client):
+    response = async_client.post(
+        "/development/requirements/",
+        json={
+            "initiative_id": 999,
+            "title": "テスト要件",
+            "description": "存在しない施策",
+            "status": "DRAFT"
+        }
+    )
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    initiative_id = async_client.post(
+        "/initiatives/",
+        json={"title": "施策", "description": "説明", "irr": 1.0, "cost": 100}
+    ).json()["id"]
+    requirement_id = async_client.post(
+        "/development/requirements/",
+        json={
+            "initiative_id": initiative_id,
+            "title": "テスト要件",
+            "description": "これはテスト用の要件です",
+            "status": "DRAFT"
+        }
+    ).json()["id"]
+    response = async_client.post(
+        "/development/tasks/",
+        json={
+            "requirement_id": requirement_id,
+            "title": "テストタスク",
+            "description": "これはテスト用のタスクです",
+            "status": "TODO"
+        }
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+
+    response = async_client.get(f"/development/requirements/{requirement_id}/tasks")
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.json()) == 1
+
+def test_async_release_flow(async_client):
+    release_id = async_client.post(
+        "/releases/",
+        json={
+            "version": "1.0.0",
+            "description": "これはテスト用のリリースです",
+            "status": "PLANNED",
+            "planned_date": (datetime.utcnow() + timedelta(days=7)).isoformat()
+        }
+    ).json()["id"]
+
+    response = async_client.put(f"/releases/{release_id}/approve")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    response = async_client.put(f"/releases/{release_id}/status", json={"status": "COMPLETED"})
+    assert response.json()["actual_date"] is not None
+
+    response = async_client.post(
+        f"/releases/{release_id}/rollback",
+        json={"release_id": release_id, "reason": "テスト用のロールバック"}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    response = async_client.get(f"/releases/{release_id}/rollbacks")
+    assert len(response.json()) == 1
+
+def test_async_fast_json_output_is_identical(async_client, monkeypatch):
+    async_client.post("/initiatives/", json={"title": "施策", "description": "説明", "irr": 7, "cost": 1.5})
+    async_client.post("/development/requirements/", json={
+        "initiative_id": 1, "title": "要件", "description": "説明", "status": "DRAFT"
+    })
+    async_client.post("/development/tasks/", json={
+        "requirement_id": 1, "title": "タスク", "description": "説明", "status": "TODO"
+    })
+    async_client.post("/releases/", json={
+        "version": "1.0.0", "description": "説明", "status": "PENDING_APPROVAL", "planned_date": "2024-01-01T00:00:00"
+    })
+    async_client.post("/terms/", json={"version": "1.0", "content": "規約", "effective_date": "2024-01-01T00:00:00"})
+
+    for url in (
+        "/initiatives/?limit=1",
+        "/development/requirements/",
+        "/development/tasks/",
+        "/development/requirements/1/tasks",
+        "/releases/",
+        "/releases/pending/approval",
+        "/terms/",
+    ):
+        monkeypatch.setattr(settings, "fast_json", False)
+        expected = async_client.get(url)
+        monkeypatch.setattr(settings, "fast_json", True)
+        actual = async_client.get(url)
+        assert actual.json(), url
+        assert actual.content == expected.content, url
+        assert actual.headers.get("x-next-cursor") == expected.headers.get("x-next-cursor"), url
+
+def test_async_search(async_client):
+    async_client.post("/initiatives/", json={"title": "在庫管理の改善", "description": "説明", "irr": 1, "cost": 1})
+    response = async_client.get("/search/", params={"q": "在庫管理"})
+    assert response.status_code == status.HTTP_200_OK
+    assert [(hit["type"], hit["id"]) for hit in response.json()] == [("initiative", 1)]
+    assert async_client.get("/search/", params={"q": " "}).status_code == status.HTTP_400_BAD_REQUEST
+
+def test_async_terms_content_and_diff(async_client):
+    for number, content in enumerate(("第1条 目的。第2条 定義。", "第1条 目的。第2条 定義（改定）。")):
+        response = async_client.post("/terms/", json={
+            "version": f"1.{number}", "content": content, "effective_date": f"2024-01-0{number + 1}T00:00:00"
+        })
+        assert response.json()["content"] == content
+    assert [item.get("content") for item in async_client.get("/terms/").json()] == [None, None]
+    assert [item["content"] for item in async_client.get("/terms/?include_content=true").json()] == [
+        "第1条 目的。第2条 定義。", "第1条 目的。第2条 定義（改定）。"
+    ]
+    assert async_client.get("/terms/2").json()["content"] == "第1条 目的。第2条 定義（改定）。"
+    assert async_client.get("/terms/latest").json()["id"] == 2
+    diff = async_client.get("/terms/2/diff").json()
+    assert [(c["removed"], c["added"]) for c in diff["changes"]] == [("第2条 定義。", "第2条 定義（改定）。")]
+    assert async_client.get("/terms/1/diff").status_code == status.HTTP_404_NOT_FOUND
+
+def test_async_terms_precompressed_delivery(async_client):
+    content = "第1条 本規約は会員に適用されます。\n" * 50
+    terms_id = async_client.post("/terms/", json={
+        "version": "1.0", "content": content, "effective_date": "2024-01-01T00:00:00"
+    }).json()["id"]
+    for url in (f"/terms/{terms_id}", "/terms/latest"):
+        response = async_client.get(url, headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.json()["content"] == content
+        etag = response.headers["etag"]
+        assert async_client.get(url, headers={"If-None-Match": etag}).status_code == status.HTTP_304_NOT_MODIFIED
+    plain = async_client.get(f"/terms/{terms_id}", headers={"Accept-Encoding": "identity", "Range": "bytes=0-4"})
+    assert plain.status_code == status.HTTP_206_PARTIAL_CONTENT
+    assert plain.content == b'{"ver'
+
+def test_async_conditional_get(async_client):
+    initiative_id = async_client.post(
+        "/initiatives/", json={"title": "施策", "description": "説明", "irr": 5.0, "cost": 100.0}
+    ).json()["id"]
+    requirement_id = async_client.post("/development/requirements/", json={
+        "initiative_id": initiative_id, "title": "要件", "description": "説明", "status": "DRAFT"
+    }).json()["id"]
+    task_id = async_client.post("/development/tasks/", json={
+        "requirement_id": requirement_id, "title": "タスク", "description": "説明", "status": "TODO"
+    }).json()["id"]
+    release_id = async_client.post("/releases/", json={
+        "version": "1.0.0", "description": "説明", "status": "PLANNED",
+        "planned_date": (datetime.utcnow() + timedelta(days=30)).isoformat()
+    }).json()["id"]
+    async_client.post("/terms/", json={"version": "1.0", "content": "規約", "effective_date": "2024-01-01T00:00:00"})
+
+    for url in (
+        f"/initiatives/{initiative_id}", "/initiatives/",
+        f"/development/requirements/{requirement_id}", "/development/requirements/",
+        f"/development/tasks/{task_id}", "/development/tasks/",
+        f"/releases/{release_id}", "/releases/",
+        "/terms/", "/terms/?include_content=true",
+    ):
+        response = async_client.get(url)
+        etag, last_modified = response.headers["ETag"], response.headers["Last-Modified"]
+        response = async_client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED, url
+        assert response.headers["ETag"] == etag
+        response = async_client.get(url, headers={"If-Modified-Since": last_modified})
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED, url
+
+    # 本文の有無で一覧の ETag は異なる
+    assert async_client.get("/terms/").headers["ETag"] != async_client.get("/terms/?include_content=true").headers["ETag"]
+    # 更新すると ETag が変わる
+    etag = async_client.get(f"/initiatives/{initiative_id}").headers["ETag"]
+    async_client.put(f"/initiatives/{initiative_id}/status", json={"status": "APPROVED"})
+    response = async_client.get(f"/initiatives/{initiative_id}", headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["status"] == "APPROVED"
+    assert async_client.get("/initiatives/999", headers={"If-None-Match": "*"}).status_code == status.HTTP_404_NOT_FOUND
+
+def test_async_latest_terms_cache(async_client):
+    assert async_client.get("/terms/latest").status_code == status.HTTP_404_NOT_FOUND
+    # 発効日が同じ版は後から作成した版（IDが大きい版）を最新とする
+    for version in ("1.0.0", "1.0.1"):
+        async_client.post("/terms/", json={
+            "version": version, "content": f"バージョン{version}の利用規約です。", "effective_date": "2024-01-01T00:00:00"
+        })
+    async_client.post("/terms/", json={
+        "version": "0.9.0", "content": "バージョン0.9.0の利用規約です。", "effective_date": "2023-01-01T00:00:00"
+    })
+
+    assert async_client.get("/terms/latest").json()["version"] == "1.0.1"
+    assert async_client.get("/terms/check-agreement/m1").json()["latest_terms_version"] == "1.0.1"
+
+    stats = async_client.get("/terms/latest/cache-stats").json()
+    assert stats["misses"] == 1
+    assert stats["hits"] == 2
+
+def test_async_initiative_writes_invalidate_portfolio_cache(async_client, monkeypatch):
+    invalidations = []
+    monkeypatch.setattr(portfolio_cache, "invalidate", lambda: invalidations.append(True))
+    initiative_id = async_client.post(
+        "/initiatives/", json={"title": "施策", "description": "説明", "irr": 5.0, "cost": 100.0}
+    ).json()["id"]
+    async_client.post(f"/initiatives/{initiative_id}/assessments", json={
+        "initiative_id": initiative_id, "feasibility_score": 80, "compliance_check": True, "terms_impact": False
+    })
+    async_client.put(f"/initiatives/{initiative_id}/status", json={"status": "APPROVED"})
+    # 作成・評価・ステータス変更のいずれでも分析用のキャッシュを破棄する
+    assert len(invalidations) == 3
+
+def _operations(app):
+    return {
+        (method.upper(), path)
+        for path, operations in app.openapi()["paths"].items()
+        for method in operations
+    }
+
+def test_async_mode_exposes_same_routes_as_sync_mode():
+    assert _operations(create_app(use_async_db=True)) == _operations(create_app(use_async_db=False))
+
+def test_async_mode_falls_back_to_sync_only_endpoints(async_client):
+    response = async_client.post(
+        "/initiatives/",
+        json={"title": "分析対象", "description": "フォールバック確認", "irr": 5.0, "cost": 1000}
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+
+    # 静的パスが /initiatives/{initiative_id} に奪われず、同期版で処理される
+    response = async_client.get("/initiatives/analytics")
+    assert response.status_code == status.HTTP_200_OK
+    response = async_client.get("/initiatives/export")
+    assert response.status_code == status.HTTP_200_OK
+    assert "分析対象" in response.text
+
+    async_client.post("/terms/", json={"version": "1.0", "content": "規約", "effective_date": "2024-01-01T00:00:00"})
+    response = async_client.post("/terms/check-agreement/batch", json={"member_ids": ["m1"]})
+    assert response.status_code == status.HTTP_200_OK
+    assert '"member_id":"m1"' in response.text.replace(" ", "")
@@ -0,0 +1,132 @@
+from datetime import datetime, timedelta
+from fastapi import status
+
+from .conftest import engine
+from ..app.query_budget import count_queries
+
+def _create_initiative(client, title="施策"):
+    return client.post(
+        "/initiatives/", json={"title": title, "description": "説明", "irr": 5.0, "cost": 100.0}
+    ).json()["id"]
+
+def test_item_etag_and_not_modified(client):
+    initiative_id = _create_initiative(client)
+    response = client.get(f"/initiatives/{initiative_id}")
+    etag = response.headers["ETag"]
+    assert etag.startswith('W/"')
+    assert response.headers["Last-Modified"].endswith("GMT")
+
+    with count_queries(engine) as counter:
+        response = client.get(f"/initiatives/{initiative_id}", headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+    # id と更新日時だけを読み、行全体は読み込まない
+    assert counter.count == 1
+    assert "initiatives.title" not in counter.statements[0]
+
+    # 更新すると ETag が変わる
+    client.put(f"/initiatives/{initiative_id}/status", json={"status": "APPROVED"})
+    response = client.get(f"/initiatives/{initiative_id}", headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["ETag"] != etag
+    assert response.json()["status"] == "APPROVED"
+
+def test_item_if_modified_since(client):
+    initiative_id = _create_initiative(client)
+    last_modified = client.get(f"/initiatives/{initiative_id}").headers["Last-Modified"]
+    response = client.get(f"/initiatives/{initiative_id}", headers={"If-Modified-Since": last_modified})
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    response = client.get(
+        f"/initiatives/{initiative_id}", headers={"If-Modified-Since": "Mon, 01 Jan 2001 00:00:00 GMT"}
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+def test_if_modified_since_without_zone_is_gmt(client):
+    initiative_id = _create_initiative(client)
+    # ゾーンなし・"-0000" の日時は GMT として比較する（500 にしない）
+    for header in ("Sat, 17 Oct 2099 03:00:00", "Sat, 17 Oct 2099 03:00:00 -0000"):
+        for url in (f"/initiatives/{initiative_id}", "/initiatives/"):
+            response = client.get(url, headers={"If-Modified-Since": header})
+            assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    for header in ("Mon, 01 Jan 2001 00:00:00", "not a date"):
+        response = client.get(f"/initiatives/{initiative_id}", headers={"If-Modified-Since": header})
+        assert response.status_code == status.HTTP_200_OK
+
+def test_missing_item_with_condition_is_not_found(client):
+    response = client.get("/initiatives/999", headers={"If-None-Match": "*"})
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+def test_list_etag_changes_with_page_contents(client):
+    _create_initiative(client, "施策1")
+    response = client.get("/initiatives/?limit=10")
+    etag = response.headers["ETag"]
+
+    with count_queries(engine) as counter:
+        response = client.get("/initiatives/?limit=10", headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert counter.count == 1
+
+    # ページに行が加わると ETag が変わる
+    _create_initiative(client, "施策2")
+    response = client.get("/initiatives/?limit=10", headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.json()) == 2
+    # 別のページ（条件）の ETag は異なる
+    assert client.get("/initiatives/?limit=1").headers["ETag"] != response.headers["ETag"]
+
+def test_development_and_release_routes(client):
+    initiative_id = _create_initiative(client)
+    requirement_id = client.post(
+        "/development/requirements/",
+        json={"initiative_id": initiative_id, "title": "要件", "description": "説明", "status": "DRAFT"}
+    ).json()["id"]
+    task_id = client.post(
+        "/development/tasks/",
+        json={"requirement_id": requirement_id, "title": "タスク", "description": "説明", "status": "TODO"}
+    ).json()["id"]
+    release_id = client.post(
+        "/releases/",
+        json={
+            "version": "1.0.0", "description": "リリース", "status": "PENDING_APPROVAL",
+            "planned_date": (datetime.utcnow() + timedelta(days=7)).isoformat()
+        }
+    ).json()["id"]
+    for path in [
+        f"/development/requirements/{requirement_id}",
+        f"/development/requirements/?initiative_id={initiative_id}",
+        f"/development/tasks/{task_id}",
+        f"/development/tasks/?requirement_id={requirement_id}",
+        f"/releases/{release_id}",
+        "/releases/?status=PENDING_APPROVAL",
+    ]:
+        etag = client.get(path).headers["ETag"]
+        response = client.get(path, headers={"If-None-Match": etag})
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED, path
+
+    # 承認でフィルター条件から外れると一覧の ETag も変わる
+    etag = client.get("/releases/?status=PENDING_APPROVAL").headers["ETag"]
+    client.put(f"/releases/{release_id}/approve")
+    response = client.get("/releases/?status=PENDING_APPROVAL", headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == []
+
+def test_terms_validators(client):
+    terms_id = client.post(
+        "/terms/",
+        json={
+            "version": "1.0.0",
+            "content": "これはテスト用の利用規約です。",
+            "effective_date": (datetime.utcnow() - timedelta(days=1)).isoformat()
+        }
+    ).json()["id"]
+    etag = client.get(f"/terms/{terms_id}").headers["ETag"]
+    assert client.get("/terms/").headers["ETag"] != etag
+    assert client.get(f"/terms/{terms_id}", headers={"If-None-Match": etag}).status_code == status.HTTP_304_NOT_MODIFIED
+
+    # 最新の利用規約はキャッシュから検証子を求めるので、DBにアクセスしない
+    assert client.get("/terms/latest").headers["ETag"] == etag
+    with count_queries(engine) as counter:
+        response = client.get("/terms/latest", headers={"If-None-Match": f'"other", {etag}'})
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert counter.count == 0
@@ -0,0 +1,78 @@
+import json
+import pytest
+from sqlalchemy import text
+
+from ..app.config import load_settings
+from ..app.database import create_database_engine, database_report
+from ..app.schemas.schemas import IngestDurability
+
+def test_default_settings():
+    settings = load_settings(environ={})
+    assert settings.database.url == "sqlite:///./improvement_initiatives.db"
+    assert settings.database.profile == "default"
+    assert settings.database.pragmas() == {}
+    assert settings.use_async_db is False
+
+def test_profile_file_and_environment_precedence(tmp_path):
+    settings_file = tmp_path / "settings.json"
+    settings_file.write_text(json.dumps({
+        "database": {"profile": "performance", "synchronous": "FULL", "busy_timeout": 1000},
+        "use_async_db": True
+    }))
+
+    settings = load_settings(
+        environ={"DB_BUSY_TIMEOUT": "2500", "DB_POOL_SIZE": "20"},
+        settings_file=str(settings_file)
+    )
+    database = settings.database
+    assert database.profile == "performance"
+    # プロファイルの値を設定ファイルが、設定ファイルの値を環境変数が上書きする
+    assert database.journal_mode == "WAL"
+    assert database.synchronous == "FULL"
+    assert database.busy_timeout == 2500
+    assert database.pool_size == 20
+    assert settings.use_async_db is True
+    assert database.effective_async_url == "sqlite+aiosqlite:///./improvement_initiatives.db"
+
+def test_environment_profile_overrides_file_profile(tmp_path):
+    settings_file = tmp_path / "settings.json"
+    settings_file.write_text(json.dumps({"database": {"profile": "durable"}}))
+
+    database = load_settings(environ={"DB_PROFILE": "performance"}, settings_file=str(settings_file)).database
+    assert database.profile == "performance"
+    assert database.synchronous == "NORMAL"
+    assert database.mmap_size == 268435456
+
+def test_unknown_profile_is_rejected():
+    with pytest.raises(ValueError):
+        load_settings(environ={"DB_PROFILE": "turbo"})
+
+def test_effect_ingest_durability_is_parsed_at_load(tmp_path):
+    assert load_settings(environ={}).effect_ingest_durability is IngestDurability.COMMIT
+    settings = load_settings(environ={"EFFECT_INGEST_DURABILITY": "buffer"})
+    assert settings.effect_ingest_durability is IngestDurability.BUFFER
+
+    settings_file = tmp_path / "settings.json"
+    settings_file.write_text(json.dumps({"effect_ingest_durability": "eventually"}))
+    with pytest.raises(ValueError, match="eventually"):
+        load_settings(environ={}, settings_file=str(settings_file))
+    with pytest.raises(ValueError):
+        load_settings(environ={"EFFECT_INGEST_DURABILITY": "fsync"})
+
+def test_pragmas_are_applied_on_connect(tmp_path):
+    settings = load_settings(environ={
+        "DB_PROFILE": "performance",
+        "DB_URL": f"sqlite:///{tmp_path / 'pragma.db'}",
+        "DB_POOL_CLASS": "null",
+    })
+    engine = create_database_engine(settings.database)
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+        assert conn.execute(text("PRAGMA temp_store")).scalar() == 2  # MEMORY
+
+    report = database_report(settings.database, engine)
+    assert report["pool_class"] == "NullPool"
+    assert report["pragmas"]["journal_mode"] == "WAL"
+    engine.dispose()
@@ -1,5 +1,7 @@
 import pytest
+import json
 from fastapi import status
+from ..app.routers import development as development_router
 
 def create_test_initiative(client):
     response = client.post(
@@ -200,3 +202,102 @@ def test_create_task_for_nonexistent_requirement(client):
         }
     )
     assert response.status_code == status.HTTP_404_NOT_FOUND
+
+def test_export_requirements_and_tasks(client):
+    initiative_id = create_test_initiative(client)
+    requirement_ids = [
+        client.post(
+            "/development/requirements/",
+            json={
+                "initiative_id": initiative_id,
+                "title": f"テスト要件{i}",
+                "description": "これはテスト用の要件定義です",
+                "status": "DRAFT"
+            }
+        ).json()["id"]
+        for i in range(2)
+    ]
+    for requirement_id in requirement_ids:
+        client.post(
+            "/development/tasks/",
+            json={
+                "requirement_id": requirement_id,
+                "title": "テストタスク",
+                "description": "これはテスト用の開発タスクです",
+                "status": "TODO"
+            }
+        )
+
+    response = client.get(f"/development/requirements/export?initiative_id={initiative_id}")
+    assert response.status_code == status.HTTP_200_OK
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["id"] for row in rows] == requirement_ids
+
+    response = client.get(f"/development/tasks/export?requirement_id={requirement_ids[1]}")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert len(rows) == 1
+    assert rows[0]["requirement_id"] == requirement_ids[1]
+
+def test_create_requirements_and_tasks_bulk(client):
+    initiative_id = create_test_initiative(client)
+    response = client.post(
+        "/development/requirements/bulk",
+        json=[
+            {"initiative_id": initiative_id, "title": "要件1", "description": "説明", "status": "DRAFT"},
+            {"initiative_id": 999, "title": "要件2", "description": "説明", "status": "DRAFT"},
+            {"initiative_id": initiative_id, "title": "要件3", "description": "説明", "status": "REVIEW"},
+        ]
+    )
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["created"] == 2
+    assert data["failed"] == 1
+    assert [item["index"] for item in data["results"]] == [0, 1, 2]
+    assert data["results"][1] == {"index": 1, "id": None, "error": "Initiative not found"}
+    first_id, third_id = data["results"][0]["id"], data["results"][2]["id"]
+    # 作成したIDは入力順の要素に対応する
+    assert client.get(f"/development/requirements/{first_id}").json()["title"] == "要件1"
+    assert client.get(f"/development/requirements/{third_id}").json()["status"] == "REVIEW"
+
+    response = client.post(
+        "/development/tasks/bulk",
+        json=[
+            {"requirement_id": third_id, "title": f"タスク{i}", "description": "説明", "status": "TODO"}
+            for i in range(5)
+        ] + [{"requirement_id": 999, "title": "タスク", "description": "説明", "status": "TODO"}]
+    )
+    data = response.json()
+    assert data["created"] == 5
+    assert data["results"][5]["error"] == "Requirement not found"
+    task_ids = [item["id"] for item in data["results"][:5]]
+    tasks = client.get(f"/development/requirements/{third_id}/tasks").json()
+    assert {task["id"]: task["title"] for task in tasks} == {
+        task_id: f"タスク{i}" for i, task_id in enumerate(task_ids)
+    }
+
+def test_create_bulk_limits(client, monkeypatch):
+    monkeypatch.setattr(development_router, "BULK_CREATE_MAX_ITEMS", 1)
+    task = {"requirement_id": 1, "title": "タスク", "description": "説明", "status": "TODO"}
+    response = client.post("/development/tasks/bulk", json=[task, task])
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    response = client.post("/development/tasks/bulk", json=[])
+    assert response.json() == {"created": 0, "failed": 0, "results": []}
+
+def test_update_requirement_statuses_bulk(client):
+    initiative_id = create_test_initiative(client)
+    ids = [
+        item["id"] for item in client.post(
+            "/development/requirements/bulk",
+            json=[
+                {"initiative_id": initiative_id, "title": f"要件{i}", "description": "説明", "status": "DRAFT"}
+                for i in range(3)
+            ]
+        ).json()["results"]
+    ]
+    response = client.put("/development/requirements/bulk/status", json={"ids": ids[:2] + [999], "status": "APPROVED"})
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["updated"] == 2
+    assert [item["outcome"] for item in data["results"]] == ["updated", "updated", "not_found"]
+    statuses = [client.get(f"/development/requirements/{i}").json()["status"] for i in ids]
+    assert statuses == ["APPROVED", "APPROVED", "DRAFT"]
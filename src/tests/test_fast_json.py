@@ -0,0 +1,84 @@
+from typing import List
+from pydantic import TypeAdapter
+
+from .conftest import TestingSessionLocal
+from ..app.config import settings
+from ..app.fast_json import row_serializer
+from ..app.models import models
+from ..app.schemas import schemas
+
+LIST_URLS = [
+    "/initiatives/?limit=2",
+    "/initiatives/?limit=100",
+    "/development/requirements/?limit=100",
+    "/development/requirements/?initiative_id=1",
+    "/development/tasks/?limit=1",
+    "/development/tasks/?requirement_id=1",
+    "/development/requirements/1/tasks",
+    "/releases/?limit=100",
+    "/releases/?status=PENDING_APPROVAL",
+    "/releases/1/rollbacks",
+    "/releases/pending/approval",
+    "/terms/?limit=100",
+    "/terms/?include_content=true",
+]
+
+def _seed(client):
+    for i in range(3):
+        client.post("/initiatives/", json={
+            "title": f"施策{i}", "description": "説明 \"引用\" \\ 改行\n", "irr": 5 + i / 3, "cost": 100
+        })
+    client.put("/initiatives/2/status", json={"status": "APPROVED"})
+    for i in range(2):
+        client.post("/development/requirements/", json={
+            "initiative_id": 1, "title": f"要件{i}", "description": "説明", "status": "DRAFT"
+        })
+        client.post("/development/tasks/", json={
+            "requirement_id": 1, "title": f"タスク{i}", "description": "説明", "status": "TODO"
+        })
+    for version, release_status in (("1.0.0", "COMPLETED"), ("1.1.0", "PENDING_APPROVAL")):
+        client.post("/releases/", json={
+            "version": version, "description": "説明", "status": "PLANNED", "planned_date": "2024-01-01T00:00:00"
+        })
+    client.put("/releases/1/status", json={"status": "COMPLETED"})
+    client.put("/releases/2/status", json={"status": "PENDING_APPROVAL"})
+    client.post("/releases/1/rollback", json={"release_id": 1, "reason": "障害"})
+    client.post("/terms/", json={
+        "version": "1.0", "content": "第1条 🙂 <b>&</b>", "effective_date": "2024-01-01T00:00:00"
+    })
+
+def test_fast_json_output_is_identical(client, monkeypatch):
+    _seed(client)
+    for url in LIST_URLS:
+        monkeypatch.setattr(settings, "fast_json", False)
+        expected = client.get(url)
+        monkeypatch.setattr(settings, "fast_json", True)
+        actual = client.get(url)
+        assert actual.status_code == expected.status_code == 200, url
+        assert actual.json(), url
+        assert actual.content == expected.content, url
+        for header in ("content-type", "content-length", "etag", "last-modified", "x-next-cursor"):
+            assert actual.headers.get(header) == expected.headers.get(header), (url, header)
+
+def test_fast_json_not_found_and_conditional(client, monkeypatch):
+    _seed(client)
+    monkeypatch.setattr(settings, "fast_json", True)
+    assert client.get("/development/requirements/999/tasks").status_code == 404
+    assert client.get("/releases/999/rollbacks").status_code == 404
+    etag = client.get("/initiatives/").headers["ETag"]
+    assert client.get("/initiatives/", headers={"If-None-Match": etag}).status_code == 304
+
+def test_row_serializer_matches_response_model(client):
+    _seed(client)
+    with TestingSessionLocal() as db:
+        for model, schema in (
+            (models.Initiative, schemas.Initiative),
+            (models.Release, schemas.Release),
+            (models.ReleaseRollback, schemas.ReleaseRollback),
+        ):
+            serializer = row_serializer(model, schema)
+            rows = db.query(*serializer.columns).order_by(model.id).all()
+            adapter = TypeAdapter(List[schema])
+            objects = db.query(model).order_by(model.id).all()
+            assert serializer.dump_json(rows) == adapter.dump_json(adapter.validate_python(objects))
+    assert row_serializer(models.Release, schemas.Release) is row_serializer(models.Release, schemas.Release)
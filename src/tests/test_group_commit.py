@@ -0,0 +1,88 @@
+import threading
+import pytest
+from sqlalchemy import text
+
+from .conftest import TestingSessionLocal, engine
+from ..app.group_commit import GroupCommitWriter
+from ..app.query_budget import count_queries
+
+def _recording_writer(batches, **options):
+    def apply_batch(session, items):
+        session.execute(text("SELECT 1"))
+        batches.append(list(items))
+        return [item * 2 for item in items]
+    return GroupCommitWriter("test", apply_batch, TestingSessionLocal, **options)
+
+def test_writes_are_grouped_into_one_commit(db):
+    batches = []
+    writer = _recording_writer(batches, max_batch_rows=100, max_delay_ms=200)
+    try:
+        pending = writer.submit_many(list(range(10)))
+        assert [write.result(5) for write in pending] == [item * 2 for item in range(10)]
+    finally:
+        writer.stop()
+    assert batches == [list(range(10))]
+    assert [write.sequence for write in pending] == list(range(1, 11))
+    assert writer.stats()["committed_sequence"] == 10
+
+def test_full_batch_is_committed_without_waiting(db):
+    batches = []
+    # 待ち時間が長くても max_batch_rows 件たまれば直ちにコミットする
+    writer = _recording_writer(batches, max_batch_rows=3, max_delay_ms=60_000)
+    try:
+        pending = writer.submit_many(list(range(6)))
+        for write in pending:
+            write.result(5)
+    finally:
+        writer.stop()
+    assert batches == [[0, 1, 2], [3, 4, 5]]
+
+def test_concurrent_submitters_share_batches(db):
+    batches = []
+    writer = _recording_writer(batches, max_batch_rows=1000, max_delay_ms=100)
+    results = {}
+
+    def submit(value):
+        results[value] = writer.submit(value).result(5)
+
+    threads = [threading.Thread(target=submit, args=(value,)) for value in range(20)]
+    try:
+        with count_queries(engine) as counter:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+    finally:
+        writer.stop()
+    assert results == {value: value * 2 for value in range(20)}
+    assert len(batches) < 20
+    assert counter.count == len(batches)
+
+def test_failed_batch_sets_exception_on_every_write(db):
+    def apply_batch(session, items):
+        raise RuntimeError("boom")
+
+    writer = GroupCommitWriter("test", apply_batch, TestingSessionLocal, max_delay_ms=1)
+    try:
+        pending = writer.submit_many([1, 2])
+        for write in pending:
+            with pytest.raises(RuntimeError, match="boom"):
+                write.result(5)
+    finally:
+        writer.stop()
+    stats = writer.stats()
+    assert stats["failed_batches"] == 1
+    assert stats["committed_sequence"] == 0
+
+def test_stop_flushes_pending_writes_and_writer_restarts(db):
+    batches = []
+    writer = _recording_writer(batches, max_delay_ms=60_000)
+    pending = writer.submit(1)
+    writer.stop()
+    assert pending.result(0) == 2
+
+    # 停止後の投入では書き込みスレッドを起動し直す
+    pending = writer.submit(2)
+    writer.stop()
+    assert pending.result(0) == 4
+    assert batches == [[1], [2]]
@@ -1,6 +1,17 @@
 import pytest
 from fastapi import status
-from datetime import datetime
+from fastapi.testclient import TestClient
+import json
+import numpy as np
+from datetime import datetime, timedelta
+from .conftest import engine
+from ..app import optimizer, sketches, streaming
+from ..app.ingestion import effect_writer
+from ..app.main import app
+from ..app.models import models
+from ..app.query_budget import count_queries
+from ..app.rollups import apply_effect_rollups, query_effect_timeseries, truncate
+from ..app.sketches import apply_effect_sketches, query_effect_quantiles
 
 def test_create_initiative(client):
     response = client.post(
@@ -163,3 +174,506 @@ def test_create_initiative_invalid_cost(client):
         }
     )
     assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+def test_list_initiatives_cursor_pagination(client):
+    for i in range(5):
+        client.post(
+            "/initiatives/",
+            json={
+                "title": f"テスト施策{i}",
+                "description": f"これはテスト用の改善施策{i}です",
+                "irr": 7.5,
+                "cost": 500000
+            }
+        )
+
+    # カーソルをたどって全件を取得する
+    titles = []
+    response = client.get("/initiatives/?limit=2")
+    while True:
+        assert response.status_code == status.HTTP_200_OK
+        titles.extend(item["title"] for item in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+        response = client.get(f"/initiatives/?limit=2&cursor={cursor}")
+    assert titles == [f"テスト施策{i}" for i in range(5)]
+
+    response = client.get("/initiatives/?cursor=invalid")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+def test_export_initiatives_and_effects(client, monkeypatch):
+    # 複数バッチに分かれることを確認するため、バッチを小さくする
+    monkeypatch.setattr(streaming, "EXPORT_BATCH_SIZE", 2)
+    initiative_ids = [
+        client.post(
+            "/initiatives/",
+            json={
+                "title": f"テスト施策{i}",
+                "description": f"これはテスト用の改善施策{i}です",
+                "irr": 7.5,
+                "cost": 500000
+            }
+        ).json()["id"]
+        for i in range(5)
+    ]
+    for initiative_id in initiative_ids[:2]:
+        client.post(
+            f"/initiatives/{initiative_id}/effects",
+            json={
+                "initiative_id": initiative_id,
+                "metric_name": "コスト削減率",
+                "metric_value": 15.5
+            }
+        )
+
+    response = client.get("/initiatives/export")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["id"] for row in rows] == initiative_ids
+    assert rows[0]["title"] == "テスト施策0"
+
+    response = client.get(f"/initiatives/effects/export?initiative_id={initiative_ids[1]}")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert len(rows) == 1
+    assert rows[0]["initiative_id"] == initiative_ids[1]
+
+def _create_initiative_tree(client, requirements, tasks_per_requirement):
+    initiative_id = client.post(
+        "/initiatives/",
+        json={"title": "ドシエ施策", "description": "説明", "irr": 7.5, "cost": 500000}
+    ).json()["id"]
+    client.post(
+        f"/initiatives/{initiative_id}/assessments",
+        json={"initiative_id": initiative_id, "feasibility_score": 80, "compliance_check": True, "terms_impact": False}
+    )
+    client.post(
+        f"/initiatives/{initiative_id}/effects",
+        json={"initiative_id": initiative_id, "metric_name": "コスト削減率", "metric_value": 12.5}
+    )
+    for r in range(requirements):
+        requirement_id = client.post(
+            "/development/requirements/",
+            json={"initiative_id": initiative_id, "title": f"要件{r}", "description": "説明", "status": "DRAFT"}
+        ).json()["id"]
+        for t in range(tasks_per_requirement):
+            client.post(
+                "/development/tasks/",
+                json={"requirement_id": requirement_id, "title": f"タスク{t}", "description": "説明", "status": "TODO"}
+            )
+    return initiative_id
+
+def test_get_initiative_dossier(client):
+    initiative_id = _create_initiative_tree(client, requirements=2, tasks_per_requirement=3)
+
+    response = client.get(f"/initiatives/{initiative_id}/dossier")
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["status"] == "UNDER_REVIEW"
+    assert len(data["assessments"]) == 1
+    assert data["effects"][0]["metric_value"] == 12.5
+    assert [r["title"] for r in data["requirements"]] == ["要件0", "要件1"]
+    assert all(len(r["development_tasks"]) == 3 for r in data["requirements"])
+
+    assert client.get("/initiatives/999/dossier").status_code == status.HTTP_404_NOT_FOUND
+
+def test_get_initiative_dossiers_keeps_requested_order(client):
+    first = _create_initiative_tree(client, requirements=1, tasks_per_requirement=1)
+    second = _create_initiative_tree(client, requirements=0, tasks_per_requirement=0)
+
+    response = client.get(f"/initiatives/dossiers?ids={second}&ids=999&ids={first}")
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert [d["id"] for d in data] == [second, first]
+    assert data[0]["requirements"] == []
+    assert len(data[1]["requirements"][0]["development_tasks"]) == 1
+
+    too_many = "&".join(f"ids={i}" for i in range(101))
+    assert client.get(f"/initiatives/dossiers?{too_many}").status_code == status.HTTP_400_BAD_REQUEST
+
+def test_dossier_query_count_is_constant(client):
+    small = _create_initiative_tree(client, requirements=1, tasks_per_requirement=1)
+    with count_queries(engine) as small_counter:
+        client.get(f"/initiatives/dossiers?ids={small}")
+
+    large = [_create_initiative_tree(client, requirements=5, tasks_per_requirement=4) for _ in range(3)]
+    with count_queries(engine) as large_counter:
+        response = client.get("/initiatives/dossiers?" + "&".join(f"ids={i}" for i in large + [small]))
+    assert len(response.json()) == 4
+
+    # 施策・評価・効果・要件・タスクの各階層1本ずつ
+    assert small_counter.count == large_counter.count == 5
+
+def test_portfolio_analytics(client):
+    for title, irr, cost in [("A", 10.0, 100.0), ("B", 20.0, 300.0), ("C", 5.0, 600.0)]:
+        client.post("/initiatives/", json={"title": title, "description": "説明", "irr": irr, "cost": cost})
+    client.put("/initiatives/2/status", json={"status": "APPROVED"})
+
+    response = client.get("/initiatives/analytics?top_k=2&bins=3")
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["count"] == 3
+    assert data["total_cost"] == 1000.0
+    assert data["cost_weighted_irr"] == pytest.approx((10 * 100 + 20 * 300 + 5 * 600) / 1000)
+    assert [(r["id"], r["status"]) for r in data["top_by_irr"]] == [(2, "APPROVED"), (1, "PROPOSED")]
+    assert data["cost_histogram"]["edges"] == pytest.approx([100.0, 100 + 500 / 3, 100 + 1000 / 3, 600.0])
+    assert data["cost_histogram"]["counts"] == [1, 1, 1]
+    by_status = {s["status"]: s for s in data["by_status"]}
+    assert by_status["PROPOSED"]["count"] == 2
+    assert by_status["PROPOSED"]["mean_irr"] == 7.5
+    assert by_status["APPROVED"]["cost_weighted_irr"] == 20.0
+
+    filtered = client.get("/initiatives/analytics?status=PROPOSED").json()
+    assert filtered["count"] == 2
+    assert {r["id"] for r in filtered["top_by_irr"]} == {1, 3}
+
+def test_portfolio_analytics_cache_invalidation(client):
+    client.post("/initiatives/", json={"title": "A", "description": "説明", "irr": 10.0, "cost": 100.0})
+    assert client.get("/initiatives/analytics").json()["count"] == 1
+    # キャッシュ済みでも作成・ステータス変更・評価の記録で再計算される
+    client.post("/initiatives/", json={"title": "B", "description": "説明", "irr": 12.0, "cost": 100.0})
+    assert client.get("/initiatives/analytics").json()["count"] == 2
+    client.put("/initiatives/1/status", json={"status": "REJECTED"})
+    assert {s["status"] for s in client.get("/initiatives/analytics").json()["by_status"]} == {"PROPOSED", "REJECTED"}
+    client.post(
+        "/initiatives/2/assessments",
+        json={"initiative_id": 2, "feasibility_score": 80, "compliance_check": True, "terms_impact": False}
+    )
+    by_status = client.get("/initiatives/analytics").json()["by_status"]
+    assert {s["status"] for s in by_status} == {"UNDER_REVIEW", "REJECTED"}
+
+def test_portfolio_analytics_empty(client):
+    data = client.get("/initiatives/analytics").json()
+    assert data["count"] == 0
+    assert data["cost_weighted_irr"] is None
+    assert data["top_by_irr"] == []
+    assert data["by_status"] == []
+
+def _create_candidates(client, rows):
+    ids = []
+    for irr, cost in rows:
+        ids.append(client.post(
+            "/initiatives/", json={"title": "候補", "description": "説明", "irr": irr, "cost": cost}
+        ).json()["id"])
+    return ids
+
+def test_optimize_portfolio_exact(client):
+    # 貪欲法（IRR順）では 1 を選んで予算が余るが、最適なのは 2 と 3 の組
+    ids = _create_candidates(client, [(30.0, 60.0), (20.0, 50.0), (20.0, 50.0)])
+    response = client.post("/initiatives/optimize", json={"budget": 100, "method": "exact"})
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["method"] == "exact"
+    assert data["selected_ids"] == [ids[1], ids[2]]
+    assert data["total_cost"] == 100.0
+    assert data["total_value"] == pytest.approx(20.0)
+    assert data["upper_bound"] >= data["total_value"]
+
+    greedy = client.post("/initiatives/optimize", json={"budget": 100, "method": "greedy"}).json()
+    assert greedy["total_cost"] <= 100
+    assert greedy["total_value"] <= data["total_value"]
+
+def test_optimize_portfolio_filters_candidates(client):
+    ids = _create_candidates(client, [(10.0, 10.0), (20.0, 10.0), (30.0, 10.0), (40.0, 10.0)])
+    client.put(f"/initiatives/{ids[3]}/status", json={"status": "APPROVED"})
+    for initiative_id, compliant in [(ids[0], True), (ids[1], True), (ids[1], False)]:
+        client.post(
+            f"/initiatives/{initiative_id}/assessments",
+            json={"initiative_id": initiative_id, "feasibility_score": 80,
+                  "compliance_check": compliant, "terms_impact": False}
+        )
+
+    data = client.post("/initiatives/optimize", json={"budget": 1000}).json()
+    assert data["method"] == "exact"
+    assert data["selected_ids"] == ids[:3]
+
+    # 最後の評価でコンプライアンス確認が取れている施策のみ
+    data = client.post("/initiatives/optimize", json={"budget": 1000, "require_compliance": True}).json()
+    assert data["candidate_count"] == 1
+    assert data["selected_ids"] == [ids[0]]
+
+def test_optimize_portfolio_exact_too_large(client, monkeypatch):
+    _create_candidates(client, [(10.0, 10.0), (20.0, 10.0)])
+    monkeypatch.setattr(optimizer, "EXACT_MAX_CELLS", 2 * 101 - 1)
+    response = client.post("/initiatives/optimize", json={"budget": 100, "method": "exact", "resolution": 100})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert "at most 201 cells" in response.json()["detail"]
+
+    response = client.post("/initiatives/optimize", json={"budget": 100, "resolution": 100})
+    assert response.json()["method"] == "greedy"
+
+def test_optimize_portfolio_invalid_budget(client):
+    response = client.post("/initiatives/optimize", json={"budget": 0})
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+def test_effect_timeseries_uses_rollups(client):
+    initiative_id = client.post(
+        "/initiatives/", json={"title": "施策", "description": "説明", "irr": 7.5, "cost": 500000}
+    ).json()["id"]
+    for value in [10.0, 30.0, 20.0]:
+        client.post(
+            f"/initiatives/{initiative_id}/effects",
+            json={"initiative_id": initiative_id, "metric_name": "コスト削減率", "metric_value": value}
+        )
+    client.post(
+        f"/initiatives/{initiative_id}/effects",
+        json={"initiative_id": initiative_id, "metric_name": "売上増加率", "metric_value": 99.0}
+    )
+
+    now = datetime.utcnow()
+    month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    next_month = (month_start + timedelta(days=32)).replace(day=1)
+    expected = {"count": 3, "sum": 60.0, "min": 10.0, "max": 30.0, "mean": 20.0, "last_value": 20.0}
+
+    def timeseries(start, end, step):
+        response = client.get(
+            f"/initiatives/{initiative_id}/effects/timeseries",
+            params={"metric_name": "コスト削減率", "start": start.isoformat(), "end": end.isoformat(), "step": step}
+        )
+        assert response.status_code == status.HTTP_200_OK
+        return response.json()
+
+    # 月境界に揃った範囲は月次ロールアップから読む
+    data = timeseries(month_start, next_month, "month")
+    assert data["source"] == "month"
+    assert len(data["points"]) == 1
+    assert {k: data["points"][0][k] for k in expected} == expected
+
+    # 日次の要求は月の範囲でも日次ロールアップから読む
+    data = timeseries(month_start, next_month, "day")
+    assert data["source"] == "day"
+    assert sum(p["count"] for p in data["points"]) == 3
+
+    # 1時間単位に揃っていない範囲は生の効果測定を集計する
+    data = timeseries(now - timedelta(minutes=30), now + timedelta(minutes=30), "hour")
+    assert data["source"] == "raw"
+    assert sum(p["count"] for p in data["points"]) == 3
+    assert max(p["max"] for p in data["points"]) == 30.0
+
+def _raw_timeseries(effects, start, end, step):
+    points = {}
+    for effect in sorted(effects, key=lambda effect: effect.measurement_date):
+        if start <= effect.measurement_date < end:
+            point = points.setdefault(truncate(effect.measurement_date, step), [])
+            point.append(effect.metric_value)
+    return [
+        {"bucket_start": key, "count": len(values), "sum": sum(values), "min": min(values), "max": max(values),
+         "last_value": values[-1], "mean": sum(values) / len(values)}
+        for key, values in sorted(points.items())
+    ]
+
+def test_effect_timeseries_rollups_match_raw(db):
+    base = datetime(2024, 1, 30, 22, 15)
+    effects = [
+        models.InitiativeEffect(
+            initiative_id=1, metric_name="顧客満足度", metric_value=float(i % 7),
+            measurement_date=base + timedelta(hours=5 * i) + timedelta(minutes=7 * (i % 5))
+        )
+        for i in range(40)
+    ]
+    db.add_all(effects)
+    # 一括と逐次の反映が同じ結果になるよう2回に分けて反映する
+    apply_effect_rollups(db, effects[:25])
+    for effect in effects[25:]:
+        apply_effect_rollups(db, [effect])
+    db.commit()
+
+    start, end = datetime(2024, 1, 1), datetime(2024, 4, 1)
+    for step in ["hour", "day", "month"]:
+        source, points = query_effect_timeseries(db, 1, "顧客満足度", start, end, step)
+        assert source == step
+        assert points == pytest.approx(_raw_timeseries(effects, start, end, step))
+
+    # 境界に揃わない範囲は中央をロールアップ、1時間に満たない両端だけを生の効果測定から読む
+    start, end = datetime(2024, 1, 31, 3, 40), datetime(2024, 2, 7, 16, 20)
+    for step, expected_source in [("hour", "hour+raw"), ("day", "day+hour+raw"), ("month", "day+hour+raw")]:
+        source, points = query_effect_timeseries(db, 1, "顧客満足度", start, end, step)
+        assert source == expected_source
+        assert points == pytest.approx(_raw_timeseries(effects, start, end, step))
+
+def test_effect_timeseries_invalid_range(client):
+    response = client.get(
+        "/initiatives/1/effects/timeseries",
+        params={"metric_name": "m", "start": "2024-02-01T00:00:00", "end": "2024-01-01T00:00:00"}
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    response = client.get(
+        "/initiatives/1/effects/timeseries",
+        params={"metric_name": "m", "start": "2000-01-01T00:00:00", "end": "2024-01-01T00:00:00", "step": "hour"}
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+def test_effect_quantiles(client):
+    initiative_ids = [
+        client.post("/initiatives/", json={"title": f"施策{i}", "description": "説明", "irr": 5.0, "cost": 100.0}).json()["id"]
+        for i in range(2)
+    ]
+    # 施策をまたいで指標ごとに集計する
+    for value in range(1, 101):
+        initiative_id = initiative_ids[value % 2]
+        client.post(
+            f"/initiatives/{initiative_id}/effects",
+            json={"initiative_id": initiative_id, "metric_name": "顧客満足度", "metric_value": float(value)}
+        )
+    client.post(
+        f"/initiatives/{initiative_ids[0]}/effects",
+        json={"initiative_id": initiative_ids[0], "metric_name": "売上増加率", "metric_value": 1000.0}
+    )
+
+    response = client.get(
+        "/initiatives/effects/quantiles",
+        params={"metric_name": "顧客満足度", "start": "2000-01-01T00:00:00", "end": "2100-01-01T00:00:00",
+                "q": [0.5, 0.9, 0.99]}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["source"] == "month"
+    assert data["count"] == 100
+    # 100件ではスケッチの圧縮が起きないので厳密
+    assert data["rank_error"] == 0.0
+    assert data["quantiles"] == [{"q": 0.5, "value": 50.0}, {"q": 0.9, "value": 90.0}, {"q": 0.99, "value": 99.0}]
+
+    # 1時間単位に揃っていない範囲は生の効果測定から計算する
+    now = datetime.utcnow()
+    response = client.get(
+        "/initiatives/effects/quantiles",
+        params={"metric_name": "顧客満足度", "start": (now - timedelta(minutes=30)).isoformat(),
+                "end": (now + timedelta(minutes=30)).isoformat(), "q": [0.5]}
+    )
+    data = response.json()
+    assert data["source"] == "raw"
+    assert data["quantiles"] == [{"q": 0.5, "value": 50.0}]
+
+    response = client.get(
+        "/initiatives/effects/quantiles",
+        params={"metric_name": "顧客満足度", "start": "2000-01-01T00:00:00", "end": "2100-01-01T00:00:00", "q": [1.5]}
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+def test_effect_quantiles_unaligned_window(db):
+    sketches._rng.seed(0)
+    rng = np.random.default_rng(0)
+    base = datetime(2024, 3, 1)
+    effects = [
+        models.InitiativeEffect(
+            initiative_id=1, metric_name="顧客満足度", metric_value=float(value),
+            measurement_date=base + timedelta(seconds=int(offset))
+        )
+        for value, offset in zip(rng.lognormal(0, 1, 5000), rng.uniform(0, 10 * 86400, 5000))
+    ]
+    db.add_all(effects)
+    apply_effect_sketches(db, effects)
+    db.commit()
+
+    # 中央は日・時間のスケッチ、1時間に満たない両端だけを生の効果測定から読む
+    start, end = datetime(2024, 3, 2, 5, 40), datetime(2024, 3, 9, 18, 25)
+    result = query_effect_quantiles(db, "顧客満足度", start, end, [0.01, 0.1, 0.5, 0.9, 0.99])
+    assert result["source"] == "day+hour+raw"
+    window = np.sort([e.metric_value for e in effects if start <= e.measurement_date < end])
+    assert result["count"] == len(window)
+    assert result["rank_error"] > 0
+    for q, estimate in zip([0.01, 0.1, 0.5, 0.9, 0.99], result["values"]):
+        rank = np.searchsorted(window, estimate, side="right") / len(window)
+        assert abs(rank - q) <= result["rank_error"]
+
+def test_ingest_effects_with_commit_durability(client):
+    initiative_id = client.post(
+        "/initiatives/", json={"title": "施策", "description": "説明", "irr": 5.0, "cost": 100.0}
+    ).json()["id"]
+    response = client.post(
+        "/initiatives/effects/ingest?durability=commit",
+        json=[
+            {"initiative_id": initiative_id, "metric_name": "顧客満足度", "metric_value": 1.0},
+            {"initiative_id": 9999, "metric_name": "顧客満足度", "metric_value": 2.0},
+            {"initiative_id": initiative_id, "metric_name": "顧客満足度", "metric_value": 3.0},
+        ]
+    )
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    data = response.json()
+    assert data["last_sequence"] - data["first_sequence"] == 2
+    assert data["count"] == 3
+    assert data["committed"] is True
+    # 存在しない施策の効果測定は反映されない
+    assert data["rejected"] == [1]
+
+    # 効果測定・ロールアップ・スケッチにまとめて反映されている
+    effects = client.get(f"/initiatives/{initiative_id}/dossier").json()["effects"]
+    assert sorted(effect["metric_value"] for effect in effects) == [1.0, 3.0]
+    series = client.get(
+        f"/initiatives/{initiative_id}/effects/timeseries",
+        params={"metric_name": "顧客満足度", "start": "2000-01-01T00:00:00", "end": "2100-01-01T00:00:00", "step": "month"}
+    ).json()
+    assert sum(point["count"] for point in series["points"]) == 2
+    quantiles = client.get(
+        "/initiatives/effects/quantiles",
+        params={"metric_name": "顧客満足度", "start": "2000-01-01T00:00:00", "end": "2100-01-01T00:00:00"}
+    ).json()
+    assert quantiles["count"] == 2
+
+    stats = client.get("/initiatives/effects/ingest/status").json()
+    assert stats["committed_sequence"] >= data["last_sequence"]
+    assert stats["pending"] == 0
+
+def test_ingest_effects_with_buffer_durability(client):
+    initiative_id = client.post(
+        "/initiatives/", json={"title": "施策", "description": "説明", "irr": 5.0, "cost": 100.0}
+    ).json()["id"]
+    acks = [
+        client.post(
+            "/initiatives/effects/ingest",
+            params={"durability": "buffer"},
+            json=[{"initiative_id": initiative_id, "metric_name": "顧客満足度", "metric_value": float(value)}]
+        ).json()
+        for value in range(5)
+    ]
+    assert all(ack["committed"] is False for ack in acks)
+    # 連番は投入順に増える
+    assert [ack["first_sequence"] for ack in acks] == sorted({ack["first_sequence"] for ack in acks})
+
+    effect_writer.flush()
+    assert effect_writer.stats()["committed_sequence"] >= acks[-1]["last_sequence"]
+    effects = client.get(f"/initiatives/{initiative_id}/dossier").json()["effects"]
+    assert len(effects) == 5
+
+def test_ingest_effects_flushes_on_shutdown(db):
+    with TestClient(app) as client:
+        initiative_id = client.post(
+            "/initiatives/", json={"title": "施策", "description": "説明", "irr": 5.0, "cost": 100.0}
+        ).json()["id"]
+        # 次のバッチまで十分長く待たせ、終了時のフラッシュでコミットされることを確認する
+        effect_writer.max_delay_ms = 60_000
+        try:
+            client.post(
+                "/initiatives/effects/ingest?durability=buffer",
+                json=[{"initiative_id": initiative_id, "metric_name": "顧客満足度", "metric_value": 1.0}]
+            )
+        finally:
+            effect_writer.max_delay_ms = 50.0
+    assert db.query(models.InitiativeEffect).count() == 1
+
+def test_ingest_effects_validation(client):
+    response = client.post("/initiatives/effects/ingest", json=[])
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    response = client.post(
+        "/initiatives/effects/ingest?durability=eventually",
+        json=[{"initiative_id": 1, "metric_name": "m", "metric_value": 1.0}]
+    )
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+def test_update_initiative_statuses_bulk(client):
+    ids = [
+        client.post("/initiatives/", json={"title": f"施策{i}", "description": "説明", "irr": 5.0, "cost": 100.0}).json()["id"]
+        for i in range(3)
+    ]
+    # 集計のキャッシュを作っておき、一括変更で破棄されることを確認する
+    assert client.get("/initiatives/analytics").json()["by_status"][0]["status"] == "PROPOSED"
+
+    response = client.put("/initiatives/bulk/status", json={"ids": ids[:2] + [999], "status": "APPROVED"})
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["updated"] == 2
+    assert data["results"][2] == {"id": 999, "outcome": "not_found", "error": "Initiative not found"}
+    assert [client.get(f"/initiatives/{i}").json()["status"] for i in ids] == ["APPROVED", "APPROVED", "PROPOSED"]
+    by_status = {item["status"]: item["count"] for item in client.get("/initiatives/analytics").json()["by_status"]}
+    assert by_status == {"PROPOSED": 1, "APPROVED": 2}
@@ -0,0 +1,57 @@
+import re
+from fastapi import status
+
+from ..app.metrics import Histogram
+
+def _sample(text, name, **labels):
+    """Prometheus テキストから指定したラベルのサンプル値を取得する"""
+    for line in text.splitlines():
+        match = re.match(r"^(\w+)(?:\{(.*)\})? (\S+)$", line)
+        if not match or match.group(1) != name:
+            continue
+        found = dict(re.findall(r'(\w+)="((?:[^"\\]|\\.)*)"', match.group(2) or ""))
+        if found == {k: str(v) for k, v in labels.items()}:
+            return float(match.group(3))
+    return 0.0
+
+def test_metrics_endpoint_records_route_latency(client):
+    before = client.get("/metrics").text
+    labels = {"method": "GET", "route": "/initiatives/{initiative_id}"}
+
+    initiative_id = client.post(
+        "/initiatives/",
+        json={"title": "テスト施策", "description": "説明", "irr": 7.5, "cost": 500000}
+    ).json()["id"]
+    client.get(f"/initiatives/{initiative_id}")
+    client.get("/initiatives/999")
+    client.get("/no/such/path")
+
+    response = client.get("/metrics")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+
+    for status_code in ("200", "404"):
+        count = "http_request_duration_seconds_count"
+        assert _sample(text, count, **labels, status=status_code) == \
+            _sample(before, count, **labels, status=status_code) + 1
+    assert _sample(
+        text, "http_request_duration_seconds_count", method="GET", route="<unmatched>", status="404"
+    ) >= 1
+    # DB時間はルートごとに記録される
+    db_labels = {"method": "GET", "route": "/initiatives/{initiative_id}"}
+    assert _sample(text, "http_request_db_duration_seconds_sum", **db_labels) > \
+        _sample(before, "http_request_db_duration_seconds_sum", **db_labels)
+    # /metrics 自身を処理中のため1件
+    assert _sample(text, "http_requests_in_flight") == 1
+    assert "latest_terms_cache_hits_total" in text
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("test_seconds", "Test.", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(("/x",), value)
+    lines = histogram.render()
+    assert 'test_seconds_bucket{route="/x",le="0.1"} 2' in lines
+    assert 'test_seconds_bucket{route="/x",le="1.0"} 3' in lines
+    assert 'test_seconds_bucket{route="/x",le="+Inf"} 4' in lines
+    assert 'test_seconds_count{route="/x"} 4' in lines
@@ -0,0 +1,164 @@
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import Session, undefer
+
+from ..app.database import Base
+from ..app.migrations import MIGRATIONS, get_schema_version, migrate
+from ..app.models import models
+from ..app.sketches import KllSketch
+from ..app.terms_content import CODEC_DELTA, CODEC_ZLIB, load_contents
+
+NEW_INDEXES = [
+    "ix_initiatives_status",
+    "ix_initiative_assessments_initiative_id",
+    "ix_initiative_effects_initiative_id",
+    "ix_terms_of_service_effective_date",
+    "ix_requirements_initiative_id",
+    "ix_development_tasks_requirement_id",
+    "ix_releases_status",
+    "ix_release_rollbacks_release_id",
+    "uq_terms_agreements_terms_id_member_id",
+    "ix_initiative_effects_metric_name_measurement_date",
+]
+
+SENTINEL_TABLES = ["requirements", "development_tasks"]
+
+def _index_names(engine):
+    inspector = inspect(engine)
+    return {
+        index["name"]
+        for table in inspector.get_table_names()
+        for index in inspector.get_indexes(table)
+    }
+
+def test_migrate_legacy_database(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    Base.metadata.create_all(bind=engine)
+    # インデックス追加前のスキーマと重複した同意データを再現する
+    with engine.begin() as conn:
+        for name in NEW_INDEXES:
+            conn.execute(text(f"DROP INDEX {name}"))
+        for table in SENTINEL_TABLES:
+            conn.execute(text(f"ALTER TABLE {table} DROP COLUMN _sentinel"))
+        conn.execute(text(
+            "INSERT INTO terms_agreements (terms_id, member_id) "
+            "VALUES (1, 'm1'), (1, 'm1'), (1, 'm2'), (2, 'm1')"
+        ))
+    assert not set(NEW_INDEXES) & _index_names(engine)
+
+    assert migrate(engine) == [m.version for m in MIGRATIONS]
+    assert set(NEW_INDEXES) <= _index_names(engine)
+    for table in SENTINEL_TABLES:
+        assert "_sentinel" in {column["name"] for column in inspect(engine).get_columns(table)}
+    with engine.connect() as conn:
+        assert get_schema_version(conn) == MIGRATIONS[-1].version
+        rows = conn.execute(text(
+            "SELECT terms_id, member_id FROM terms_agreements ORDER BY id"
+        )).fetchall()
+    assert [tuple(row) for row in rows] == [(1, "m1"), (1, "m2"), (2, "m1")]
+
+    # 適用済みの移行は再実行しない
+    assert migrate(engine) == []
+    engine.dispose()
+
+def test_migrate_new_database(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'new.db'}")
+    Base.metadata.create_all(bind=engine)
+    assert migrate(engine) == [m.version for m in MIGRATIONS]
+    assert set(NEW_INDEXES) <= _index_names(engine)
+    engine.dispose()
+
+def test_migrate_backfills_effect_rollups_and_sketches(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'effects.db'}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE initiative_effect_rollups"))
+        conn.execute(text("DROP TABLE initiative_effect_sketches"))
+        conn.execute(text(
+            "INSERT INTO initiative_effects (initiative_id, metric_name, metric_value, measurement_date) VALUES "
+            "(1, 'm', 5.0, '2024-01-31 23:10:00.000000'), "
+            "(1, 'm', 7.0, '2024-01-31 23:50:00.000000'), "
+            "(1, 'm', 1.0, '2024-02-01 00:05:00.000000')"
+        ))
+
+    migrate(engine)
+    with engine.connect() as conn:
+        rows = conn.execute(text(
+            "SELECT granularity, bucket_start, count, sum, min, max, last_value "
+            "FROM initiative_effect_rollups ORDER BY granularity, bucket_start"
+        )).fetchall()
+    assert [tuple(row) for row in rows] == [
+        ("day", "2024-01-31 00:00:00.000000", 2, 12.0, 5.0, 7.0, 7.0),
+        ("day", "2024-02-01 00:00:00.000000", 1, 1.0, 1.0, 1.0, 1.0),
+        ("hour", "2024-01-31 23:00:00.000000", 2, 12.0, 5.0, 7.0, 7.0),
+        ("hour", "2024-02-01 00:00:00.000000", 1, 1.0, 1.0, 1.0, 1.0),
+        ("month", "2024-01-01 00:00:00.000000", 2, 12.0, 5.0, 7.0, 7.0),
+        ("month", "2024-02-01 00:00:00.000000", 1, 1.0, 1.0, 1.0, 1.0),
+    ]
+
+    with engine.connect() as conn:
+        rows = conn.execute(text(
+            "SELECT granularity, bucket_start, count, sketch FROM initiative_effect_sketches "
+            "WHERE metric_name = 'm' ORDER BY granularity, bucket_start"
+        )).fetchall()
+    assert [(row[0], row[2]) for row in rows] == [("day", 2), ("day", 1), ("hour", 2), ("hour", 1), ("month", 2), ("month", 1)]
+    assert KllSketch.from_bytes(rows[0][3]).quantiles([0, 1]) == [5.0, 7.0]
+    engine.dispose()
+
+def test_migrate_backfills_search_indexes(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'search.db'}")
+    Base.metadata.create_all(bind=engine)
+    # 検索索引の追加前のスキーマに既存の行がある状態を再現する
+    with engine.begin() as conn:
+        for table in ("initiatives", "requirements", "development_tasks"):
+            conn.execute(text(f"DROP TABLE {table}_fts"))
+            for trigger in ("insert", "update", "delete"):
+                conn.execute(text(f"DROP TRIGGER {table}_fts_{trigger}"))
+        conn.execute(text(
+            "INSERT INTO initiatives (title, description) VALUES ('在庫管理の改善', '説明'), ('別の施策', '在庫')"
+        ))
+        conn.execute(text("INSERT INTO development_tasks (title, description) VALUES ('在庫管理画面', '説明')"))
+
+    migrate(engine)
+    match_initiatives = text("SELECT rowid FROM initiatives_fts WHERE initiatives_fts MATCH :q ORDER BY rank")
+    with engine.begin() as conn:
+        assert [row[0] for row in conn.execute(match_initiatives, {"q": '"在庫管理"'})] == [1]
+        # 移行後の更新はトリガーで索引に反映される
+        conn.execute(text("UPDATE initiatives SET title = '物流の改善' WHERE id = 1"))
+        assert conn.execute(match_initiatives, {"q": '"在庫管理"'}).fetchall() == []
+        assert [row[0] for row in conn.execute(match_initiatives, {"q": '"物流の"'})] == [1]
+        rows = conn.execute(text(
+            "SELECT rowid FROM development_tasks_fts WHERE development_tasks_fts MATCH '\"在庫管理\"'"
+        )).fetchall()
+        assert [row[0] for row in rows] == [1]
+    engine.dispose()
+
+def test_migrate_compresses_terms_contents(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'terms.db'}")
+    Base.metadata.create_all(bind=engine)
+    # 本文を平文の content 列に持つ移行前のテーブルを再現する
+    base = "".join(f"第{n}条 本規約の条文{n * 13}です。\n" for n in range(300))
+    contents = [base, base.replace("条文13です", "条文13（改定）です"), None]
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE terms_of_service"))
+        conn.execute(text(
+            "CREATE TABLE terms_of_service (id INTEGER PRIMARY KEY, version VARCHAR, content VARCHAR, "
+            "effective_date DATETIME, created_at DATETIME)"
+        ))
+        for number, content in enumerate(contents):
+            conn.execute(text(
+                "INSERT INTO terms_of_service (version, content, effective_date, created_at) "
+                "VALUES (:version, :content, '2024-01-01 00:00:00', '2024-01-01 00:00:00')"
+            ), {"version": f"1.{number}", "content": content})
+
+    migrate(engine)
+    columns = {column["name"] for column in inspect(engine).get_columns("terms_of_service")}
+    assert "content" not in columns
+    with Session(engine) as db:
+        rows = db.query(models.TermsOfService).options(undefer(models.TermsOfService.content_data))\
+            .order_by(models.TermsOfService.id).all()
+        assert [(row.content_codec, row.content_base_id) for row in rows] == [
+            (CODEC_ZLIB, None), (CODEC_DELTA, 1), (CODEC_ZLIB, None)
+        ]
+        assert load_contents(db, rows) == {1: contents[0], 2: contents[1], 3: ""}
+        assert [row.content_length for row in rows] == [len(contents[0]), len(contents[1]), 0]
+    engine.dispose()
@@ -0,0 +1,52 @@
+from itertools import combinations
+import numpy as np
+import pytest
+
+from ..app.optimizer import EXACT_MAX_CELLS, lp_upper_bound, optimize_portfolio, solve_greedy
+
+def _brute_force(values, costs, budget):
+    best = 0.0
+    for size in range(len(values) + 1):
+        for subset in combinations(range(len(values)), size):
+            if costs[list(subset)].sum() <= budget:
+                best = max(best, values[list(subset)].sum())
+    return best
+
+@pytest.mark.parametrize("seed", range(5))
+def test_exact_matches_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    ids = np.arange(1, 11)
+    irr = rng.uniform(1, 30, 10)
+    # 予算の分割単位（1）の倍数のコストでは丸めが起きず厳密解になる
+    cost = rng.integers(1, 50, 10).astype(float)
+    result = optimize_portfolio(ids, irr, cost, budget=100, method="exact", resolution=100)
+
+    values = irr * cost / 100
+    assert result["total_value"] == pytest.approx(_brute_force(values, cost, 100))
+    assert result["total_cost"] <= 100
+    assert result["total_value"] <= result["upper_bound"] + 1e-9
+
+def test_greedy_is_within_half_of_optimum():
+    # 価値/コスト比が最大の小さい候補だけを選ぶと最適値の半分未満になる例
+    values = np.array([2.0, 90.0])
+    costs = np.array([1.0, 100.0])
+    assert list(solve_greedy(values, costs, 100)) == [1]
+    assert lp_upper_bound(values, costs, 100) == pytest.approx(2.0 + 90.0 * 99 / 100)
+
+def test_unusable_candidates_are_excluded():
+    ids = np.array([1, 2, 3, 4])
+    irr = np.array([np.nan, 0.0, 10.0, 10.0])
+    cost = np.array([10.0, 10.0, np.nan, 10.0])
+    result = optimize_portfolio(ids, irr, cost, budget=100)
+    assert result["candidate_count"] == 1
+    assert result["selected_ids"] == [4]
+
+def test_explicit_exact_rejects_oversized_table():
+    # 表を確保する前に拒否する（auto なら貪欲法に切り替わる規模）
+    n = EXACT_MAX_CELLS // 100_001 + 1
+    ids = np.arange(1, n + 1)
+    irr = np.full(n, 10.0)
+    cost = np.full(n, 10.0)
+    with pytest.raises(ValueError):
+        optimize_portfolio(ids, irr, cost, budget=100, method="exact", resolution=100_000)
+    assert optimize_portfolio(ids, irr, cost, budget=100, resolution=100_000)["method"] == "greedy"
@@ -0,0 +1,232 @@
+from datetime import datetime, timedelta
+import pytest
+from fastapi.testclient import TestClient
+
+from .conftest import engine, override_get_db
+from ..app.config import settings
+from ..app.database import get_db
+from ..app.main import create_app
+from ..app.query_budget import assert_max_queries, count_queries, statement_shape
+from ..app.routers import initiatives, terms, development, releases, search
+
+@pytest.fixture
+def seeded(client):
+    """予算の計測対象となるデータを一通り登録する"""
+    initiative_id = client.post(
+        "/initiatives/",
+        json={"title": "施策", "description": "説明", "irr": 7.5, "cost": 500000}
+    ).json()["id"]
+    client.post(
+        f"/initiatives/{initiative_id}/effects",
+        json={"initiative_id": initiative_id, "metric_name": "コスト削減率", "metric_value": 15.5}
+    )
+    terms_id = client.post(
+        "/terms/",
+        json={
+            "version": "1.0.0",
+            "content": "これはテスト用の利用規約です。",
+            "effective_date": (datetime.utcnow() + timedelta(days=30)).isoformat()
+        }
+    ).json()["id"]
+    client.post(f"/terms/{terms_id}/agreements?member_id=m1")
+    requirement_id = client.post(
+        "/development/requirements/",
+        json={"initiative_id": initiative_id, "title": "要件", "description": "説明", "status": "DRAFT"}
+    ).json()["id"]
+    task_id = client.post(
+        "/development/tasks/",
+        json={"requirement_id": requirement_id, "title": "タスク", "description": "説明", "status": "TODO"}
+    ).json()["id"]
+    release_id = client.post(
+        "/releases/",
+        json={
+            "version": "1.0.0",
+            "description": "リリース",
+            "status": "PENDING_APPROVAL",
+            "planned_date": (datetime.utcnow() + timedelta(days=7)).isoformat()
+        }
+    ).json()["id"]
+    completed_id = client.post(
+        "/releases/",
+        json={
+            "version": "0.9.0",
+            "description": "リリース済み",
+            "status": "COMPLETED",
+            "planned_date": datetime.utcnow().isoformat()
+        }
+    ).json()["id"]
+    return {
+        "initiative_id": initiative_id,
+        "terms_id": terms_id,
+        "requirement_id": requirement_id,
+        "task_id": task_id,
+        "release_id": release_id,
+        "completed_id": completed_id,
+    }
+
+TASK = {"title": "タスク", "description": "説明", "status": "DONE"}
+
+# (メソッド, パス, リクエストの追加引数, 許容するSQL文の数)
+ROUTE_BUDGETS = [
+    ("POST", "/initiatives/", {"json": {"title": "施策2", "description": "説明", "irr": 5.0, "cost": 1000}}, 2),
+    ("GET", "/initiatives/", {}, 1),
+    ("GET", "/initiatives/export", {}, 1),
+    ("GET", "/initiatives/effects/export?initiative_id={initiative_id}", {}, 1),
+    ("GET", "/initiatives/analytics", {}, 1),
+    ("POST", "/initiatives/optimize", {"json": {"budget": 1000000, "require_compliance": True}}, 1),
+    ("GET", "/initiatives/dossiers?ids={initiative_id}", {}, 5),
+    ("GET", "/initiatives/{initiative_id}", {}, 1),
+    ("GET", "/initiatives/{initiative_id}/dossier", {}, 5),
+    ("POST", "/initiatives/{initiative_id}/assessments", {"json": {
+        "initiative_id": 0, "feasibility_score": 85.5, "compliance_check": True, "terms_impact": False
+    }}, 4),
+    ("POST", "/initiatives/{initiative_id}/effects", {"json": {
+        "initiative_id": 0, "metric_name": "コスト削減率", "metric_value": 10.0
+    }}, 6),
+    # コミットを待つ場合は書き込みスレッドのバッチ1回分（件数によらない）
+    ("POST", "/initiatives/effects/ingest?durability=commit", {"json": [
+        {"initiative_id": 0, "metric_name": "コスト削減率", "metric_value": 10.0},
+        {"initiative_id": 0, "metric_name": "コスト削減率", "metric_value": 12.0},
+    ]}, 5),
+    ("GET", "/initiatives/effects/ingest/status", {}, 0),
+    ("GET", "/initiatives/effects/quantiles?metric_name=コスト削減率"
+        "&start=2000-01-01T00:00:00&end=2100-01-01T00:00:00", {}, 1),
+    # 境界に揃わない範囲は両端の生の値とスケッチをそれぞれ1クエリで読む
+    ("GET", "/initiatives/effects/quantiles?metric_name=コスト削減率"
+        "&start=2000-01-01T00:30:00&end=2100-01-01T00:30:00", {}, 2),
+    ("GET", "/initiatives/{initiative_id}/effects/timeseries?metric_name=コスト削減率"
+        "&start=2000-01-01T00:00:00&end=2100-01-01T00:00:00&step=month", {}, 1),
+    # 境界に揃わない範囲もロールアップと両端の生の値を UNION ALL の1クエリで読む
+    ("GET", "/initiatives/{initiative_id}/effects/timeseries?metric_name=コスト削減率"
+        "&start=2000-01-01T00:30:00&end=2100-01-01T00:30:00&step=month", {}, 1),
+    ("PUT", "/initiatives/{initiative_id}/status", {"json": {"status": "APPROVED"}}, 3),
+    # 一括遷移の ids はデータを登録し直した直後の連番（存在しない 999 を含む）
+    ("PUT", "/initiatives/bulk/status", {"json": {"ids": [1, 999], "status": "APPROVED"}}, 1),
+    # 差分符号化の基準（直近のキーフレーム）の読み込みを含む
+    ("POST", "/terms/", {"json": {
+        "version": "2.0.0", "content": "改定", "effective_date": datetime.utcnow().isoformat()
+    }}, 3),
+    ("GET", "/terms/", {}, 1),
+    ("GET", "/terms/latest", {}, 1),
+    ("GET", "/terms/latest/cache-stats", {}, 0),
+    ("GET", "/terms/{terms_id}", {}, 1),
+    ("GET", "/terms/{terms_id}/diff?base_id={terms_id}", {}, 3),
+    ("POST", "/terms/{terms_id}/agreements?member_id=m2", {}, 2),
+    ("POST", "/terms/{terms_id}/agreements/bulk", {
+        "content": b'"m2"\n"m3"\n"m4"\n', "headers": {"Content-Type": "application/x-ndjson"}
+    }, 2),
+    ("GET", "/terms/agreements/export?terms_id={terms_id}", {}, 1),
+    ("GET", "/terms/agreements/m1", {}, 1),
+    ("GET", "/terms/check-agreement/m1", {}, 2),
+    ("POST", "/terms/check-agreement/batch", {"json": {"member_ids": ["m1", "m2", "m3"]}}, 2),
+    ("POST", "/development/requirements/", {"json": {
+        "initiative_id": 0, "title": "要件2", "description": "説明", "status": "DRAFT"
+    }}, 3),
+    ("POST", "/development/requirements/bulk", {"json": [
+        {"initiative_id": 0, "title": f"要件{i}", "description": "説明", "status": "DRAFT"} for i in range(3)
+    ]}, 2),
+    ("GET", "/development/requirements/?initiative_id={initiative_id}", {}, 1),
+    ("GET", "/development/requirements/export", {}, 1),
+    ("GET", "/development/requirements/{requirement_id}", {}, 1),
+    ("PUT", "/development/requirements/{requirement_id}/status", {"json": {"status": "REVIEW"}}, 3),
+    ("PUT", "/development/requirements/bulk/status", {"json": {"ids": [1, 999], "status": "REVIEW"}}, 1),
+    ("POST", "/development/tasks/", {"json": {**TASK, "requirement_id": 0}}, 3),
+    ("POST", "/development/tasks/bulk", {"json": [{**TASK, "requirement_id": 0} for _ in range(3)]}, 2),
+    ("GET", "/development/tasks/?requirement_id={requirement_id}", {}, 1),
+    ("GET", "/development/tasks/export", {}, 1),
+    ("GET", "/development/tasks/{task_id}", {}, 1),
+    ("PUT", "/development/tasks/{task_id}", {"json": {**TASK, "requirement_id": 0}}, 3),
+    ("GET", "/development/requirements/{requirement_id}/tasks", {}, 1),
+    ("POST", "/releases/", {"json": {
+        "version": "2.0.0", "description": "次期", "status": "PLANNED",
+        "planned_date": datetime.utcnow().isoformat()
+    }}, 2),
+    ("GET", "/releases/?status=PENDING_APPROVAL", {}, 1),
+    ("GET", "/releases/export", {}, 1),
+    ("GET", "/releases/{release_id}", {}, 1),
+    ("PUT", "/releases/{release_id}/status", {"json": {"status": "APPROVED"}}, 3),
+    ("POST", "/releases/{completed_id}/rollback", {"json": {"release_id": 0, "reason": "障害"}}, 4),
+    ("GET", "/releases/{release_id}/rollbacks", {}, 2),
+    ("GET", "/releases/pending/approval", {}, 1),
+    ("PUT", "/releases/{release_id}/approve", {}, 3),
+    ("PUT", "/releases/bulk/status", {"json": {"ids": [1, 2, 999], "status": "COMPLETED"}}, 1),
+    ("PUT", "/releases/bulk/approve", {"json": {"ids": [1, 2, 999]}}, 2),
+    ("GET", "/search/?q=施策 リリース", {}, 1),
+]
+
+def _request_kwargs(kwargs, ids):
+    # リクエストボディ内の親ID（0）は登録済みのIDに差し替える
+    kwargs = dict(kwargs)
+    if "json" in kwargs:
+        kwargs["json"] = _replace_parent_ids(kwargs["json"], ids)
+    return kwargs
+
+def _replace_parent_ids(body, ids):
+    if isinstance(body, list):
+        return [_replace_parent_ids(item, ids) for item in body]
+    body = dict(body)
+    for key in ("initiative_id", "requirement_id", "release_id"):
+        if body.get(key) == 0:
+            body[key] = ids["completed_id" if key == "release_id" else key]
+    return body
+
+@pytest.mark.parametrize(
+    "method,path,kwargs,budget",
+    ROUTE_BUDGETS,
+    ids=[f"{method} {path}" for method, path, _, _ in ROUTE_BUDGETS]
+)
+def test_route_query_budget(client, seeded, method, path, kwargs, budget):
+    with assert_max_queries(engine, budget):
+        response = client.request(method, path.format(**seeded), **_request_kwargs(kwargs, seeded))
+    assert response.status_code < 400
+
+def test_every_route_has_a_budget():
+    declared = {(method, path.split("?")[0]) for method, path, _, _ in ROUTE_BUDGETS}
+    for module in (initiatives, terms, development, releases, search):
+        for route in module.router.routes:
+            for method in route.methods:
+                matched = any(
+                    m == method and _same_route(route.path, p) for m, p in declared
+                )
+                assert matched, f"{method} {route.path} has no query budget"
+
+def _same_route(template, path):
+    # 予算の表のパスは "{...}" または会員ID "m1" をパラメータとして書いている
+    template_parts = template.strip("/").split("/")
+    path_parts = path.strip("/").split("/")
+    if len(template_parts) != len(path_parts):
+        return False
+    return all(
+        t == p or (t.startswith("{") and p.startswith("{")) or (t.startswith("{") and p == "m1")
+        for t, p in zip(template_parts, path_parts)
+    )
+
+def test_assert_max_queries_reports_statements(client):
+    with pytest.raises(AssertionError, match="at most 0 SQL statements, got 1"):
+        with assert_max_queries(engine, 0):
+            client.get("/initiatives/")
+
+def test_statement_shape_ignores_in_list_length():
+    assert statement_shape("SELECT * FROM t WHERE id IN (?, ?, ?)") == statement_shape(
+        "SELECT *\n  FROM t WHERE id IN (?)"
+    )
+    assert statement_shape("SELECT * FROM t LIMIT 10") == "SELECT * FROM t LIMIT ?"
+
+def test_count_queries_detects_repeated_shapes(client, seeded):
+    with count_queries(engine) as counter:
+        for _ in range(3):
+            client.get(f"/initiatives/{seeded['initiative_id']}")
+    assert list(counter.repeated_shapes(3).values()) == [3]
+    assert counter.repeated_shapes(4) == {}
+
+def test_runtime_mode_logs_over_budget_requests(db, monkeypatch, caplog):
+    monkeypatch.setattr(settings, "query_budget_log", True)
+    monkeypatch.setattr(settings, "query_budget", 0)
+    monkeypatch.setattr(settings, "query_repeat_threshold", 1)
+    app = create_app()
+    app.dependency_overrides[get_db] = override_get_db
+    with TestClient(app) as client, caplog.at_level("WARNING", logger="uvicorn.error"):
+        client.get("/initiatives/")
+    messages = [record.getMessage() for record in caplog.records]
+    assert any("Query budget exceeded: GET /initiatives/" in m for m in messages)
+    assert any("Repeated SQL statement: GET /initiatives/" in m for m in messages)
@@ -0,0 +1,155 @@
+import re
+from datetime import datetime, timedelta
+from sqlalchemy import event
+
+from .conftest import engine
+
+def _exercise_all_routes(client):
+    """各ルーターのエンドポイントを一通り呼び出す"""
+    initiative_id = client.post(
+        "/initiatives/",
+        json={"title": "施策", "description": "説明", "irr": 7.5, "cost": 500000}
+    ).json()["id"]
+    client.get("/initiatives/")
+    client.get(f"/initiatives/{initiative_id}")
+    client.post(
+        f"/initiatives/{initiative_id}/assessments",
+        json={
+            "initiative_id": initiative_id,
+            "feasibility_score": 85.5,
+            "compliance_check": True,
+            "terms_impact": False
+        }
+    )
+    client.post(
+        f"/initiatives/{initiative_id}/effects",
+        json={"initiative_id": initiative_id, "metric_name": "コスト削減率", "metric_value": 15.5}
+    )
+    client.post(
+        "/initiatives/effects/ingest?durability=commit",
+        json=[{"initiative_id": initiative_id, "metric_name": "コスト削減率", "metric_value": 12.0}]
+    )
+    client.post("/initiatives/optimize", json={"budget": 1000000, "require_compliance": True})
+    for step, start in [("month", "2000-01-01T00:00:00"), ("hour", "2000-01-01T00:30:00")]:
+        client.get(
+            f"/initiatives/{initiative_id}/effects/timeseries",
+            params={"metric_name": "コスト削減率", "start": start, "end": "2100-01-01T00:00:00", "step": step}
+        )
+        client.get(
+            "/initiatives/effects/quantiles",
+            params={"metric_name": "コスト削減率", "start": start, "end": "2100-01-01T00:00:00"}
+        )
+    client.put(f"/initiatives/{initiative_id}/status", json={"status": "APPROVED"})
+    client.get("/initiatives/analytics?status=APPROVED")
+    client.get("/initiatives/export")
+    client.get(f"/initiatives/effects/export?initiative_id={initiative_id}")
+
+    terms_id = client.post(
+        "/terms/",
+        json={
+            "version": "1.0.0",
+            "content": "これはテスト用の利用規約です。",
+            "effective_date": (datetime.utcnow() + timedelta(days=30)).isoformat()
+        }
+    ).json()["id"]
+    client.post("/terms/", json={
+        "version": "1.1.0",
+        "content": "これはテスト用の利用規約です。改定しました。",
+        "effective_date": (datetime.utcnow() + timedelta(days=31)).isoformat()
+    })
+    client.get("/terms/")
+    client.get("/terms/?include_content=true")
+    client.get("/terms/latest")
+    client.get(f"/terms/{terms_id}")
+    client.get(f"/terms/{terms_id + 1}")
+    client.get(f"/terms/{terms_id + 1}/diff")
+    client.get(f"/terms/{terms_id}/diff?base_id={terms_id + 1}")
+    client.post(f"/terms/{terms_id}/agreements?member_id=m1")
+    client.post(f"/terms/{terms_id}/agreements?member_id=m1")
+    client.post(
+        f"/terms/{terms_id}/agreements/bulk",
+        content=b'"m1"\n"m2"\n',
+        headers={"Content-Type": "application/x-ndjson"}
+    )
+    client.get("/terms/agreements/m1")
+    client.get(f"/terms/agreements/export?terms_id={terms_id}")
+    client.get("/terms/check-agreement/m1")
+    client.post("/terms/check-agreement/batch", json={"member_ids": ["m1", "m3"]})
+
+    requirement_id = client.post(
+        "/development/requirements/",
+        json={"initiative_id": initiative_id, "title": "要件", "description": "説明", "status": "DRAFT"}
+    ).json()["id"]
+    client.post(
+        "/development/requirements/bulk",
+        json=[{"initiative_id": initiative_id, "title": "要件2", "description": "説明", "status": "DRAFT"}]
+    )
+    client.get(f"/development/requirements/?initiative_id={initiative_id}")
+    client.get(f"/development/requirements/{requirement_id}")
+    client.put(f"/development/requirements/{requirement_id}/status", json={"status": "REVIEW"})
+    client.get(f"/development/requirements/export?initiative_id={initiative_id}")
+    task = {"requirement_id": requirement_id, "title": "タスク", "description": "説明", "status": "TODO"}
+    task_id = client.post("/development/tasks/", json=task).json()["id"]
+    client.post("/development/tasks/bulk", json=[task, task])
+    client.get(f"/development/tasks/?requirement_id={requirement_id}")
+    client.get(f"/development/tasks/{task_id}")
+    client.put(f"/development/tasks/{task_id}", json={**task, "status": "DONE"})
+    client.get(f"/development/tasks/export?requirement_id={requirement_id}")
+    client.get(f"/development/requirements/{requirement_id}/tasks")
+    client.get(f"/initiatives/{initiative_id}/dossier")
+    client.get(f"/initiatives/dossiers?ids={initiative_id}")
+
+    release_id = client.post(
+        "/releases/",
+        json={
+            "version": "1.0.0",
+            "description": "リリース",
+            "status": "PENDING_APPROVAL",
+            "planned_date": (datetime.utcnow() + timedelta(days=7)).isoformat()
+        }
+    ).json()["id"]
+    client.get("/releases/?status=PENDING_APPROVAL")
+    client.get(f"/releases/{release_id}")
+    client.get("/releases/pending/approval")
+    client.put(f"/releases/{release_id}/approve")
+    client.put(f"/releases/{release_id}/status", json={"status": "COMPLETED"})
+    client.post(f"/releases/{release_id}/rollback", json={"release_id": release_id, "reason": "理由"})
+    client.get(f"/releases/{release_id}/rollbacks")
+    client.get("/releases/export?status=ROLLED_BACK")
+    client.put("/releases/bulk/approve", json={"ids": [release_id, release_id + 1]})
+    client.put("/releases/bulk/status", json={"ids": [release_id], "status": "PLANNED"})
+    client.put("/development/requirements/bulk/status", json={"ids": [requirement_id], "status": "APPROVED"})
+    client.put("/initiatives/bulk/status", json={"ids": [initiative_id], "status": "COMPLETED"})
+    client.get("/search/", params={"q": "テスト用 説明", "limit": 10})
+    client.get("/search/", params={"q": "テスト用", "type": ["requirement", "task"], "skip": 10})
+
+def test_router_queries_use_indexes(client):
+    statements = {}
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and not executemany:
+            statements.setdefault(statement, parameters)
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        _exercise_all_routes(client)
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    assert statements
+    violations = []
+    with engine.connect() as conn:
+        for statement, parameters in statements.items():
+            plan = [
+                row[3] for row in
+                conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+            ]
+            for detail in plan:
+                # 絞り込み条件のあるクエリでの全件走査と、ORDER BY のための一時ソートを禁止する
+                full_scan = (
+                    re.match(r"SCAN \w+$", detail) is not None
+                    and re.search(r"\bWHERE\b", statement) is not None
+                )
+                if full_scan or "USE TEMP B-TREE" in detail:
+                    violations.append((statement, plan))
+    assert violations == []
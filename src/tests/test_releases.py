@@ -1,5 +1,6 @@
 import pytest
 from fastapi import status
+import json
 from datetime import datetime, timedelta
 
 def test_create_release(client):
@@ -212,3 +213,86 @@ def test_rollback_non_completed_release(client):
         }
     )
     assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+def test_list_releases_cursor_with_status_filter(client):
+    statuses = ["PLANNED", "COMPLETED", "PLANNED", "PLANNED", "COMPLETED"]
+    for i, status_value in enumerate(statuses):
+        client.post(
+            "/releases/",
+            json={
+                "version": f"1.{i}.0",
+                "description": f"これはバージョン1.{i}.0のリリースです",
+                "status": status_value,
+                "planned_date": (datetime.utcnow() + timedelta(days=7)).isoformat()
+            }
+        )
+
+    response = client.get("/releases/?status=PLANNED&limit=2")
+    assert [r["version"] for r in response.json()] == ["1.0.0", "1.2.0"]
+    cursor = response.headers["X-Next-Cursor"]
+
+    response = client.get(f"/releases/?status=PLANNED&limit=2&cursor={cursor}")
+    assert [r["version"] for r in response.json()] == ["1.3.0"]
+    assert "X-Next-Cursor" not in response.headers
+
+def test_export_releases(client):
+    statuses = ["PLANNED", "COMPLETED", "PLANNED"]
+    for i, status_value in enumerate(statuses):
+        client.post(
+            "/releases/",
+            json={
+                "version": f"1.{i}.0",
+                "description": f"これはバージョン1.{i}.0のリリースです",
+                "status": status_value,
+                "planned_date": (datetime.utcnow() + timedelta(days=7)).isoformat()
+            }
+        )
+
+    response = client.get("/releases/export?status=PLANNED")
+    assert response.status_code == status.HTTP_200_OK
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["version"] for row in rows] == ["1.0.0", "1.2.0"]
+
+def _create_release(client, version, release_status):
+    return client.post(
+        "/releases/",
+        json={
+            "version": version,
+            "description": "テスト用リリース",
+            "status": release_status,
+            "planned_date": (datetime.utcnow() + timedelta(days=7)).isoformat()
+        }
+    ).json()["id"]
+
+def test_approve_releases_bulk(client):
+    pending = [_create_release(client, f"1.{i}.0", "PENDING_APPROVAL") for i in range(3)]
+    planned = _create_release(client, "2.0.0", "PLANNED")
+
+    response = client.put("/releases/bulk/approve", json={"ids": [pending[0], planned, 999, pending[1], pending[0]]})
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["updated"] == 2
+    assert data["failed"] == 2
+    # 入力順で、重複したIDは1件にまとめる
+    assert data["results"] == [
+        {"id": pending[0], "outcome": "updated", "error": None},
+        {"id": planned, "outcome": "invalid_transition", "error": "Only pending releases can be approved"},
+        {"id": 999, "outcome": "not_found", "error": "Release not found"},
+        {"id": pending[1], "outcome": "updated", "error": None},
+    ]
+    assert client.get(f"/releases/{pending[0]}").json()["status"] == "APPROVED"
+    assert client.get(f"/releases/{planned}").json()["status"] == "PLANNED"
+    assert client.get(f"/releases/{pending[2]}").json()["status"] == "PENDING_APPROVAL"
+
+def test_update_release_statuses_bulk(client):
+    ids = [_create_release(client, f"1.{i}.0", "APPROVED") for i in range(2)]
+    response = client.put("/releases/bulk/status", json={"ids": ids, "status": "COMPLETED"})
+    assert response.json()["updated"] == 2
+    for release_id in ids:
+        release = client.get(f"/releases/{release_id}").json()
+        assert release["status"] == "COMPLETED"
+        # 完了にしたリリースには実績日が記録される
+        assert release["actual_date"] is not None
+
+    response = client.put("/releases/bulk/status", json={"ids": [], "status": "COMPLETED"})
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
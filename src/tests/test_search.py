@@ -0,0 +1,116 @@
+from fastapi import status
+from sqlalchemy import text
+
+from .conftest import engine
+from ..app.query_budget import count_queries
+
+def _create_initiative(client, title, description="説明"):
+    return client.post(
+        "/initiatives/", json={"title": title, "description": description, "irr": 5.0, "cost": 100.0}
+    ).json()["id"]
+
+def _create_requirement(client, initiative_id, title, description="説明"):
+    return client.post("/development/requirements/", json={
+        "initiative_id": initiative_id, "title": title, "description": description, "status": "DRAFT"
+    }).json()["id"]
+
+def _create_task(client, requirement_id, title, description="説明"):
+    return client.post("/development/tasks/", json={
+        "requirement_id": requirement_id, "title": title, "description": description, "status": "TODO"
+    }).json()["id"]
+
+def _search(client, **params):
+    response = client.get("/search/", params=params)
+    assert response.status_code == status.HTTP_200_OK, response.text
+    return response.json()
+
+def test_search_ranks_title_matches_first(client):
+    in_description = _create_initiative(client, "物流の見直し", "在庫管理システムの刷新を含む")
+    in_title = _create_initiative(client, "在庫管理システムの刷新", "倉庫の説明")
+    requirement_id = _create_requirement(client, in_title, "在庫管理画面の要件")
+    _create_initiative(client, "無関係な施策")
+
+    hits = _search(client, q="在庫管理")
+    assert {(hit["type"], hit["id"]) for hit in hits} == {
+        ("initiative", in_title), ("initiative", in_description), ("requirement", requirement_id)
+    }
+    assert [hit["score"] for hit in hits] == sorted((hit["score"] for hit in hits), reverse=True)
+    assert all(hit["score"] > 0 for hit in hits)
+    # 同じ種類の中ではタイトルの一致が説明の一致より上位になる
+    initiatives = [hit for hit in hits if hit["type"] == "initiative"]
+    assert [hit["id"] for hit in initiatives] == [in_title, in_description]
+    assert initiatives[0]["title"] == "在庫管理システムの刷新"
+    assert "<mark>在庫管理</mark>" in initiatives[0]["snippet"]
+
+def test_search_requires_all_terms_and_filters_by_type(client):
+    initiative_id = _create_initiative(client, "決済基盤の刷新", "クレジットカード決済の改善")
+    requirement_id = _create_requirement(client, initiative_id, "決済APIの要件", "カード情報の保護")
+    task_id = _create_task(client, requirement_id, "決済APIの実装", "カード番号のトークン化")
+
+    assert {hit["type"] for hit in _search(client, q="決済")} == {"initiative", "requirement", "task"}
+    hits = _search(client, q="決済API カード")
+    assert {(hit["type"], hit["id"]) for hit in hits} == {("requirement", requirement_id), ("task", task_id)}
+    hits = _search(client, q="決済API", type=["task"])
+    assert [(hit["type"], hit["id"]) for hit in hits] == [("task", task_id)]
+    assert _search(client, q="決済API 存在しない語") == []
+
+def test_search_short_terms_use_substring_match(client):
+    first = _create_initiative(client, "改善施策A")
+    second = _create_initiative(client, "別の改善", "施策の説明")
+    _create_initiative(client, "無関係")
+
+    # 2文字の語は索引を使わずに部分一致で絞り込み、ID順に返す
+    hits = _search(client, q="施策")
+    assert [hit["id"] for hit in hits] == [first, second]
+    assert all(hit["score"] == 0.0 and hit["snippet"] is None for hit in hits)
+    # 索引で検索できる語と組み合わせた場合は bm25 順
+    hits = _search(client, q="改善施 A")
+    assert [hit["id"] for hit in hits] == [first]
+    assert hits[0]["score"] > 0
+
+def test_search_pagination(client):
+    ids = [_create_initiative(client, f"性能改善{i}") for i in range(5)]
+    pages = [_search(client, q="性能改善", skip=skip, limit=2) for skip in (0, 2, 4)]
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert sorted(hit["id"] for page in pages for hit in page) == ids
+
+def test_search_index_follows_updates_and_deletes(client, db):
+    initiative_id = _create_initiative(client, "施策")
+    requirement_id = _create_requirement(client, initiative_id, "検索対象の要件")
+    task_id = _create_task(client, requirement_id, "古いタイトル")
+    client.put(f"/development/tasks/{task_id}", json={
+        "requirement_id": requirement_id, "title": "新しいタイトル", "description": "説明", "status": "DONE"
+    })
+    assert _search(client, q="古いタイトル") == []
+    assert [hit["id"] for hit in _search(client, q="新しいタイトル")] == [task_id]
+
+    # ステータスだけの更新・一括登録・行の削除
+    client.put(f"/development/requirements/{requirement_id}/status", json={"status": "REVIEW"})
+    assert [hit["id"] for hit in _search(client, q="検索対象")] == [requirement_id]
+    result = client.post("/development/tasks/bulk", json=[
+        {"requirement_id": requirement_id, "title": "一括登録タスク", "description": "説明", "status": "TODO"}
+    ]).json()
+    assert [hit["id"] for hit in _search(client, q="一括登録")] == [result["results"][0]["id"]]
+    db.execute(text("DELETE FROM development_tasks WHERE id = :id"), {"id": task_id})
+    db.commit()
+    assert _search(client, q="新しいタイトル") == []
+
+def test_search_query_is_escaped(client):
+    initiative_id = _create_initiative(client, 'コスト "50%" 削減_計画')
+    assert [hit["id"] for hit in _search(client, q='"50%"')] == [initiative_id]
+    assert [hit["id"] for hit in _search(client, q="_計")] == [initiative_id]
+    assert _search(client, q="%%") == []
+    assert _search(client, q="_x") == []
+    assert _search(client, q="NEAR(a b) OR *") == []
+
+def test_search_validation(client):
+    assert client.get("/search/", params={"q": "   "}).status_code == status.HTTP_400_BAD_REQUEST
+    assert client.get("/search/").status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert client.get("/search/", params={"q": "施策", "limit": 101}).status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert client.get("/search/", params={"q": "施策", "type": "release"}).status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+def test_search_is_a_single_query(client):
+    _create_initiative(client, "在庫管理システム")
+    with count_queries(engine) as counter:
+        _search(client, q="在庫管理 シ")
+    assert counter.count == 1
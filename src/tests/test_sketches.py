@@ -0,0 +1,51 @@
+import random
+import numpy as np
+import pytest
+
+from ..app import sketches
+from ..app.sketches import KllSketch, normalized_rank_error
+
+def _rank(sorted_values, value):
+    return np.searchsorted(sorted_values, value, side="right") / len(sorted_values)
+
+def test_small_sketch_is_exact():
+    sketch = KllSketch()
+    for value in [5.0, 1.0, 3.0, 2.0, 4.0]:
+        sketch.update(value)
+    assert sketch.rank_error() == 0.0
+    assert sketch.quantiles([0, 0.5, 0.9, 1]) == [1.0, 3.0, 5.0, 5.0]
+
+def test_merged_sketches_stay_within_error_bound():
+    sketches._rng.seed(0)
+    rng = random.Random(0)
+    values = [rng.lognormvariate(0, 1) for _ in range(100000)]
+    parts = [KllSketch() for _ in range(30)]
+    for i, value in enumerate(values):
+        parts[i % len(parts)].update(value)
+
+    merged = KllSketch()
+    for part in parts:
+        # 永続化した形式から復元してもマージできる
+        merged.merge(KllSketch.from_bytes(part.to_bytes()))
+
+    assert merged.n == len(values)
+    assert merged.rank_error() == pytest.approx(normalized_rank_error(sketches.DEFAULT_K))
+    # 件数に関係なく O(k) の要素数に収まる
+    assert len(merged.to_bytes()) < 8 * 1024
+
+    sorted_values = np.sort(values)
+    qs = [0.01, 0.1, 0.5, 0.9, 0.99]
+    for q, estimate in zip(qs, merged.quantiles(qs)):
+        assert abs(_rank(sorted_values, estimate) - q) <= merged.rank_error()
+    assert merged.quantiles([0, 1]) == [min(values), max(values)]
+
+def test_serialization_round_trip():
+    sketch = KllSketch(k=50)
+    for value in range(1000):
+        sketch.update(float(value))
+    restored = KllSketch.from_bytes(sketch.to_bytes())
+    assert (restored.k, restored.n, restored.min, restored.max) == (50, 1000, 0.0, 999.0)
+    assert restored.levels == sketch.levels
+
+def test_empty_sketch():
+    assert KllSketch().quantiles([0.5]) == [None]
@@ -1,6 +1,15 @@
 import pytest
 from fastapi import status
+import json
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from ..app.agreement_writer import (
+    AGREEMENT_CREATED, AGREEMENT_DUPLICATE, TERMS_NOT_FOUND, agreement_writer, apply_agreement_batch
+)
+from ..app.config import settings
+from ..app.models import models
+from ..app.routers import terms as terms_router
+from ..app.terms_content import encode_content
 
 def test_create_terms(client):
     response = client.post(
@@ -148,3 +157,202 @@ def test_duplicate_agreement(client):
 def test_get_nonexistent_terms(client):
     response = client.get("/terms/999")
     assert response.status_code == status.HTTP_404_NOT_FOUND
+
+def test_bulk_record_agreements_ndjson(client, monkeypatch):
+    # チャンクをまたぐ重複も除外されることを確認するため、チャンクを小さくする
+    monkeypatch.setattr(terms_router, "BULK_AGREEMENT_CHUNK_SIZE", 2)
+    terms_response = client.post(
+        "/terms/",
+        json={
+            "version": "1.0.0",
+            "content": "これはテスト用の利用規約です。",
+            "effective_date": (datetime.utcnow() + timedelta(days=30)).isoformat()
+        }
+    )
+    terms_id = terms_response.json()["id"]
+    client.post(f"/terms/{terms_id}/agreements?member_id=member_000")
+
+    # 既存の同意1件・ボディ内の重複1件を含むNDJSON
+    body = '"member_000"\n{"member_id": "member_001"}\n"member_002"\n"member_001"\n'
+    response = client.post(
+        f"/terms/{terms_id}/agreements/bulk",
+        content=body.encode(),
+        headers={"Content-Type": "application/x-ndjson"}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["inserted"] == 2
+    assert data["skipped"] == 2
+
+    response = client.get("/terms/agreements/member_002")
+    assert len(response.json()) == 1
+
+def test_bulk_record_agreements_csv(client):
+    terms_response = client.post(
+        "/terms/",
+        json={
+            "version": "1.0.0",
+            "content": "これはテスト用の利用規約です。",
+            "effective_date": (datetime.utcnow() + timedelta(days=30)).isoformat()
+        }
+    )
+    terms_id = terms_response.json()["id"]
+
+    body = "member_id\n" + "\n".join(f"member_{i:03d}" for i in range(10))
+    response = client.post(
+        f"/terms/{terms_id}/agreements/bulk",
+        content=body.encode(),
+        headers={"Content-Type": "text/csv"}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {"status": "success", "inserted": 10, "skipped": 0}
+
+    response = client.post(
+        "/terms/999/agreements/bulk",
+        content=body.encode(),
+        headers={"Content-Type": "text/csv"}
+    )
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+def test_insert_agreement_chunk_counts_only_inserted_rows(client, db):
+    terms_id = client.post(
+        "/terms/",
+        json={"version": "1.0.0", "content": "これはテスト用の利用規約です。", "effective_date": datetime.utcnow().isoformat()}
+    ).json()["id"]
+    # 別の書き込みで先に登録された同意は、一意制約で読み飛ばした件数に数える
+    client.post(f"/terms/{terms_id}/agreements?member_id=member_001")
+    assert terms_router._insert_agreement_chunk(db, terms_id, ["member_000", "member_001", "member_000"]) == (1, 2)
+    assert terms_router._insert_agreement_chunk(db, terms_id, ["member_000", "member_001"]) == (0, 2)
+
+def test_check_latest_agreement_batch(client, monkeypatch):
+    monkeypatch.setattr(terms_router, "BATCH_CHECK_CHUNK_SIZE", 2)
+
+    response = client.post("/terms/check-agreement/batch", json={"member_ids": ["m1"]})
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    terms_response = client.post(
+        "/terms/",
+        json={
+            "version": "1.0.0",
+            "content": "これはテスト用の利用規約です。",
+            "effective_date": (datetime.utcnow() + timedelta(days=30)).isoformat()
+        }
+    )
+    terms_id = terms_response.json()["id"]
+    client.post(f"/terms/{terms_id}/agreements?member_id=m1")
+    client.post(f"/terms/{terms_id}/agreements?member_id=m3")
+
+    response = client.post(
+        "/terms/check-agreement/batch",
+        json={"member_ids": ["m1", "m2", "m3", "m1", "m4"]}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["member_id"] for row in rows] == ["m1", "m2", "m3", "m1", "m4"]
+    assert [row["has_agreed"] for row in rows] == [True, False, True, True, False]
+    assert all(row["latest_terms_id"] == terms_id for row in rows)
+    assert rows[0]["agreement_date"] is not None
+
+def test_latest_terms_cache(client):
+    response = client.get("/terms/latest")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    for version, days in (("1.0.0", 10), ("2.0.0", 30)):
+        client.post(
+            "/terms/",
+            json={
+                "version": version,
+                "content": f"これはバージョン{version}の利用規約です。",
+                "effective_date": (datetime.utcnow() + timedelta(days=days)).isoformat()
+            }
+        )
+    # 発効日が古い版を後から登録しても最新は変わらない
+    client.post(
+        "/terms/",
+        json={
+            "version": "0.9.0",
+            "content": "これはバージョン0.9.0の利用規約です。",
+            "effective_date": (datetime.utcnow() - timedelta(days=30)).isoformat()
+        }
+    )
+
+    assert client.get("/terms/latest").json()["version"] == "2.0.0"
+    assert client.get("/terms/check-agreement/m1").json()["latest_terms_version"] == "2.0.0"
+
+    stats = client.get("/terms/latest/cache-stats").json()
+    assert stats["misses"] == 1
+    assert stats["hits"] == 2
+
+def test_export_agreements(client):
+    terms_response = client.post(
+        "/terms/",
+        json={
+            "version": "1.0.0",
+            "content": "これはテスト用の利用規約です。",
+            "effective_date": (datetime.utcnow() + timedelta(days=30)).isoformat()
+        }
+    )
+    terms_id = terms_response.json()["id"]
+    for i in range(3):
+        client.post(f"/terms/{terms_id}/agreements?member_id=member_{i:03d}")
+
+    response = client.get(f"/terms/agreements/export?terms_id={terms_id}")
+    assert response.status_code == status.HTTP_200_OK
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["member_id"] for row in rows] == ["member_000", "member_001", "member_002"]
+    assert all(row["terms_id"] == terms_id for row in rows)
+
+def _create_terms(client):
+    return client.post(
+        "/terms/",
+        json={
+            "version": "1.0.0",
+            "content": "これはテスト用の利用規約です。",
+            "effective_date": (datetime.utcnow() + timedelta(days=30)).isoformat()
+        }
+    ).json()["id"]
+
+def test_record_agreement_with_group_commit(client, monkeypatch):
+    monkeypatch.setattr(settings, "agreement_group_commit", True)
+    terms_id = _create_terms(client)
+
+    response = client.post(f"/terms/{terms_id}/agreements?member_id=m1")
+    assert response.status_code == status.HTTP_201_CREATED
+    assert response.json() == {"status": "success", "message": "Agreement recorded"}
+    response = client.post(f"/terms/{terms_id}/agreements?member_id=m1")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json()["detail"] == "Member has already agreed to these terms"
+    response = client.post("/terms/999/agreements?member_id=m1")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert client.get("/terms/check-agreement/m1").json()["has_agreed"] is True
+
+def test_concurrent_agreements_are_coalesced(client, monkeypatch):
+    monkeypatch.setattr(settings, "agreement_group_commit", True)
+    monkeypatch.setattr(agreement_writer, "max_delay_ms", 50.0)
+    terms_id = _create_terms(client)
+    batches_before = agreement_writer.stats()["batches"]
+
+    # 同じ会員を2回ずつ含めて同時に登録する
+    member_ids = [f"m{i % 10}" for i in range(20)]
+    with ThreadPoolExecutor(max_workers=20) as executor:
+        codes = list(executor.map(
+            lambda member_id: client.post(f"/terms/{terms_id}/agreements?member_id={member_id}").status_code,
+            member_ids
+        ))
+    assert codes.count(status.HTTP_201_CREATED) == 10
+    assert codes.count(status.HTTP_400_BAD_REQUEST) == 10
+    assert agreement_writer.stats()["batches"] - batches_before < 20
+
+def test_agreement_batch_outcomes(db):
+    terms = models.TermsOfService(version="1.0.0", effective_date=datetime.utcnow(), **encode_content("規約"))
+    db.add(terms)
+    db.flush()
+    db.add(models.TermsAgreement(terms_id=terms.id, member_id="existing"))
+    db.commit()
+
+    outcomes = apply_agreement_batch(db, [
+        (terms.id, "new"), (terms.id, "existing"), (terms.id, "new"), (999, "new"),
+    ])
+    db.commit()
+    assert outcomes == [AGREEMENT_CREATED, AGREEMENT_DUPLICATE, AGREEMENT_DUPLICATE, TERMS_NOT_FOUND]
+    assert db.query(models.TermsAgreement).count() == 2
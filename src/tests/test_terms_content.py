@@ -0,0 +1,162 @@
+import random
+from datetime import datetime, timedelta
+
+from fastapi import status
+
+from .conftest import TestingSessionLocal, engine
+from ..app.config import settings
+from ..app.models import models
+from ..app.query_budget import count_queries
+from ..app.terms_content import (
+    CODEC_DELTA, CODEC_ZLIB, decode_delta, diff_contents, encode_content, encode_delta, split_segments
+)
+
+PHRASES = ["利用者", "当社", "本サービス", "登録情報", "個人情報", "料金", "解約", "禁止事項", "免責", "準拠法", "通知", "第三者"]
+
+def _article(number, revision=0):
+    rng = random.Random(number)
+    return (
+        f"第{number}条（{rng.choice(PHRASES)}）{'、'.join(rng.choices(PHRASES, k=8))}について定めます。"
+        f"{rng.choice(PHRASES)}は、第{number}条の規定に従うものとします（改定{revision}）。\n"
+    )
+
+def _document(revisions=None):
+    revisions = revisions or {}
+    return "".join(_article(number, revisions.get(number, 0)) for number in range(1, 201))
+
+def _create(client, version, content, days=0):
+    response = client.post("/terms/", json={
+        "version": version,
+        "content": content,
+        "effective_date": (datetime(2024, 1, 1) + timedelta(days=days)).isoformat(),
+    })
+    assert response.status_code == status.HTTP_201_CREATED, response.text
+    return response.json()["id"]
+
+def _stored(terms_id):
+    with TestingSessionLocal() as db:
+        row = db.get(models.TermsOfService, terms_id)
+        return row.content_codec, row.content_base_id, len(row.content_data)
+
+def test_split_segments_round_trip():
+    content = "第1条 目的。本規約は…\n\n第2条。\n末尾"
+    assert split_segments(content) == ["第1条 目的。", "本規約は…\n", "\n", "第2条。\n", "末尾"]
+    assert "".join(split_segments(content)) == content
+    assert split_segments("") == []
+
+def test_delta_round_trip():
+    base = _document()
+    for content in (
+        _document({3: 1}),
+        _document({1: 1, 40: 2}) + "附則。",
+        "全く別の本文",
+        "",
+        base,
+    ):
+        assert decode_delta(base, encode_delta(base, content)) == content
+
+def test_versions_are_stored_as_deltas_against_the_keyframe(client):
+    contents = [_document(), _document({5: 1}), _document({5: 1, 6: 1}), _document({5: 2, 6: 1, 7: 1})]
+    ids = [_create(client, f"1.{i}.0", content, days=i) for i, content in enumerate(contents)]
+
+    keyframe = _stored(ids[0])
+    assert keyframe[:2] == (CODEC_ZLIB, None)
+    for terms_id in ids[1:]:
+        codec, base_id, size = _stored(terms_id)
+        assert (codec, base_id) == (CODEC_DELTA, ids[0])
+        # 差分は全文の圧縮よりも1桁小さい
+        assert size * 10 < keyframe[2]
+    for terms_id, content in zip(ids, contents):
+        assert client.get(f"/terms/{terms_id}").json()["content"] == content
+    assert client.get("/terms/latest").json()["content"] == contents[-1]
+
+def test_new_keyframe_when_the_delta_is_large(client):
+    first = _create(client, "1.0.0", _document())
+    second = _create(client, "2.0.0", "".join(f"第{n}条 全面改定した条文{n * 7}です。\n" for n in range(60)), days=1)
+    third = _create(client, "2.1.0", "".join(f"第{n}条 全面改定した条文{n * 7}です。\n" for n in range(61)), days=2)
+    assert _stored(first)[0] == CODEC_ZLIB
+    assert _stored(second)[:2] == (CODEC_ZLIB, None)
+    assert _stored(third)[:2] == (CODEC_DELTA, second)
+
+def test_delta_encoding_can_be_disabled(client, monkeypatch):
+    monkeypatch.setattr(settings, "terms_delta_encoding", False)
+    ids = [_create(client, f"1.{i}.0", _document({1: i}), days=i) for i in range(2)]
+    assert [_stored(terms_id)[0] for terms_id in ids] == [CODEC_ZLIB, CODEC_ZLIB]
+    assert client.get(f"/terms/{ids[1]}").json()["content"] == _document({1: 1})
+
+def test_list_omits_content_unless_requested(client):
+    contents = [_document(), _document({2: 1})]
+    ids = [_create(client, f"1.{i}.0", content, days=i) for i, content in enumerate(contents)]
+
+    summary = client.get("/terms/")
+    assert [sorted(item) for item in summary.json()] == [
+        ["content_length", "created_at", "effective_date", "id", "version"]
+    ] * 2
+    assert [item["content_length"] for item in summary.json()] == [len(content) for content in contents]
+
+    full = client.get("/terms/", params={"include_content": "true"})
+    assert [item["content"] for item in full.json()] == contents
+    assert [item["id"] for item in full.json()] == ids
+    assert len(summary.content) * 10 < len(full.content)
+    # 表現が異なるので ETag も異なり、それぞれの ETag で 304 になる
+    assert summary.headers["ETag"] != full.headers["ETag"]
+    assert client.get("/terms/", headers={"If-None-Match": summary.headers["ETag"]}).status_code == 304
+    assert client.get(
+        "/terms/", params={"include_content": "true"}, headers={"If-None-Match": summary.headers["ETag"]}
+    ).status_code == 200
+
+def test_list_does_not_read_content(client):
+    _create(client, "1.0.0", _document())
+    with count_queries(engine) as counter:
+        client.get("/terms/")
+    assert counter.count == 1
+    assert "content_data" not in counter.statements[0]
+    # 本文付きでもキーフレームはページと一緒に1回でまとめて読む
+    _create(client, "1.1.0", _document({1: 1}), days=1)
+    with count_queries(engine) as counter:
+        client.get("/terms/", params={"include_content": "true"})
+    assert counter.count == 1
+
+def test_diff_between_versions(client):
+    base = _document()
+    content = _document({3: 1}).replace(_article(10), "") + "附則。本規約は2024年から施行します。"
+    first = _create(client, "1.0.0", base)
+    second = _create(client, "1.1.0", content, days=1)
+
+    response = client.get(f"/terms/{second}/diff")
+    assert response.status_code == status.HTTP_200_OK
+    diff = response.json()
+    assert (diff["terms_id"], diff["version"], diff["base_id"], diff["base_version"]) == (
+        second, "1.1.0", first, "1.0.0"
+    )
+    assert diff["changes"] == diff_contents(base, content)
+    assert [(change["removed"], change["added"]) for change in diff["changes"]] == [
+        (_article(3).split("。")[1] + "。\n", _article(3, 1).split("。")[1] + "。\n"),
+        (_article(10), ""),
+        ("", "附則。本規約は2024年から施行します。"),
+    ]
+    # 変更箇所を base に当てはめると新しい本文になる
+    patched, position = [], 0
+    for change in diff["changes"]:
+        patched.append(base[position:change["base_offset"]] + change["added"])
+        position = change["base_offset"] + len(change["removed"])
+    assert "".join(patched) + base[position:] == content
+
+    reverse = client.get(f"/terms/{first}/diff", params={"base_id": second}).json()
+    assert [(c["removed"], c["added"]) for c in reverse["changes"]] == [
+        (c["added"], c["removed"]) for c in diff["changes"]
+    ]
+    assert client.get(f"/terms/{first}/diff", params={"base_id": first}).json()["changes"] == []
+
+def test_diff_not_found(client):
+    first = _create(client, "1.0.0", _document())
+    assert client.get(f"/terms/{first}/diff").status_code == status.HTTP_404_NOT_FOUND
+    assert client.get(f"/terms/{first}/diff", params={"base_id": 999}).status_code == status.HTTP_404_NOT_FOUND
+    assert client.get("/terms/999/diff").status_code == status.HTTP_404_NOT_FOUND
+
+def test_encode_content_falls_back_to_full_text():
+    base = _document()
+    values = encode_content("無関係な短い本文。", (1, base))
+    assert (values["content_codec"], values["content_base_id"], values["content_length"]) == (CODEC_ZLIB, None, 9)
+    values = encode_content(_document({1: 1}), (1, base))
+    assert (values["content_codec"], values["content_base_id"]) == (CODEC_DELTA, 1)
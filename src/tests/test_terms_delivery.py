@@ -0,0 +1,156 @@
+import gzip
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import status
+from pydantic import TypeAdapter
+from sqlalchemy import text
+
+from .conftest import engine
+from ..app.query_budget import count_queries
+from ..app.schemas import schemas
+from ..app.terms_delivery import (
+    TERMS_MAX_AGE_SECONDS, RangeNotSatisfiable, TermsResponseCache, negotiate_encoding, parse_range,
+    terms_response_cache,
+)
+
+IDENTITY = {"Accept-Encoding": "identity"}
+
+def _create(client, version="1.0.0", content="第1条 本規約は会員に適用されます。\n" * 50, days=1):
+    response = client.post("/terms/", json={
+        "version": version,
+        "content": content,
+        "effective_date": (datetime.utcnow() - timedelta(days=days)).isoformat(),
+    })
+    assert response.status_code == status.HTTP_201_CREATED
+    return response.json()
+
+def test_precompressed_response(client):
+    created = _create(client)
+    terms_id = created["id"]
+    expected = TypeAdapter(schemas.TermsOfService).dump_json(schemas.TermsOfService(**created))
+
+    plain = client.get(f"/terms/{terms_id}", headers=IDENTITY)
+    assert plain.status_code == status.HTTP_200_OK
+    assert plain.content == expected
+    assert "content-encoding" not in plain.headers
+    assert plain.headers["cache-control"] == f"public, max-age={TERMS_MAX_AGE_SECONDS}, immutable"
+    assert plain.headers["vary"] == "Accept-Encoding"
+    assert plain.headers["accept-ranges"] == "bytes"
+    assert plain.headers["content-type"] == "application/json"
+
+    compressed = client.get(f"/terms/{terms_id}", headers={"Accept-Encoding": "gzip"})
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert compressed.content == expected
+    assert int(compressed.headers["content-length"]) < len(expected) / 5
+    # 強い ETag（符号化ごとに異なる）
+    assert not plain.headers["etag"].startswith("W/")
+    assert plain.headers["etag"] != compressed.headers["etag"]
+
+    latest = client.get("/terms/latest", headers=IDENTITY)
+    assert latest.content == expected
+    assert latest.headers["etag"] == plain.headers["etag"]
+    assert latest.headers["cache-control"] == "public, max-age=60"
+
+def test_not_modified(client):
+    terms_id = _create(client)["id"]
+    etag = client.get(f"/terms/{terms_id}").headers["etag"]
+    response = client.get(f"/terms/{terms_id}", headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response.headers["etag"] == etag
+    assert response.headers["cache-control"].endswith("immutable")
+    last_modified = client.get(f"/terms/{terms_id}").headers["last-modified"]
+    assert client.get(
+        f"/terms/{terms_id}", headers={"If-Modified-Since": last_modified}
+    ).status_code == status.HTTP_304_NOT_MODIFIED
+
+def test_range_requests(client):
+    terms_id = _create(client)["id"]
+    full = client.get(f"/terms/{terms_id}", headers=IDENTITY)
+    body, etag = full.content, full.headers["etag"]
+
+    def get_range(value, **headers):
+        return client.get(f"/terms/{terms_id}", headers={**IDENTITY, "Range": value, **headers})
+
+    response = get_range("bytes=0-9")
+    assert response.status_code == status.HTTP_206_PARTIAL_CONTENT
+    assert response.content == body[:10]
+    assert response.headers["content-range"] == f"bytes 0-9/{len(body)}"
+    assert get_range("bytes=100-").content == body[100:]
+    assert get_range("bytes=-20").content == body[-20:]
+    assert get_range(f"bytes=10-{len(body) * 2}").content == body[10:]
+    response = get_range(f"bytes={len(body)}-")
+    assert response.status_code == status.HTTP_416_RANGE_NOT_SATISFIABLE
+    assert response.headers["content-range"] == f"bytes */{len(body)}"
+    # 複数の範囲・解釈できない範囲・If-Range の不一致は全体を返す
+    assert get_range("bytes=0-1,5-6").content == body
+    assert get_range("items=0-1").content == body
+    assert get_range("bytes=0-9", **{"If-Range": '"other"'}).status_code == status.HTTP_200_OK
+    assert get_range("bytes=0-9", **{"If-Range": etag}).status_code == status.HTTP_206_PARTIAL_CONTENT
+
+def test_cached_response_skips_content_decoding(client):
+    terms_id = _create(client)["id"]
+    builds = terms_response_cache.stats()["builds"]
+    with count_queries(engine) as counter:
+        client.get(f"/terms/{terms_id}")
+    # id と作成日時だけを読み、作成時に圧縮した応答を返す
+    assert counter.count == 1
+    assert "content_data" not in counter.statements[0]
+    assert terms_response_cache.stats()["builds"] == builds
+
+def test_concurrent_misses_build_once(client):
+    terms_id = _create(client)["id"]
+    expected = client.get(f"/terms/{terms_id}", headers=IDENTITY).content
+    terms_response_cache.clear()
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        bodies = list(executor.map(
+            lambda _: client.get(f"/terms/{terms_id}", headers=IDENTITY).content, range(16)
+        ))
+    assert bodies == [expected] * 16
+    assert terms_response_cache.stats()["builds"] == 1
+
+def test_reused_id_is_not_served_from_cache(client, db):
+    first = _create(client, content="旧い本文。")
+    db.execute(text("DELETE FROM terms_of_service"))
+    db.commit()
+    second = _create(client, content="新しい本文。")
+    assert second["id"] == first["id"]
+    assert client.get(f"/terms/{second['id']}").json()["content"] == "新しい本文。"
+
+def test_negotiate_encoding():
+    available = ["br", "gzip"]
+    assert negotiate_encoding(None, available) == "identity"
+    assert negotiate_encoding("gzip, deflate", available) == "gzip"
+    assert negotiate_encoding("gzip, br", available) == "br"
+    assert negotiate_encoding("gzip;q=1, br;q=0.5", available) == "gzip"
+    assert negotiate_encoding("br;q=0, gzip;q=0", available) == "identity"
+    assert negotiate_encoding("*", available) == "br"
+    assert negotiate_encoding("identity, gzip;q=0.5", available) == "identity"
+    assert negotiate_encoding("zstd", available) == "identity"
+    assert negotiate_encoding("GZIP;Q=0.8", ["gzip"]) == "gzip"
+
+def test_parse_range():
+    assert parse_range("bytes=0-0", 10) == (0, 0)
+    assert parse_range("bytes=5-", 10) == (5, 9)
+    assert parse_range("bytes=-3", 10) == (7, 9)
+    assert parse_range("bytes=-30", 10) == (0, 9)
+    assert parse_range("bytes=3-1", 10) is None
+    assert parse_range("bytes=-", 10) is None
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range("bytes=10-", 10)
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range("bytes=-0", 10)
+
+def test_cache_eviction():
+    cache = TermsResponseCache(max_entries=2)
+    now = datetime(2024, 1, 1)
+    terms = [
+        schemas.TermsOfService(id=i, version=f"1.{i}", content=f"本文{i}", effective_date=now, created_at=now)
+        for i in range(3)
+    ]
+    for item in terms:
+        cache.put(item)
+    assert cache.get(0, now) is None
+    assert gzip.decompress(cache.get(2, now).bodies["gzip"]) == cache.get(2, now).bodies["identity"]
+    assert cache.stats()["entries"] == 2